@@ -15,15 +15,37 @@ TODO:
 #########################################
 """
 
-import bpy
+import atexit
+import hashlib
+import heapq
+import io
+import json
 import math
+import mmap
 import os
+import queue
 import sys
+import tempfile
+import threading
 import time
+import zipfile
+import zlib
 from random import random, randint
 
-from mathutils import Matrix
-from mathutils import Vector as Vec
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# Blender's modules are only needed to build objects; the code that works on mesh arrays does without them
+try:
+    import bpy
+    import bmesh
+    from mathutils import Matrix
+    from mathutils import Vector as Vec
+except ImportError:
+    bpy = None
+    bmesh = None
+    Matrix = None
+    Vec = None
 
 # russbpy_modnum_gen - The global modifier number generator.
 #
@@ -37,6 +59,60 @@ russbpy_fn=32
 #                               Only set this, via SetTransformMetadata(), if you _know_ what you are doing!
 russbpy_transform_metatdata=False
 
+# russbpy_deferred_transforms - Set to True to collect the transformations of each object into a pending matrix,
+#                               which is only applied when something needs the object's state. See Flush().
+russbpy_deferred_transforms = False
+
+# russbpy_matrix_transforms - Set to True to transform objects by writing their matrices or mesh data directly,
+#                             or to False to use the bpy.ops.transform operators, which need a selection and a 3D view.
+russbpy_matrix_transforms = True
+
+# russbpy_pending_transforms - The pending world-space transformation of each object, keyed by ob.as_pointer(),
+#                              as [ ob, Transformation, vertex median or None ]
+russbpy_pending_transforms = {}
+
+# russbpy_boolean_planner - How Boolean() checks whether its operands can overlap before running the solver:
+#                           'AABB' compares world-space axis-aligned bounding boxes, 'OBB' also compares the
+#                           objects' oriented bounding boxes, and None always runs the solver.
+russbpy_boolean_planner = 'AABB'
+
+# russbpy_boolean_solver - How Boolean() picks the Blender solver: 'AUTO' chooses one per call and retries with the other
+#                          when the result is bad, a solver name ( 'FAST', 'EXACT', 'BMESH' or 'CARVE' ) always uses it,
+#                          and None leaves Blender's default. See ChooseBooleanSolver().
+russbpy_boolean_solver = 'AUTO'
+
+# russbpy_boolean_convex_faces - The largest cutter, in triangles, that ChooseBooleanSolver() checks for convexity.
+#                                Larger cutters are treated as not convex.
+russbpy_boolean_convex_faces = 2000
+
+# russbpy_boolean_exact_faces - The number of triangles in both operands above which ChooseBooleanSolver() uses the fast
+#                               solver for a non-convex cutter, as the exact one would take too long.
+russbpy_boolean_exact_faces = 100000
+
+# russbpy_boolean_engine - What Boolean() runs: 'blender' applies a Boolean modifier, and 'numpy' runs BooleanData()
+#                          on the operands' triangles, which needs no Blender solver.
+russbpy_boolean_engine = 'blender'
+
+# russbpy_selection - The objects that russbpy has selected, keyed by ob.as_pointer(),
+#                     or None when the selection is not known and SelectNone() has to use the operator.
+russbpy_selection = None
+
+# russbpy_background_output - Set to True to have Fini() snapshot the mesh arrays and write the files on a background thread.
+#                             See QueueOutput() and WaitForOutput().
+russbpy_background_output = False
+
+# russbpy_output_queue - The bounded queue of output jobs for the background writer thread, or None before it is started
+#
+russbpy_output_queue = None
+
+# russbpy_output_errors - The exceptions raised by background output jobs, re-raised by WaitForOutput()
+#
+russbpy_output_errors = []
+
+# russbpy_stream - The MeshStream that Emit() writes objects to, or None when not streaming. See OpenStream().
+#
+russbpy_stream = None
+
 # russbpy_quiet - Set to True to prevent output to the console from the Print() function
 #
 russbpy_quiet = False
@@ -113,6 +189,339 @@ class Shapeways_StrongAndFlexiblePlasticUnpolished:
 
         self.clearance_mm 			= 0.5 * factor
 
+        self.resolution_mm 			= 0.1 * factor
+
+
+#################################################
+# Mesh Data
+#################################################
+
+class MeshData:
+    def __init__( self, verts, faces=None, loop_starts=None, edges=None, oriented=False ):
+        """ Set the mesh data
+
+        The data is held in contiguous NumPy arrays laid out the way Blender stores meshes,
+        so Mesh() can copy it into a Blender mesh in bulk:
+            verts       -- N x 3 float32 vertex coordinates
+            loops       -- The flat int32 array of vertex indices of all the faces, face after face
+            loop_starts -- The int32 index into loops of the first vertex of each face
+            loop_totals -- The int32 number of vertices in each face
+            edges       -- E x 2 int32 loose edges
+
+        Keyword arguments:
+        verts       -- The (x,y,z) vertices, as an N x 3 array or a list of points
+        faces       -- The faces, as an F x K array when every face has K vertices,
+                       as a list of faces (v1,v2,v3,...) of mixed sizes,
+                       or as a flat array of vertex indices when loop_starts is given.
+                       Note that the faces are constructed using the right-hand rule
+        loop_starts -- The index into faces of the first vertex of each face, when faces is flat
+        edges       -- The (v1,v2) edges, as an E x 2 array or a list
+        oriented    -- Are the faces already wound consistently, with the normals facing outward?
+                       Mesh() skips OrientOutward() for such data.
+        """
+        self.oriented = oriented
+        self.verts = np.ascontiguousarray( np.reshape( verts, ( -1, 3 ) ), dtype=np.float32 )
+
+        if faces is None or len( faces ) == 0:
+            self.loops = np.zeros( 0, dtype=np.int32 )
+            self.loop_starts = np.zeros( 0, dtype=np.int32 )
+            self.loop_totals = np.zeros( 0, dtype=np.int32 )
+        elif loop_starts is not None:
+            self.loops = np.ascontiguousarray( faces, dtype=np.int32 )
+            self.loop_starts = np.ascontiguousarray( loop_starts, dtype=np.int32 )
+            self.loop_totals = np.diff( np.append( self.loop_starts, len( self.loops ) ) ).astype( np.int32 )
+        else:
+            if isinstance( faces, np.ndarray ):
+                sizes = None
+            else:
+                sizes = [ len( f ) for f in faces ]
+                if min( sizes ) == max( sizes ):
+                    sizes = None
+            if sizes is None:
+                faces = np.asarray( faces, dtype=np.int32 )
+                self.loops = np.ascontiguousarray( faces.ravel() )
+                self.loop_totals = np.full( len( faces ), faces.shape[1], dtype=np.int32 )
+            else:
+                self.loops = np.fromiter( ( v for f in faces for v in f ), dtype=np.int32, count=sum( sizes ) )
+                self.loop_totals = np.array( sizes, dtype=np.int32 )
+            self.loop_starts = ( np.cumsum( self.loop_totals ) - self.loop_totals ).astype( np.int32 )
+
+        if edges is None or len( edges ) == 0:
+            self.edges = np.zeros( ( 0, 2 ), dtype=np.int32 )
+        else:
+            self.edges = np.ascontiguousarray( np.reshape( edges, ( -1, 2 ) ), dtype=np.int32 )
+
+    def vertex_count( self ):
+        """ Return the number of vertices
+        """
+        return len( self.verts )
+
+    def face_count( self ):
+        """ Return the number of faces
+        """
+        return len( self.loop_starts )
+
+    def face_list( self ):
+        """ Return the faces as a list of vertex index tuples, eg. for use with from_pydata()
+        """
+        loops = self.loops.tolist()
+        return [ tuple( loops[ s:s + t ] ) for s, t in zip( self.loop_starts.tolist(), self.loop_totals.tolist() ) ]
+
+    def triangles( self ):
+        """ Return the faces as a T x 3 array of triangles, splitting each face as a fan around its first vertex
+        """
+        ntris = self.loop_totals - 2
+        face = np.repeat( np.arange( len( ntris ) ), ntris )
+        k = np.arange( len( face ) ) - np.repeat( np.cumsum( ntris ) - ntris, ntris )
+        first = self.loop_starts[ face ]
+        return np.column_stack( ( self.loops[ first ], self.loops[ first + k + 1 ], self.loops[ first + k + 2 ] ) )
+
+    def copy( self ):
+        """ Return a deep copy of the mesh data
+        """
+        md = MeshData( self.verts.copy(), self.loops.copy(), self.loop_starts.copy(), self.edges.copy(), self.oriented )
+        return md
+
+    def flip( self, mask=None ):
+        """ Reverse the winding (and so the normal) of faces, in place
+
+        Keyword arguments:
+        mask -- A boolean array selecting the faces to flip. None means all faces.
+
+        Return nothing
+        """
+        face = np.repeat( np.arange( self.face_count() ), self.loop_totals )
+        if mask is not None:
+            sel = np.asarray( mask, dtype=bool )[ face ]
+        else:
+            sel = np.ones( len( self.loops ), dtype=bool )
+        # Loop k of a face starting at s with t vertices moves to s + t - 1 - k
+        k = np.arange( len( self.loops ) ) - self.loop_starts[ face ]
+        dest = np.where( sel, self.loop_starts[ face ] + self.loop_totals[ face ] - 1 - k, np.arange( len( self.loops ) ) )
+        loops = np.empty_like( self.loops )
+        loops[ dest ] = self.loops
+        self.loops = loops
+
+    def half_edges( self ):
+        """ Return the directed edges of the faces, one per loop
+
+        Return the tuple ( a, b, face ) of arrays, where loop i runs from vertex a[i] to vertex b[i] in face face[i]
+        """
+        face = np.repeat( np.arange( self.face_count() ), self.loop_totals ).astype( np.int32 )
+        nxt = np.arange( 1, len( self.loops ) + 1 )
+        last = self.loop_starts + self.loop_totals - 1
+        nxt[ last ] = self.loop_starts
+        return ( self.loops, self.loops[ nxt ], face )
+
+def ConnectedComponents( n, pairs ):
+    """Label the connected components of a graph
+
+    Keyword arguments:
+    n     -- The number of nodes, numbered 0 .. n-1
+    pairs -- The edges of the graph, as a P x 2 array of node numbers
+
+    Return an array of n labels, where nodes in the same component share the label of the lowest-numbered node in it
+    """
+    parent = np.arange( n )
+    pairs = np.asarray( pairs ).reshape( -1, 2 )
+    a = pairs[ :, 0 ]
+    b = pairs[ :, 1 ]
+    while True:
+        ra = parent[ a ]
+        rb = parent[ b ]
+        diff = ra != rb
+        if not diff.any():
+            return parent
+        # Hook the higher root of each straddling edge onto the lower one,
+        # then shortcut the chains so every node points straight at its root.
+        np.minimum.at( parent, np.maximum( ra[ diff ], rb[ diff ] ), np.minimum( ra[ diff ], rb[ diff ] ) )
+        while True:
+            jumped = parent[ parent ]
+            if np.array_equal( jumped, parent ):
+                break
+            parent = jumped
+
+def OrientOutward( md ):
+    """Wind the faces of the mesh data consistently, with the normals facing outward
+
+    This does the same job as Blender's normals_make_consistent(), but on the arrays,
+    so it needs no Edit mode switch. Within each connected piece of the mesh, the faces
+    are flipped to agree with their neighbours, walking outward from one face at a time.
+    Each piece is then turned inside-out if its signed volume is negative.
+
+    Keyword arguments:
+    md -- The MeshData to orient, which is changed in place
+
+    Return the MeshData
+    """
+    nf = md.face_count()
+    if nf == 0:
+        md.oriented = True
+        return md
+
+    # Pair up faces sharing an edge. Two faces agree if they run along the edge in opposite directions.
+    ( a, b, face ) = md.half_edges()
+    lo = np.minimum( a, b ).astype( np.int64 )
+    hi = np.maximum( a, b ).astype( np.int64 )
+    key = lo * md.vertex_count() + hi
+    order = np.argsort( key, kind='mergesort' )
+    key = key[ order ]
+    first = np.concatenate( ( [ True ], key[ 1: ] != key[ :-1 ] ) )
+    group = np.cumsum( first ) - 1
+    group_size = np.bincount( group )
+    size = group_size[ group ]
+    pair = np.nonzero( ( size == 2 ) & first )[ 0 ]
+    f1 = face[ order[ pair ] ]
+    f2 = face[ order[ pair + 1 ] ]
+    forward = a < b
+    rel = ( forward[ order[ pair ] ] == forward[ order[ pair + 1 ] ] ).astype( np.int8 )
+
+    comp = ConnectedComponents( nf, np.column_stack( ( f1, f2 ) ) )
+
+    # Breadth-first search from one face of every piece at once.
+    src = np.concatenate( ( f1, f2 ) )
+    dst = np.concatenate( ( f2, f1 ) )
+    rel = np.concatenate( ( rel, rel ) )
+    by_src = np.argsort( src, kind='mergesort' )
+    src = src[ by_src ]
+    dst = dst[ by_src ]
+    rel = rel[ by_src ]
+    start = np.searchsorted( src, np.arange( nf ) )
+    count = np.searchsorted( src, np.arange( nf ), side='right' ) - start
+
+    flip = np.full( nf, -1, dtype=np.int8 )
+    frontier = np.nonzero( comp == np.arange( nf ) )[ 0 ]
+    flip[ frontier ] = 0
+    while len( frontier ):
+        c = count[ frontier ]
+        idx = np.repeat( start[ frontier ] - np.cumsum( c ) + c, c ) + np.arange( c.sum() )
+        parent = np.repeat( frontier, c )
+        nbr = dst[ idx ]
+        todo = flip[ nbr ] < 0
+        nbr = nbr[ todo ]
+        ( nbr, at ) = np.unique( nbr, return_index=True )
+        flip[ nbr ] = flip[ parent[ todo ][ at ] ] ^ rel[ idx[ todo ][ at ] ]
+        frontier = nbr
+    md.flip( flip == 1 )
+
+    # Decide which way is out for each piece, from its signed volume as seen from the center of the mesh.
+    # For a closed piece this is its true volume. An open piece (eg. one side of a box)
+    # still has a positive volume when it faces away from the center.
+    verts = md.verts.astype( np.float64 )
+    center = ( verts.min( axis=0 ) + verts.max( axis=0 ) ) / 2.0
+    verts -= center
+    tris = md.triangles()
+    tri_comp = comp[ np.repeat( np.arange( nf ), md.loop_totals - 2 ) ]
+    p0 = verts[ tris[ :, 0 ] ]
+    vol = np.einsum( 'ij,ij->i', p0, np.cross( verts[ tris[ :, 1 ] ], verts[ tris[ :, 2 ] ] ) )
+    comp_vol = np.bincount( tri_comp, weights=vol, minlength=nf )
+    tiny = 1e-9 * np.ptp( verts, axis=0 ).max() ** 3
+    md.flip( ( comp_vol < -tiny )[ comp ] )
+    md.oriented = True
+    return md
+
+def ParametricSurfaceData( f, u, v, u_closed=False, v_closed=True, start_pole=None, end_pole=None, quads=True, oriented=False ):
+    """Return the MeshData of a parametric surface, evaluated over a whole (u,v) grid at once
+
+    The vertices are laid out in rows, one row per u value: vertex i * len(v) + j is at f( u[i], v[j] ),
+    followed by the start pole and the end pole, if any.
+    Each face runs one step along u, then one step along v, so its normal points along df/du x df/dv.
+    Faces are made for each row in turn, after the start pole's triangles and before the end pole's.
+
+    Keyword arguments:
+    f          -- The surface function f( U, V ), which takes arrays of u and v values that broadcast together
+                  and returns the ( X, Y, Z ) coordinates (arrays or scalars that broadcast to the same shape)
+    u          -- The u values, or the number of evenly-spaced u values in [0,1] ([0,1) when u_closed)
+    v          -- The v values, or the number of evenly-spaced v values in [0,1] ([0,1) when v_closed)
+    u_closed   -- Does the last row join back to the first row?
+    v_closed   -- Does the last value in each row join back to the first one?
+    start_pole -- The (x,y,z) point to close the first row with a fan of triangles, or None
+    end_pole   -- The (x,y,z) point to close the last row with a fan of triangles, or None
+    quads      -- Use quads or triangles?
+    oriented   -- Does df/du x df/dv point outward? This marks the MeshData as oriented
+
+    Return the MeshData object
+    """
+    if np.isscalar( u ):
+        u = np.arange( u ) / float( u if u_closed else max( u - 1, 1 ) )
+    if np.isscalar( v ):
+        v = np.arange( v ) / float( v if v_closed else max( v - 1, 1 ) )
+    u = np.asarray( u )
+    v = np.asarray( v )
+    nu = len( u )
+    nv = len( v )
+
+    xyz = np.broadcast_arrays( *f( u[ :, None ], v[ None, : ] ) )
+    verts = np.empty( ( nu * nv + ( start_pole is not None ) + ( end_pole is not None ), 3 ) )
+    for k in range( 0, 3 ):
+        verts[ :nu * nv, k ] = np.broadcast_to( xyz[ k ], ( nu, nv ) ).ravel()
+    n = nu * nv
+    if start_pole is not None:
+        start = n
+        verts[ n ] = start_pole
+        n += 1
+    if end_pole is not None:
+        end = n
+        verts[ n ] = end_pole
+
+    # a is each grid vertex, b the next one along u, c the next along both, d the next along v
+    a = np.arange( nu * nv ).reshape( nu, nv )
+    b = np.roll( a, -1, axis=0 )
+    d = np.roll( a, -1, axis=1 )
+    c = np.roll( b, -1, axis=1 )
+    rows = nu if u_closed else nu - 1
+    cols = nv if v_closed else nv - 1
+    cells = np.stack( ( d, a, b, c ), axis=-1 )[ :rows, :cols ].reshape( -1, 4 )
+    if not quads:
+        cells = cells[ :, [ 0, 1, 2, 2, 3, 0 ] ].reshape( -1, 3 )
+
+    parts = []
+    if start_pole is not None:
+        parts.append( np.column_stack( ( a[ 0, :cols ], d[ 0, :cols ], np.full( cols, start ) ) ) )
+    parts.append( cells )
+    if end_pole is not None:
+        parts.append( np.column_stack( ( d[ nu - 1, :cols ], a[ nu - 1, :cols ], np.full( cols, end ) ) ) )
+
+    loops = np.concatenate( [ p.ravel() for p in parts ] )
+    totals = np.concatenate( [ np.full( len( p ), p.shape[1] ) for p in parts ] )
+    return MeshData( verts, loops, np.cumsum( totals ) - totals, oriented=oriented )
+
+def SweepData( path, x_axes, y_axes, profile, scales=None, start_pole=None, end_pole=None, quads=True, oriented=False ):
+    """Return the MeshData of a closed cross-section profile swept along a path, with every frame placed at once
+
+    Frame i places profile point (a,b) at path[i] + scales[i] * ( a * x_axes[i] + b * y_axes[i] ).
+    The faces are built by ParametricSurfaceData(), with u along the path and v around the profile,
+    so they face outward when the profile runs clockwise about the direction of travel.
+
+    Keyword arguments:
+    path       -- The S x 3 positions of the profile's origin along the path
+    x_axes     -- The S x 3 directions of the profile's first axis in each frame
+    y_axes     -- The S x 3 directions of the profile's second axis in each frame
+    profile    -- The P x 2 (a,b) points of the closed profile
+    scales     -- The S scale factors of the profile in each frame, or None for all 1
+    start_pole -- The (x,y,z) point to close the start with a fan of triangles, or None
+    end_pole   -- The (x,y,z) point to close the end with a fan of triangles, or None
+    quads      -- Use quads or triangles?
+    oriented   -- Do the faces point outward? This marks the MeshData as oriented
+
+    Return the MeshData object
+    """
+    path = np.asarray( path, dtype=float )
+    x_axes = np.asarray( x_axes, dtype=float )
+    y_axes = np.asarray( y_axes, dtype=float )
+    profile = np.asarray( profile, dtype=float )
+    if scales is None:
+        scales = np.ones( len( path ) )
+    else:
+        scales = np.asarray( scales, dtype=float )
+
+    def f( i, j ):
+        a = scales[ i ] * profile[ j, 0 ]
+        b = scales[ i ] * profile[ j, 1 ]
+        return tuple( path[ i, k ] + a * x_axes[ i, k ] + b * y_axes[ i, k ] for k in range( 0, 3 ) )
+
+    return ParametricSurfaceData( f, np.arange( len( path ) ), np.arange( len( profile ) ),
+                                  start_pole=start_pole, end_pole=end_pole, quads=quads, oriented=oriented )
 
 #################################################
 # 2D Shapes
@@ -153,12 +562,28 @@ def Circle( name=None, r=1, vertices=None, location=(0,0,0) ):
     """
     if vertices is None:
         vertices = russbpy_fn
-    bpy.ops.mesh.primitive_circle_add( radius=r, vertices=vertices, location=location )
-    ob = bpy.context.object
-    if name is not None:
-        ob.name = name
+    ob = Mesh( name if name is not None else "Circle", CircleData( r, vertices ) )
+    ob.location = location
     return( ob )
 
+def CircleData( r=1, vertices=32 ):
+    """Return the MeshData of a circle in the XY plane, centered on the origin, as Blender's circle primitive makes it
+
+    The circle is a loop of edges without a face, starting on the Y axis and running counter-clockwise:
+    vertex k is at angle 360 * k / vertices degrees from +Y.
+    Edge k runs back from vertex k + 1 to vertex k, the last edge from vertex 0.
+
+    Keyword arguments:
+    r        -- The radius
+    vertices -- The number of vertices to use in the polygon approximation of the circle
+
+    Return the MeshData object
+    """
+    angles = 2.0 * math.pi * np.arange( vertices ) / vertices
+    verts = np.column_stack( ( -r * np.sin( angles ), r * np.cos( angles ), np.zeros( vertices ) ) )
+    i = np.arange( vertices )
+    return MeshData( verts, edges=np.column_stack( ( ( i + 1 ) % vertices, i ) ), oriented=True )
+
 def Plane( name=None, location=(0,0,0), size=1.0 ):
     """Draw a plane in the XY plane and return the corresponding object
     The plane is 2 units by 2 units, extending one unit in each of the X, -X, Y and -Y directions
@@ -170,13 +595,23 @@ def Plane( name=None, location=(0,0,0), size=1.0 ):
 
     Return the plane object
     """
-    bpy.ops.mesh.primitive_plane_add( location=location )
-    ob = bpy.context.object
-    if name is not None:
-        ob.name = name
+    ob = Mesh( name if name is not None else "Plane", PlaneData() )
+    ob.location = location
     ScaleUniform( ob, size )
     return( ob )
 
+def PlaneData():
+    """Return the MeshData of Blender's plane primitive: a 2 x 2 square in the XY plane, centered on the origin, facing up
+
+    Vertex 2 * ( y > 0 ) + ( x > 0 ) is the corner at (x,y).
+
+    Keyword arguments:
+    None
+
+    Return the MeshData object
+    """
+    return MeshData( [ ( -1, -1, 0 ), ( 1, -1, 0 ), ( -1, 1, 0 ), ( 1, 1, 0 ) ], [ ( 0, 1, 3, 2 ) ], oriented=True )
+
 def NGon( name=None, r=1.0, sides=8, location=(0,0,0) ):
     """Draw a regular N-gon in the XY plane and return the corresponding object
 
@@ -283,12 +718,55 @@ def Sphere( name=None, r=1, segments=None, rings=None, location=(0,0,0) ):
         segments = russbpy_fn
     if rings is None:
         rings = int( russbpy_fn / 2 )
-    bpy.ops.mesh.primitive_uv_sphere_add( size=r, segments=segments, ring_count=rings, location=location )
-    ob = bpy.context.object
-    if name is not None:
-        ob.name = name
+    ob = Mesh( name if name is not None else "Sphere", UVSphereData( r, segments, rings ) )
+    ob.location = location
     return( ob )
 
+def UVSphereData( r=1, segments=32, rings=16 ):
+    """Return the MeshData of a UV sphere centered on the origin, laid out as Blender's UV sphere primitive
+
+    Blender draws one meridian from the top pole down to the bottom pole, on the +Y side, then turns copies
+    of it around the Z axis, clockwise seen from above, merging the copies' poles into the first meridian's.
+    So the vertices run meridian by meridian: vertex 0 is the top pole, vertex k is point k of the first
+    meridian counting down from the top, and vertex rings is the bottom pole. Each later meridian m adds
+    its points between the poles: point k of meridian m is vertex rings + ( m - 1 ) * ( rings - 1 ) + k.
+    The faces run down each strip between neighbouring meridians in turn, from the triangle at the top pole,
+    through the quads, to the triangle at the bottom pole.
+
+    Keyword arguments:
+    r        -- The radius
+    segments -- The number of vertical segments (like beach-ball panels)
+    rings    -- The number of rings (horizontal slices)
+
+    Return the MeshData object
+    """
+    phi = math.pi * np.arange( rings + 1 ) / rings
+    theta = 2.0 * math.pi * np.arange( segments ) / segments
+
+    # index[ m, k ] is the vertex of point k of meridian m, counting the poles as points 0 and rings
+    index = np.empty( ( segments, rings + 1 ), dtype=np.int64 )
+    index[ :, 0 ] = 0
+    index[ :, rings ] = rings
+    index[ 0 ] = np.arange( rings + 1 )
+    index[ 1:, 1:rings ] = rings + 1 + np.arange( ( segments - 1 ) * ( rings - 1 ) ).reshape( segments - 1, rings - 1 )
+
+    verts = np.empty( ( rings + 1 + ( segments - 1 ) * ( rings - 1 ), 3 ) )
+    s = r * np.sin( phi )
+    verts[ index[ :, 1:rings ].ravel() ] = np.column_stack( ( np.outer( np.sin( theta ), s[ 1:rings ] ).ravel(),
+                                                             np.outer( np.cos( theta ), s[ 1:rings ] ).ravel(),
+                                                             np.tile( r * np.cos( phi[ 1:rings ] ), segments ) ) )
+    verts[ 0 ] = ( 0, 0, r )
+    verts[ rings ] = ( 0, 0, -r )
+
+    # Each face runs up meridian m, across to the next meridian and back down, so its normal points outward
+    ( a, b ) = ( index, np.roll( index, -1, axis=0 ) )
+    top = np.column_stack( ( a[ :, 1 ], a[ :, 0 ], b[ :, 1 ] ) )
+    quads = np.stack( ( a[ :, 2:rings ], a[ :, 1:rings - 1 ], b[ :, 1:rings - 1 ], b[ :, 2:rings ] ), axis=-1 )
+    bottom = np.column_stack( ( a[ :, rings ], a[ :, rings - 1 ], b[ :, rings - 1 ] ) )
+    loops = np.concatenate( ( top, quads.reshape( segments, -1 ), bottom ), axis=1 ).ravel()
+    totals = np.tile( [ 3 ] + [ 4 ] * ( rings - 2 ) + [ 3 ], segments )
+    return MeshData( verts, loops, np.cumsum( totals ) - totals, oriented=True )
+
 def MeshSphere( name=None, r=1.0, latitudes=11, longitudes=10, location=(0,0,0), quads=True ):
     """Draw a solid sphere and with evenly-spaced faces
 
@@ -302,127 +780,40 @@ def MeshSphere( name=None, r=1.0, latitudes=11, longitudes=10, location=(0,0,0),
 
     Return the sphere object
     """
+    return Mesh( name, MeshSphereData( r, latitudes, longitudes, location, quads ) )
+
+def MeshSphereData( r=1.0, latitudes=11, longitudes=10, location=(0,0,0), quads=True ):
+    """Return the MeshData of a solid sphere with evenly-spaced faces
+
+    Keyword arguments:
+    r          -- The radius
+    latitudes  -- The number of vertical latitude lines
+    longitudes -- The number of rings (horizontal slices)
+    location   -- The location of the center of the sphere
+    quads      -- Use quads or triangles?
+
+    Return the MeshData object
+    """
     # Latitudes excludes the poles, and must be odd.
     latitudes = latitudes + ( 1 - latitudes % 2 )
-    r_steps = float( r ) / float( longitudes )
-
-    verts = []
-    faces = []
 
-    # The first 0 .. longitudes-1 points are the equator
-    equator_verts = CirclePoints( r, longitudes, location=(location[0],location[1],location[2]) )
-    for v in equator_verts:
-        verts.append( v )
-
-    # Build the upper hemisphere, cross-section by cross-section.
-    # Given the latitude angle, the cross-section radius is:
-    #     csr / r = cos( lat_angle )
-    #         csr = cos( lat_angle ) * r
-    # Given the latitude angle, the height of the cross-section radius is:
-    #     csh / csr = tan( lat_angle )
-    #           csh = tan( lat_angle ) * csr
-    hem_lats = int( latitudes / 2 )
-    lat_angle = 90.0 / float( hem_lats + 1 )
-    for li in range( 1, hem_lats ):
-        csr = Cos( li * lat_angle ) * r
-        csh = Tan( li * lat_angle ) * csr
-        cs_verts = CirclePoints( csr, longitudes, location=(location[0],location[1],location[2]+csh) )
-
-        if li == 1 :
-            # Faces connecting to the equator
-            for longi in range( 0, longitudes ):
-                if quads:
-                    faces.append( ( longi,
-                                    ( longi + 1 ) % longitudes,
-                                    len( verts ) + ( longi + 1 ) % longitudes,
-                                    len( verts ) + longi ) )
-                else:
-                    faces.append( ( longi,
-                                    ( longi + 1 ) % longitudes,
-                                    len( verts ) + ( longi + 1 ) % longitudes ) )
-                    faces.append( ( len( verts ) + ( longi + 1 ) % longitudes,
-                                    len( verts ) + longi,
-                                    longi ) )
-        if li < hem_lats - 1:
-            for longi in range( 0, longitudes ):
-                if quads:
-                    faces.append( ( len( verts ) + longi,
-                                    len( verts ) + ( longi + 1 ) % longitudes,
-                                    len( verts ) + longitudes + ( longi + 1 ) % longitudes,
-                                    len( verts ) + longitudes + longi ) )
-                else:
-                    faces.append( ( len( verts ) + longi,
-                                    len( verts ) + ( longi + 1 ) % longitudes,
-                                    len( verts ) + longitudes + ( longi + 1 ) % longitudes ) )
-                    faces.append( ( len( verts ) + longitudes + ( longi + 1 ) % longitudes,
-                                    len( verts ) + longitudes + longi,
-                                    len( verts ) + longi ) )
-        else:
-            for longi in range( 0, longitudes ):
-                faces.append( ( len( verts ) + longi,
-                                len( verts ) + ( longi + 1 ) % longitudes,
-                                len( verts ) + longitudes ) )
-        for v in cs_verts:
-            verts.append( v )
-
-    verts.append( ( location[0], location[1], location[2] + r ) )
-
-    # Build the lower hemisphere, cross-section by cross-section.
-    # Given the latitude angle, the cross-section radius is:
-    #     csr / r = cos( lat_angle )
-    #         csr = cos( lat_angle ) * r
-    # Given the latitude angle, the height of the cross-section radius is:
-    #     csh / csr = tan( lat_angle )
-    #           csh = tan( lat_angle ) * csr
+    # Each latitude is a cross-section circle, from the south pole up to the north pole,
+    # and each longitude runs clockwise (seen from above) so the faces point outward.
     hem_lats = int( latitudes / 2 )
     lat_angle = 90.0 / float( hem_lats + 1 )
-    for li in range( 1, hem_lats ):
-        csr = Cos( li * lat_angle ) * r
-        csh = Tan( li * lat_angle ) * csr
-        cs_verts = CirclePoints( csr, longitudes, location=(location[0],location[1],location[2]-csh) )
-
-        if li == 1 :
-            # Faces connecting to the equator
-            for longi in range( 0, longitudes ):
-                if quads:
-                    faces.append( ( len( verts ) + longi,
-                                    len( verts ) + ( longi + 1 ) % longitudes,
-                                    ( longi + 1 ) % longitudes,
-                                    longi ) )
-                else:
-                    faces.append( ( len( verts ) + longi,
-                                    len( verts ) + ( longi + 1 ) % longitudes,
-                                    ( longi + 1 ) % longitudes ) )
-                    faces.append( ( ( longi + 1 ) % longitudes,
-                                    longi,
-                                    len( verts ) + longi ) )
-        if li < hem_lats - 1:
-            for longi in range( 0, longitudes ):
-                if quads:
-                    faces.append( ( len( verts ) + longitudes + longi,
-                                    len( verts ) + longitudes + ( longi + 1 ) % longitudes,
-                                    len( verts ) + ( longi + 1 ) % longitudes,
-                                    len( verts ) + longi ) )
-                else:
-                    faces.append( ( len( verts ) + longitudes + longi,
-                                    len( verts ) + longitudes + ( longi + 1 ) % longitudes,
-                                    len( verts ) + ( longi + 1 ) % longitudes ) )
-                    faces.append( ( len( verts ) + ( longi + 1 ) % longitudes,
-                                    len( verts ) + longi,
-                                    len( verts ) + longitudes + longi ) )
-        else:
-            for longi in range( 0, longitudes ):
-                faces.append( ( len( verts ) + longitudes,
-                                len( verts ) + ( longi + 1 ) % longitudes,
-                                len( verts ) + longi ) )
-        for v in cs_verts:
-            verts.append( v )
+    hem_rows = max( hem_lats, 1 )
+    lats = np.radians( np.arange( 1 - hem_rows, hem_rows ) * lat_angle )
+    longs = -2.0 * math.pi * np.arange( longitudes ) / longitudes
 
-    verts.append( ( location[0], location[1], location[2] - r ) )
+    def f( lat, lon ):
+        return ( location[0] + r * np.cos( lat ) * np.cos( lon ),
+                 location[1] + r * np.cos( lat ) * np.sin( lon ),
+                 location[2] + r * np.sin( lat ) )
 
-    ob = Mesh( name, verts, [], faces )
-
-    return ob
+    return ParametricSurfaceData( f, lats, longs,
+                                start_pole=( location[0], location[1], location[2] - r ),
+                                end_pole=( location[0], location[1], location[2] + r ),
+                                quads=quads, oriented=True )
 
 def HelixPoints( r=1.0, h=1.0, num_loops=3, points_per_loop=10, clockwise=False ):
     """Return an array of 3D points on a helix around a cylinder from end to end
@@ -446,21 +837,13 @@ def HelixPoints( r=1.0, h=1.0, num_loops=3, points_per_loop=10, clockwise=False
     if clockwise:
         loop_step = -loop_step
 
-    points = []
-    loop_angle = 0.0
-    z = -h / 2.0
-    for l in range( 0, num_loops ):
-        for p in range( 0, points_per_loop ):
-            # Calculate the cylindrical position
-            x = r * Cos( loop_angle )
-            y = r * Sin( loop_angle )
-
-            points.append( ( x, y, z ) )
-
-            loop_angle += loop_step
-            z += z_step
+    i = np.arange( num_loops * points_per_loop )
+    loop_angle = np.radians( i * loop_step )
+    x = r * np.cos( loop_angle )
+    y = r * np.sin( loop_angle )
+    z = -h / 2.0 + i * z_step
 
-    return points
+    return list( zip( x.tolist(), y.tolist(), z.tolist() ) )
 
 def SpiralPointsOnSphere( r=1.0, num_loops=3, points_per_loop=10, clockwise=False ):
     """Return an array of 3D points that spiral around a sphere from pole to pole.
@@ -482,22 +865,17 @@ def SpiralPointsOnSphere( r=1.0, num_loops=3, points_per_loop=10, clockwise=Fals
     if clockwise:
         loop_step *= -1.0
 
-    points = []
-    vert_angle = float( 90.0 )
-    loop_angle = float( 0.0 )
-    for l in range( 0, num_loops ):
-        for p in range( 0, points_per_loop ):
-            # Calculate the spherical position based on: ( r, vert_angle, loop_angle )
-            curr_r = r * Cos( vert_angle )
-            x = curr_r * Cos( loop_angle )
-            y = curr_r * Sin( loop_angle )
-            z = r * Sin( vert_angle )
-
-            points.append( ( x, y, z ) )
+    i = np.arange( num_loops * points_per_loop )
+    loop_angle = np.radians( i * loop_step )
+    vert_angle = np.radians( 90.0 + i * vert_step )
 
-            loop_angle += loop_step
-            vert_angle += vert_step
+    # Calculate the spherical position based on: ( r, vert_angle, loop_angle )
+    curr_r = r * np.cos( vert_angle )
+    x = curr_r * np.cos( loop_angle )
+    y = curr_r * np.sin( loop_angle )
+    z = r * np.sin( vert_angle )
 
+    points = list( zip( x.tolist(), y.tolist(), z.tolist() ) )
     points.append( ( 0, 0, -r ) )
 
     return points
@@ -519,12 +897,39 @@ def Torus( name=None, major_radius=1, minor_radius=.25, major_segments=None, min
         major_segments = int( russbpy_fn * 1.5 )
     if minor_segments is None:
         minor_segments = int( russbpy_fn / 2 )
-    bpy.ops.mesh.primitive_torus_add( major_radius=major_radius, minor_radius=minor_radius, major_segments=major_segments, minor_segments=minor_segments, location=location )
-    ob = bpy.context.object
-    if name is not None:
-        ob.name = name
+    ob = Mesh( name if name is not None else "Torus", TorusData( major_radius, minor_radius, major_segments, minor_segments ) )
+    ob.location = location
     return( ob )
 
+def TorusData( major_radius=1, minor_radius=.25, major_segments=48, minor_segments=12, quads=True ):
+    """Return the MeshData of a torus in the XY plane centered on the origin, laid out as Blender's torus primitive
+
+    Vertex i * minor_segments + k is point k of cross-section i. With quads, face i * minor_segments + k
+    starts at that vertex and runs to the same point of the next cross-section, as the primitive's faces do.
+
+    Keyword arguments:
+    major_radius    -- The radius to the center of the extruded circle forming the torus
+    minor_radius    -- The radius of the extruded circle forming the torus
+    major_segments  -- The number of segments having a circular cross-section
+    minor_segments  -- The number of segments in each circular cross-section
+    quads           -- Use quads or triangles?
+
+    Return the MeshData object
+    """
+    # Each cross-section is a circle of the minor radius, standing in the XZ plane and then turned around the Z axis
+    def f( phi, t ):
+        d = major_radius + minor_radius * np.cos( t )
+        return ( d * np.cos( phi ), d * np.sin( phi ), minor_radius * np.sin( t ) )
+
+    md = ParametricSurfaceData( f,
+                                2.0 * math.pi * np.arange( major_segments ) / major_segments,
+                                2.0 * math.pi * np.arange( minor_segments ) / minor_segments,
+                                u_closed=True, quads=quads, oriented=True )
+    if quads:
+        # The grid's quads start at their next point along the cross-section; start them at their own
+        md.loops = np.ascontiguousarray( md.loops.reshape( -1, 4 )[ :, [ 1, 2, 3, 0 ] ].ravel() )
+    return md
+
 def MeshTorus( name=None, major_radius=4.0, minor_radius=1.0, rings=10, ring_points=5, location=(0,0,0), quads=True ):
     """Create a solid torus with evenly-spaced faces
 
@@ -539,45 +944,27 @@ def MeshTorus( name=None, major_radius=4.0, minor_radius=1.0, rings=10, ring_poi
 
     Return the torus object
     """
-    rings = int( rings / 2 ) * 2  # Must be even
-    ring_spacer_deg = 360.0 / rings
-    
-    circle_verts = CirclePoints( minor_radius, ring_points, ( major_radius, 0, 0 ) )
-    t = RotationDeg( angle=90.0, axis=(1,0,0), point=(0,0,0) )
-    circle_verts = t.apply( circle_verts )
-    
-    verts = []
-    faces = []
-
-    # Determine vertices
-    r = RotationDeg( ring_spacer_deg, ( 0, 0, 1 ), ( 0, 0, 0 ) )
-    for i in range( 0, rings ):
-        for v in circle_verts:
-            verts.append( v )
-        circle_verts = r.apply( circle_verts )
-
-    # Determine edges
-    for i in range( 0, rings ):
-        j = ( i + 1 ) % rings
-        for k in range( 0, ring_points ):
-            if quads:
-                faces.append( ( i * ring_points + ( ( k + 1 ) % ring_points ), 
-			        i * ring_points + k,
-                                j * ring_points + k,
-                                j * ring_points + ( ( k + 1 ) % ring_points ) ) )
-            else:
-                faces.append( ( i * ring_points + ( ( k + 1 ) % ring_points ), 
-			        i * ring_points + k,
-                                j * ring_points + k ) )
-                faces.append( ( j * ring_points + k,
-                                j * ring_points + ( ( k + 1 ) % ring_points ), 
-                                i * ring_points + ( ( k + 1 ) % ring_points ) ) )
-
-    ob = Mesh( name, verts, [], faces )
+    ob = Mesh( name, MeshTorusData( major_radius, minor_radius, rings, ring_points, quads ) )
     TranslateV( ob, location )
 
     return ob
 
+def MeshTorusData( major_radius=4.0, minor_radius=1.0, rings=10, ring_points=5, quads=True ):
+    """Return the MeshData of a solid torus with evenly-spaced faces, centered on the origin in the XY plane
+
+    Keyword arguments:
+    major_radius    -- The radius to the center of the extruded circle forming the torus
+    minor_radius    -- The radius of the extruded circle forming the torus
+    rings           -- The number of segments having a circular cross-section
+    ring_points     -- The number of points on each ring
+    quads           -- Use quads or triangles?
+
+    Return the MeshData object
+    """
+    rings = int( rings / 2 ) * 2  # Must be even
+
+    return TorusData( major_radius, minor_radius, rings, ring_points, quads )
+
 def FlatTorus( name=None, r=1, h=.25, minor_w=.25, location=(0,0,0) ):
     """Draw a solid, flattened torus in the XY plane and return the corresponding object
 
@@ -607,13 +994,25 @@ def Cube( name=None, size=1, location=(0,0,0) ):
     Return the cube object
     """
 
-    bpy.ops.mesh.primitive_cube_add( location=location )
-    ob = bpy.context.object
+    ob = Mesh( name if name is not None else "Cube", CubeData() )
+    ob.location = location
     ScaleUniform( ob, size / 2.0 )
-    if name is not None:
-        ob.name = name
     return( ob )
 
+def CubeData():
+    """Return the MeshData of Blender's cube primitive: a 2 x 2 x 2 cube centered on the origin
+
+    Vertex 4 * ( x > 0 ) + 2 * ( y > 0 ) + ( z > 0 ) is the corner at (x,y,z).
+
+    Keyword arguments:
+    None
+
+    Return the MeshData object
+    """
+    verts = [ ( x, y, z ) for x in ( -1, 1 ) for y in ( -1, 1 ) for z in ( -1, 1 ) ]
+    faces = [ ( 0, 1, 3, 2 ), ( 2, 3, 7, 6 ), ( 6, 7, 5, 4 ), ( 4, 5, 1, 0 ), ( 2, 6, 4, 0 ), ( 7, 3, 1, 5 ) ]
+    return MeshData( verts, faces, oriented=True )
+
 def RectangularPrism( name=None, x=1, y=2, z=3, location=(0,0,0) ):
     """Draw a solid rectangular prism and return the corresponding object
 
@@ -689,194 +1088,86 @@ def MeshRectangularPrism( name=None, x=10, x_faces=10, y=20, y_faces=20, z=30, z
 
     Return the rectangular prism object
     """
-    x_start = -x / 2.0
-    y_start = -y / 2.0
-    z_start = -z / 2.0
-    x_end = x_start + x
-    y_end = y_start + y
-    z_end = z_start + z
+    ob = Mesh( name, MeshRectangularPrismData( x, x_faces, y, y_faces, z, z_faces, quads ) )
+    TranslateV( ob, location )
+    return ob
 
-    x_inc = float( x ) / float( x_faces )
-    y_inc = float( y ) / float( y_faces )
-    z_inc = float( z ) / float( z_faces )
+def MeshRectangularPrismData( x=10, x_faces=10, y=20, y_faces=20, z=30, z_faces=30, quads=True ):
+    """Return the MeshData of a solid rectangular prism centered on the origin, with control over the number of faces
 
-    verts = []
-    faces = []
+    Keyword arguments:
+    x        -- The length along the X axis
+    x_faces  -- The number of faces along the X axis
+    y        -- The length along the Y axis
+    y_faces  -- The number of faces along the Y axis
+    z        -- The length along the Z axis
+    z_faces  -- The number of faces along the Z axis
+    quads    -- Use quads or triangles?
 
-    # ---------------------------------------------
-
-    # Create the XY top vertices
-    # The vertices are striped as:
-    #    x0,y0  x0,y1 . . . x0,yn x1,y0 x1,y1 ... x1,yn . . . xm,y0 xm,y1 ... xm,ym
-    # NOTE: N faces in a row require N+1 vertices across
-    xy_verts = []
-    xy_faces = []
-    for xi in range( 0, x_faces + 1 ):
-        for yi in range( 0, y_faces + 1 ):
-            xy_verts.append( ( x_start + xi * x_inc, y_start + yi * y_inc, z_end ) )
-
-    # Create the XY top face
-    for xi in range( 0, x_faces ):
-        for yi in range( 0, y_faces ):
-            if quads:
-                xy_faces.append( ( xi * ( y_faces + 1 ) + yi,
-                                   ( xi + 1 ) * ( y_faces + 1 ) + yi,
-                                   ( xi + 1 ) * ( y_faces + 1 ) + yi + 1,
-                                   xi * ( y_faces + 1 ) + yi + 1 ) ) 
-            else:
-                xy_faces.append( ( xi * ( y_faces + 1 ) + yi,
-                                   ( xi + 1 ) * ( y_faces + 1 ) + yi,
-                                   ( xi + 1 ) * ( y_faces + 1 ) + yi + 1 ) )
-                xy_faces.append( ( ( xi + 1 ) * ( y_faces + 1 ) + yi + 1,
-                                   xi * ( y_faces + 1 ) + yi + 1,
-                                   xi * ( y_faces + 1 ) + yi ) )
-    for v in xy_verts:
-        verts.append( v )
-    for f in xy_faces:
-        faces.append( f )
-
-    # Create the XY bottom face
-    r = RotationDeg( 180.0, ( 1, 0, 0 ), ( 0, 0, 0 ) )
-    xy_verts = r.apply( xy_verts )
-
-    # Create the XY bottom face
-    xy_faces = []
-    for xi in range( 0, x_faces ):
-        for yi in range( 0, y_faces ):
-            if quads:
-                xy_faces.append( ( len(verts) + xi * ( y_faces + 1 ) + yi,
-                                   len(verts) + ( xi + 1 ) * ( y_faces + 1 ) + yi,
-                                   len(verts) + ( xi + 1 ) * ( y_faces + 1 ) + yi + 1,
-                                   len(verts) + xi * ( y_faces + 1 ) + yi + 1 ) ) 
-            else:
-                xy_faces.append( ( len(verts) + xi * ( y_faces + 1 ) + yi,
-                                   len(verts) + ( xi + 1 ) * ( y_faces + 1 ) + yi,
-                                   len(verts) + ( xi + 1 ) * ( y_faces + 1 ) + yi + 1 ) )
-                xy_faces.append( ( len(verts) + ( xi + 1 ) * ( y_faces + 1 ) + yi + 1,
-                                   len(verts) + xi * ( y_faces + 1 ) + yi + 1,
-                                   len(verts) + xi * ( y_faces + 1 ) + yi ) )
-    for v in xy_verts:
-        verts.append( v )
-    for f in xy_faces:
-        faces.append( f )
-
-    # ---------------------------------------------
-
-    # Create the XZ top vertices
-    # The vertices are striped as:
-    #    x0,z0  x0,z1 . . . x0,zn x1,z0 x1,z1 ... x1,zn . . . xm,z0 xm,z1 ... xm,zm
-    # NOTE: N faces in a row require N+1 vertices across
-    xz_verts = []
-    xz_faces = []
-    for xi in range( 0, x_faces + 1 ):
-        for zi in range( 0, z_faces + 1 ):
-            xz_verts.append( ( x_start + xi * x_inc, y_end, z_start + zi * z_inc ) )
-
-    # Create the XZ top face
-    for xi in range( 0, x_faces ):
-        for zi in range( 0, z_faces ):
-            if quads:
-                xz_faces.append( ( len(verts) + xi * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + ( xi + 1 ) * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + ( xi + 1 ) * ( z_faces + 1 ) + zi,
-                                   len(verts) + xi * ( z_faces + 1 ) + zi ) )
-            else:
-                xz_faces.append( ( len(verts) + xi * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + ( xi + 1 ) * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + ( xi + 1 ) * ( z_faces + 1 ) + zi ) )
-                xz_faces.append( ( len(verts) + ( xi + 1 ) * ( z_faces + 1 ) + zi,
-                                   len(verts) + xi * ( z_faces + 1 ) + zi,
-                                   len(verts) + xi * ( z_faces + 1 ) + zi + 1 ) )
-    for v in xz_verts:
-        verts.append( v )
-    for f in xz_faces:
-        faces.append( f )
-
-    # Create the XZ bottom face
-    r = RotationDeg( 180.0, ( 0, 0, 1 ), ( 0, 0, 0 ) )
-    xz_verts = r.apply( xz_verts )
-
-    # Create the XZ bottom face
-    xz_faces = []
-    for xi in range( 0, x_faces ):
-        for zi in range( 0, z_faces ):
-            if quads:
-                xz_faces.append( ( len(verts) + xi * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + ( xi + 1 ) * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + ( xi + 1 ) * ( z_faces + 1 ) + zi,
-                                   len(verts) + xi * ( z_faces + 1 ) + zi ) )
-            else:
-                xz_faces.append( ( len(verts) + xi * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + ( xi + 1 ) * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + ( xi + 1 ) * ( z_faces + 1 ) + zi ) )
-                xz_faces.append( ( len(verts) + ( xi + 1 ) * ( z_faces + 1 ) + zi,
-                                   len(verts) + xi * ( z_faces + 1 ) + zi,
-                                   len(verts) + xi * ( z_faces + 1 ) + zi + 1 ) )
-    for v in xz_verts:
-        verts.append( v )
-    for f in xz_faces:
-        faces.append( f )
-
-    # ---------------------------------------------
-
-    # Create the YZ top vertices
-    # The vertices are striped as:
-    #    y0,z0  y0,z1 . . . y0,zn y1,z0 y1,z1 ... y1,zn . . . ym,z0 ym,z1 ... ym,zm
-    # NOTE: N faces in a row require N+1 vertices across
-    yz_verts = []
-    yz_faces = []
-    for yi in range( 0, y_faces + 1 ):
-        for zi in range( 0, z_faces + 1 ):
-            yz_verts.append( ( x_end, y_start + yi * y_inc, z_start + zi * z_inc ) )
-
-    # Create the YZ top face
-    for yi in range( 0, y_faces ):
-        for zi in range( 0, z_faces ):
-            if quads:
-                yz_faces.append( ( len(verts) + yi * ( z_faces + 1 ) + zi,
-                                   len(verts) + ( yi + 1 ) * ( z_faces + 1 ) + zi,
-                                   len(verts) + ( yi + 1 ) * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + yi * ( z_faces + 1 ) + zi + 1 ) )
-            else:
-                yz_faces.append( ( len(verts) + yi * ( z_faces + 1 ) + zi,
-                                   len(verts) + ( yi + 1 ) * ( z_faces + 1 ) + zi,
-                                   len(verts) + ( yi + 1 ) * ( z_faces + 1 ) + zi + 1 ) )
-                yz_faces.append( ( len(verts) + ( yi + 1 ) * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + yi * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + yi * ( z_faces + 1 ) + zi ) )
-    for v in yz_verts:
-        verts.append( v )
-    for f in yz_faces:
-        faces.append( f )
-
-    # Create the YZ bottom face
-    r = RotationDeg( 180.0, ( 0, 1, 0 ), ( 0, 0, 0 ) )
-    yz_verts = r.apply( yz_verts )
-
-    # Create the YZ bottom face
-    yz_faces = []
-    for yi in range( 0, y_faces ):
-        for zi in range( 0, z_faces ):
-            if quads:
-                yz_faces.append( ( len(verts) + yi * ( z_faces + 1 ) + zi,
-                                   len(verts) + ( yi + 1 ) * ( z_faces + 1 ) + zi,
-                                   len(verts) + ( yi + 1 ) * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + yi * ( z_faces + 1 ) + zi + 1 ) )
-            else:
-                yz_faces.append( ( len(verts) + yi * ( z_faces + 1 ) + zi,
-                                   len(verts) + ( yi + 1 ) * ( z_faces + 1 ) + zi,
-                                   len(verts) + ( yi + 1 ) * ( z_faces + 1 ) + zi + 1 ) )
-                yz_faces.append( ( len(verts) + ( yi + 1 ) * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + yi * ( z_faces + 1 ) + zi + 1,
-                                   len(verts) + yi * ( z_faces + 1 ) + zi ) )
-    for v in yz_verts:
-        verts.append( v )
-    for f in yz_faces:
-        faces.append( f )
-   
-    ob = Mesh( name, verts, [], faces )
-    TranslateV( ob, location )
-    return ob
+    Return the MeshData object
+    """
+    xs = np.linspace( -x / 2.0, x / 2.0, x_faces + 1 )
+    ys = np.linspace( -y / 2.0, y / 2.0, y_faces + 1 )
+    zs = np.linspace( -z / 2.0, z / 2.0, z_faces + 1 )
+
+    # Number the vertices of each side as a 2D grid of indices.
+    # The top and bottom own all of their vertices; the Y sides own their inner rows and
+    # take the rest from the top and bottom; the X sides own only their inner vertices.
+    # Each vertex on an edge or corner of the box is shared by the sides that meet there.
+    top = np.arange( ( x_faces + 1 ) * ( y_faces + 1 ) ).reshape( x_faces + 1, y_faces + 1 )
+    bottom = top + top.size
+    n = 2 * top.size
+
+    y_sides = []
+    for yi in ( 0, y_faces ):
+        g = np.empty( ( x_faces + 1, z_faces + 1 ), dtype=np.int64 )
+        g[ :, 0 ] = bottom[ :, yi ]
+        g[ :, z_faces ] = top[ :, yi ]
+        g[ :, 1:z_faces ] = n + np.arange( ( x_faces + 1 ) * ( z_faces - 1 ) ).reshape( x_faces + 1, z_faces - 1 )
+        n += ( x_faces + 1 ) * ( z_faces - 1 )
+        y_sides.append( g )
+
+    x_sides = []
+    for xi in ( 0, x_faces ):
+        g = np.empty( ( y_faces + 1, z_faces + 1 ), dtype=np.int64 )
+        g[ 0, : ] = y_sides[0][ xi, : ]
+        g[ y_faces, : ] = y_sides[1][ xi, : ]
+        g[ :, 0 ] = bottom[ xi, : ]
+        g[ :, z_faces ] = top[ xi, : ]
+        g[ 1:y_faces, 1:z_faces ] = n + np.arange( ( y_faces - 1 ) * ( z_faces - 1 ) ).reshape( y_faces - 1, z_faces - 1 )
+        n += ( y_faces - 1 ) * ( z_faces - 1 )
+        x_sides.append( g )
+
+    # Place the vertices; the shared ones are simply written more than once
+    verts = np.empty( ( n, 3 ) )
+    verts[ top, 0 ] = verts[ bottom, 0 ] = xs[ :, None ]
+    verts[ top, 1 ] = verts[ bottom, 1 ] = ys[ None, : ]
+    verts[ top, 2 ] = zs[ -1 ]
+    verts[ bottom, 2 ] = zs[ 0 ]
+    for yi, g in zip( ( 0, y_faces ), y_sides ):
+        verts[ g, 0 ] = xs[ :, None ]
+        verts[ g, 1 ] = ys[ yi ]
+        verts[ g, 2 ] = zs[ None, : ]
+    for xi, g in zip( ( 0, x_faces ), x_sides ):
+        verts[ g, 0 ] = xs[ xi ]
+        verts[ g, 1 ] = ys[ :, None ]
+        verts[ g, 2 ] = zs[ None, : ]
+
+    # Each grid cell ( g[p,q], g[p+1,q], g[p+1,q+1], g[p,q+1] ) faces along p x q,
+    # so transpose the grids whose axes would otherwise face inward.
+    def cells( g ):
+        return np.stack( ( g[ :-1, :-1 ], g[ 1:, :-1 ], g[ 1:, 1:], g[ :-1, 1: ] ), axis=-1 ).reshape( -1, 4 )
+
+    faces = np.concatenate( ( cells( top ),
+                              cells( bottom.T ),
+                              cells( y_sides[1].T ),
+                              cells( y_sides[0] ),
+                              cells( x_sides[1] ),
+                              cells( x_sides[0].T ) ) )
+    if not quads:
+        faces = faces[ :, [ 0, 1, 2, 2, 3, 0 ] ].reshape( -1, 3 )
+
+    return MeshData( verts, faces, oriented=True )
 
 def RectangularCup( name=None, x=1, y=2, z=3, x_thickness=0.1, y_thickness=0.2, z_thickness=0.3, location=(0,0,0) ):
     """Draw a cylindrical cup with a height along the Z axis and the open end along the positive Z axis
@@ -915,13 +1206,70 @@ def Cylinder( name=None, r=1.0, h=1.0, vertices=None, cap=True, location=(0,0,0)
 
     if vertices is None:
         vertices = russbpy_fn
-    bpy.ops.mesh.primitive_cylinder_add( radius=r, depth=h, vertices=vertices, location=location )
-    ob = bpy.context.object
-    if name is not None:
-        ob.name = name
-    Subdivide( ob )	# This steps helps with Boolean operations.
+    # The cylinder is made already subdivided once. This steps helps with Boolean operations.
+    ob = Mesh( name if name is not None else "Cylinder", CylinderData( r, h, vertices ) )
+    ob.location = location
     return( ob )
 
+def CylinderData( r=1.0, h=1.0, vertices=32 ):
+    """Return the MeshData of a cylinder centered on the origin, as Blender's cylinder primitive is after one Subdivide()
+
+    The primitive's points go clockwise seen from above, starting on +Y, with the bottom and top points
+    alternating: vertex 2 * k is bottom point k and vertex 2 * k + 1 is top point k.
+    Subdividing splits every edge in two and every side quad into four, and appends the new vertices
+    after these: first each edge's midpoint, in the order the primitive made its edges, then each side
+    quad's center, from side 0 (between points 0 and 1) onwards. The edges run as the primitive goes around:
+    the first step adds the bottom and top edges of side 0 and the side edges at points 0 and 1,
+    and each later step adds the next bottom and top edges and the next side edge.
+    So the midpoints of side 0's bottom and top edges are vertices 2 * vertices and 2 * vertices + 1,
+    those of the side edges at points 0 and 1 are vertices 2 * vertices + 2 and 2 * vertices + 3,
+    and the center of side k is vertex 5 * vertices + k.
+    The faces are the four quarters of each side in turn, followed by the bottom and top caps,
+    which are polygons through all the points of the bottom and top rings.
+
+    Keyword arguments:
+    r        -- The radius
+    h        -- The height
+    vertices -- The number of vertices of the unsubdivided cylinder's ends
+
+    Return the MeshData object
+    """
+    n = vertices
+    angles = 2.0 * math.pi * np.arange( n ) / n
+    ring = r * np.column_stack( ( np.sin( angles ), np.cos( angles ) ) )
+    # The midpoints of the sides' chords are nearer the axis than the points
+    middles = r * math.cos( math.pi / n ) * np.column_stack( ( np.sin( angles + math.pi / n ), np.cos( angles + math.pi / n ) ) )
+
+    # Which of the primitive's edges are side k's bottom and top edges, and the side edge at point k
+    k = np.arange( 1, n - 1 )
+    bottom_edges = np.concatenate( ( [ 0 ], 3 * k + 1, [ 3 * n - 2 ] ) )
+    top_edges = bottom_edges + 1
+    side_edges = np.concatenate( ( [ 2, 3 ], 3 * np.arange( 2, n ) ) )
+
+    verts = np.empty( ( 6 * n, 3 ) )
+    bottom = 2 * np.arange( n )
+    top = bottom + 1
+    bottom_middles = 2 * n + bottom_edges
+    top_middles = 2 * n + top_edges
+    side_middles = 2 * n + side_edges
+    centers = 5 * n + np.arange( n )
+    for ( index, points, z ) in ( ( bottom, ring, -h / 2.0 ), ( top, ring, h / 2.0 ), ( side_middles, ring, 0.0 ),
+                                  ( bottom_middles, middles, -h / 2.0 ), ( top_middles, middles, h / 2.0 ), ( centers, middles, 0.0 ) ):
+        verts[ index, :2 ] = points
+        verts[ index, 2 ] = z
+
+    # Each quarter runs up, then clockwise seen from above, as the side it comes from did, so it faces outward
+    ( following, following_side ) = ( np.roll( bottom, -1 ), np.roll( side_middles, -1 ) )
+    quarters = np.stack( ( np.column_stack( ( bottom, side_middles, centers, bottom_middles ) ),
+                           np.column_stack( ( side_middles, top, top_middles, centers ) ),
+                           np.column_stack( ( centers, top_middles, following + 1, following_side ) ),
+                           np.column_stack( ( bottom_middles, centers, following_side, following ) ) ), axis=1 )
+    loops = np.concatenate( ( quarters.ravel(),
+                              np.column_stack( ( bottom, bottom_middles ) ).ravel(),
+                              np.column_stack( ( top, top_middles ) ).ravel()[ ::-1 ] ) )
+    loop_starts = np.append( 4 * np.arange( 4 * n ), [ 16 * n, 18 * n ] )
+    return MeshData( verts, loops, loop_starts, oriented=True )
+
 def Pie3D( name=None, r=1.0, h=1.0, angle=30.0, vertices=None, location=(0,0,0) ):
     """Draw a cylindrical pie slice with the height along the Z axis and return the corresponding object
 
@@ -964,127 +1312,45 @@ def MeshCylinder( name=None, r=1.0, h=5.0, r_faces=5, h_faces=5, c_faces=10, loc
 
     Return the cylinder object
     """
-    h_steps = float( h ) / float( h_faces )
-    r_steps = float( r ) / float( r_faces )
-
-    circle_verts = CirclePoints( r, c_faces, location=(location[0],location[1],location[2] - h/2.0) )
-
-    verts = []
-    faces = []
-
-    t = Translation( ( 0, 0, h_steps ) )
-
-    # Build up the curved wall
-    for hi in range( 0, h_faces + 1 ):
-        for v in circle_verts:
-            verts.append( v )
-        circle_verts = t.apply( circle_verts )
-
-    for hi in range( 0, h_faces ):
-        for ci in range( 0, c_faces ):
-            if quads:
-                faces.append( ( hi * c_faces + ci,
-                                hi * c_faces + ( ci + 1 ) % c_faces,
-                                ( hi + 1 ) * c_faces + ( ci + 1 ) % c_faces,
-                                ( hi + 1 ) * c_faces + ci ) )
-            else:
-                faces.append( ( hi * c_faces + ci,
-                                hi * c_faces + ( ci + 1 ) % c_faces,
-                                ( hi + 1 ) * c_faces + ( ci + 1 ) % c_faces ) )
-                faces.append( ( ( hi + 1 ) * c_faces + ( ci + 1 ) % c_faces,
-                                ( hi + 1 ) * c_faces + ci,
-                                hi * c_faces + ci ) )
-
-    # Fill in the bottom
-    # For the bottom, the outer vertices are 0, ..., c_faces - 1
-    for ri in range( 1, r_faces ):
-        circle_verts = CirclePoints( r - ri * r_steps, c_faces, location=(location[0],location[1],location[2] - h/2.0) )
-        for ci in range( 0, c_faces ):
-            if ri == 1:
-                if quads:
-                    faces.append( ( len( verts ) + ci,
-                                    len( verts ) + ( ci + 1 ) % c_faces,
-                                    ( ci + 1 ) % c_faces,
-                                    ci ) )
-                else:
-                    faces.append( ( len( verts ) + ci,
-                                    len( verts ) + ( ci + 1 ) % c_faces,
-                                    ( ci + 1 ) % c_faces ) )
-                    faces.append( ( ( ci + 1 ) % c_faces,
-                                    ci,
-                                    len( verts ) + ci ) )
-            else:
-                if quads:
-                    faces.append( ( len( verts ) + ci,
-                                    len( verts ) + ( ci + 1 ) % c_faces,
-                                    len( verts ) - c_faces + ( ci + 1 ) % c_faces,
-                                    len( verts ) - c_faces + ci ) )
-                else:
-                    faces.append( ( len( verts ) + ci,
-                                    len( verts ) + ( ci + 1 ) % c_faces,
-                                    len( verts ) - c_faces + ( ci + 1 ) % c_faces ) )
-                    faces.append( ( len( verts ) - c_faces + ( ci + 1 ) % c_faces,
-                                    len( verts ) - c_faces + ci,
-                                    len( verts ) + ci ) )
-
-        if ri == ( r_faces - 1 ):
-            for ci in range( 0, c_faces ):
-                faces.append( ( len( verts ) + c_faces,
-                                len( verts ) + ( ci + 1 ) % c_faces,
-                                len( verts ) + ci ) )
-
-        for v in circle_verts:
-            verts.append( v )
-
-    verts.append( ( location[0], location[1], location[2] - h/2.0 ) )
-
-    # Fill in the top
-    # For the top, the outer vertices are c_faces * h_faces, ..., c_faces * ( h_faces + 1 ) - 1
-    top_base = c_faces * h_faces
-    for ri in range( 1, r_faces ):
-        circle_verts = CirclePoints( r - ri * r_steps, c_faces, location=(location[0],location[1],location[2] + h/2.0) )
-        for ci in range( 0, c_faces ):
-            if ri == 1:
-                if quads:
-                    faces.append( ( top_base + ci,
-                                    top_base + ( ci + 1 ) % c_faces,
-                                    len( verts ) + ( ci + 1 ) % c_faces,
-                                    len( verts ) + ci ) )
-                else:
-                    faces.append( ( top_base + ci,
-                                    top_base + ( ci + 1 ) % c_faces,
-                                    len( verts ) + ( ci + 1 ) % c_faces ) )
-                    faces.append( ( len( verts ) + ( ci + 1 ) % c_faces,
-                                    len( verts ) + ci,
-                                    top_base + ci ) )
-            else:
-                if quads:
-                    faces.append( ( len( verts ) - c_faces + ci,
-                                    len( verts ) - c_faces + ( ci + 1 ) % c_faces,
-                                    len( verts ) + ( ci + 1 ) % c_faces,
-                                    len( verts ) + ci ) )
-                else:
-                    faces.append( ( len( verts ) - c_faces + ci,
-                                    len( verts ) - c_faces + ( ci + 1 ) % c_faces,
-                                    len( verts ) + ( ci + 1 ) % c_faces ) )
-                    faces.append( ( len( verts ) + ( ci + 1 ) % c_faces,
-                                    len( verts ) + ci,
-                                    len( verts ) - c_faces + ci ) )
+    return Mesh( name, MeshCylinderData( r, h, r_faces, h_faces, c_faces, location, quads ) )
 
-        if ri == ( r_faces - 1 ):
-            for ci in range( 0, c_faces ):
-                faces.append( ( len( verts ) + c_faces,
-                                len( verts ) + ci,
-                                len( verts ) + ( ci + 1 ) % c_faces ) )
+def MeshCylinderData( r=1.0, h=5.0, r_faces=5, h_faces=5, c_faces=10, location=(0,0,0), quads=True ):
+    """Return the MeshData of a cylinder with the height along the Z axis with control of the faces
 
-        for v in circle_verts:
-            verts.append( v )
-
-    verts.append( ( location[0], location[1], location[2] + h/2.0 ) )
+    Keyword arguments:
+    r        -- The radius
+    h        -- The height
+    r_faces  -- The number faces per radial line
+    h_faces  -- The number faces per height line
+    c_faces  -- The number faces per circumference
+    location -- The location of the center of the cylinder
+    quads    -- Use quads or triangles?
 
-    ob = Mesh( name, verts, [], faces )
+    Return the MeshData object
+    """
+    h_steps = float( h ) / float( h_faces )
+    r_steps = float( r ) / float( r_faces )
 
-    return ob
+    # The cross-section circles run from the center of the bottom out to the wall,
+    # up the wall, and back in to the center of the top.
+    # They run clockwise (seen from above) so the faces point outward.
+    radii = np.concatenate( ( r - np.arange( r_faces - 1, 0, -1 ) * r_steps,
+                              np.full( h_faces + 1, float( r ) ),
+                              r - np.arange( 1, r_faces ) * r_steps ) )
+    heights = np.concatenate( ( np.full( r_faces - 1, -h / 2.0 ),
+                                np.arange( h_faces + 1 ) * h_steps - h / 2.0,
+                                np.full( r_faces - 1, h / 2.0 ) ) )
+    angles = -2.0 * math.pi * np.arange( c_faces ) / c_faces
+
+    def f( ci, a ):
+        return ( location[0] + radii[ ci ] * np.cos( a ),
+                 location[1] + radii[ ci ] * np.sin( a ),
+                 location[2] + heights[ ci ] )
+
+    return ParametricSurfaceData( f, np.arange( len( radii ) ), angles,
+                                start_pole=( location[0], location[1], location[2] - h / 2.0 ),
+                                end_pole=( location[0], location[1], location[2] + h / 2.0 ),
+                                quads=quads, oriented=True )
 
 def CylinderP2P( name=None, r=1.0, p1=(0,0,0), p2=(1.0,1.0,1.0), scale_z=1.0 ):
     """Draw a cylinder from p1 to p2.
@@ -1181,12 +1447,59 @@ def Cone( name=None, r=1, top_r=0, h=1, vertices=None, cap=True, location=(0,0,0
     """
     if vertices is None:
         vertices = russbpy_fn
-    bpy.ops.mesh.primitive_cone_add( radius1=r, radius2=top_r, depth=h, location=location, vertices=vertices )
-    ob = bpy.context.object
-    if name is not None:
-        ob.name = name
+    ob = Mesh( name if name is not None else "Cone", ConeData( r, top_r, h, vertices ) )
+    ob.location = location
     return( ob )
 
+def ConeData( r=1, top_r=0, h=1, vertices=32 ):
+    """Return the MeshData of a cone centered on the origin, with the height along the Z axis, as Blender's cone primitive
+
+    The points go clockwise seen from above, starting on +Y, with the bottom and top points alternating:
+    vertex 2 * k is bottom point k and vertex 2 * k + 1 is top point k. The sides come first, side k running
+    from point k to point k + 1, followed by the bottom and top caps, which are polygons.
+    An end with a zero radius is a single point, with triangles running up to it. Blender makes it by
+    merging that end's points into its point 0, so vertex 1 is the top point of a cone and the bottom
+    points 1 onwards follow it, while an upside-down cone's bottom point is vertex 0 and its top points follow.
+
+    Keyword arguments:
+    r         -- The base radius
+    top_r     -- The top radius (for truncated cones)
+    h         -- The height of the cone
+    vertices  -- The number of vertices to use in the polygon approximation of the circle
+
+    Return the MeshData object
+    """
+    angles = 2.0 * math.pi * np.arange( vertices ) / vertices
+    ring = np.column_stack( ( np.sin( angles ), np.cos( angles ) ) )
+    k = np.arange( vertices )
+
+    if r != 0 and top_r != 0:
+        ( bottom, top ) = ( 2 * k, 2 * k + 1 )
+    elif top_r == 0:
+        ( bottom, top ) = ( np.where( k == 0, 0, k + 1 ), np.ones( vertices, dtype=np.int64 ) )
+    else:
+        ( bottom, top ) = ( np.zeros( vertices, dtype=np.int64 ), k + 1 )
+    verts = np.empty( ( max( bottom.max(), top.max() ) + 1, 3 ) )
+    verts[ bottom, :2 ] = r * ring
+    verts[ bottom, 2 ] = -h / 2.0
+    verts[ top, :2 ] = top_r * ring
+    verts[ top, 2 ] = h / 2.0
+
+    # Each side runs up, then clockwise seen from above, so it faces outward
+    ( next_bottom, next_top ) = ( np.roll( bottom, -1 ), np.roll( top, -1 ) )
+    if top_r == 0:
+        sides = np.column_stack( ( bottom, top, next_bottom ) )
+    elif r == 0:
+        sides = np.column_stack( ( bottom, top, next_top ) )
+    else:
+        sides = np.column_stack( ( bottom, top, next_top, next_bottom ) )
+    faces = [ tuple( f ) for f in sides.tolist() ]
+    if r != 0:
+        faces.append( tuple( bottom.tolist() ) )
+    if top_r != 0:
+        faces.append( tuple( top[ ::-1 ].tolist() ) )
+    return MeshData( verts, faces, oriented=True )
+
 def CharMetrics( ch, font=None ):
     """Return a hash of metrics for the given character, as rendered in the given font
 
@@ -1215,6 +1528,7 @@ def CharMetrics( ch, font=None ):
     bpy.context.scene.cursor_location = (0,0,0)
     bpy.ops.object.text_add()
     c = Current()
+    TrackSelection( c )
     c.data.body = ch
     c.data.extrude = 0.5
     if font is not None:
@@ -1304,6 +1618,7 @@ def Text( name=None, text="abc123", h=1, font=None, align='LEFT', bevel_depth=0.
     bpy.context.scene.cursor_location = location
     bpy.ops.object.text_add()
     ob=Current()
+    TrackSelection( ob )
     if font is not None:
         fn = bpy.data.fonts.load( font )
         ob.data.font = fn
@@ -1487,7 +1802,7 @@ def CylindricalText( text='Abc123', font=None, r=1, thickness=.05, angular_heigh
     escape         -- The character to use as a space substitute
                       Required because only non-blank characters can be measured
 
-    Return the cylindrical text object
+    Return the cylindrical text object, which has no faces if inverse is False and the text is all escape characters
     """
 
     if backwards:
@@ -1577,40 +1892,76 @@ def CylindricalText( text='Abc123', font=None, r=1, thickness=.05, angular_heigh
             ap = ap + aw[ i - 1 ] / 2.0 + spacer_deg + aw[ i ] / 2.0
             RotateDeg( obs[ i ], ap, ( 0, 0, 1 ) )
 
+    for i in reversed( range( 0, len( text ) ) ):
+        if text[ i ] == escape:
+            Delete( obs[ i ] )
+            del obs[ i ]
+
     # For some reason, intersecting each letter with
     # its own hollow cylinder works better than intersecting
     # each letter with the same cylinder.
     # The problem with the latter is some letters aren't
     # closed, or disappear entirely.
+    # So IntersectEach() still cuts each letter on its own. Taking the letters out of
+    # the cylinder is different: letters whose bounding boxes do not overlap are joined
+    # and cut out together, so each group of them takes one Boolean operation.
     outer = Cylinder( r=r, h=r*2 )
     inner = Cylinder( r=r-thickness, h=r*2 )
     Difference( outer, inner, True )
-    for i in range( 0, len( text ) ):
-        if text[ i ] != escape:
-            if inverse:
-                Difference( outer, obs[ i ], True )
-            else:
-                Intersect( obs[ i ], outer )
-
-    for i in reversed( range( 0, len( text ) ) ):
-        if text[ i ] == escape:
-            Delete( obs[ i ] )
-            del obs[ i ]
-
     if inverse:
+        if len( obs ) > 0:
+            DifferenceAll( outer, *obs, delete=True )
         j = outer
+    elif len( obs ) > 0:
+        IntersectEach( obs, outer, True )
+        j = Join( *obs )
     else:
-        Delete( outer )
-        j = Join( obs )
+        # No letters means no text: the cylinder is emptied, so there is still an object to return
+        bm = bmesh.new()
+        bm.to_mesh( outer.data )
+        bm.free()
+        outer.data.update()
+        j = outer
 
     return j
 
+def MeshFromData( data ):
+    """Build a Blender mesh from mesh data, as it is
+
+    Keyword arguments:
+    data -- The MeshData
+
+    Return the new mesh, not yet used by any object
+    """
+    # Copy the arrays straight into the mesh, without building any Python objects.
+    # The arrays already have the types Blender uses, so foreach_set() copies them as-is.
+    md = bpy.data.meshes.new( "mesh" )
+    md.vertices.add( data.vertex_count() )
+    md.vertices.foreach_set( "co", data.verts.ravel() )
+    md.edges.add( len( data.edges ) )
+    md.edges.foreach_set( "vertices", data.edges.ravel() )
+    md.loops.add( len( data.loops ) )
+    md.loops.foreach_set( "vertex_index", data.loops )
+    md.polygons.add( data.face_count() )
+    md.polygons.foreach_set( "loop_start", data.loop_starts )
+    md.polygons.foreach_set( "loop_total", data.loop_totals )
+    md.update( calc_edges=True )
+
+    # Everything starts selected, as Edit mode's select_all left it, so the Edit-mode transform operators move the whole mesh
+    for items in ( md.vertices, md.edges, md.polygons ):
+        items.foreach_set( "select", np.ones( len( items ), dtype=bool ) )
+    return md
+
 def Mesh( name=None, verts=[], edges=[], faces=[] ):
     """Draw a mesh and return the corresponding object
 
+    The faces are made consistent, with their normals facing outward, by OrientOutward().
+    MeshData marked as oriented skips that step.
+
     Keyword arguments:
     name  -- The name for the new mesh object
-    verts -- The (x,y,z) vertices for the mesh
+    verts -- The (x,y,z) vertices for the mesh, or a MeshData object holding the whole mesh
+             (in which case edges and faces are ignored)
     edges -- The (v1,v2) edges for the mesh, where v1 and v2 are in range(0,len(verts))
     faces -- The faces for the mesh, as triangles (v1,v2,v3) or quads (v1,v2,v3,v4)
              where v1, v2, v3 and v4 are in range(0,len(edges))
@@ -1627,26 +1978,21 @@ def Mesh( name=None, verts=[], edges=[], faces=[] ):
     # Faces are [ [ Vi, Vj, Vk ], ... ]
     #   quads are allowed: [ Vi, Vj, Vk, Vl ]
     #
-    md = bpy.data.meshes.new( "mesh" )
-    md.from_pydata( verts, edges, faces )
-    md.update()
+    if isinstance( verts, MeshData ):
+        data = verts
+    else:
+        data = MeshData( verts, faces, edges=edges )
 
-    ob = bpy.data.objects.new( "", md )
+    # Make the normals consistent and facing outward, unless the data is known to be so already.
+    if not data.oriented:
+        OrientOutward( data )
+
+    ob = bpy.data.objects.new( "", MeshFromData( data ) )
     if name is not None:
         ob.name = name
     bpy.data.scenes[0].objects.link( ob )
 
-    bpy.ops.object.select_all(action='DESELECT')
-    ob.select = True
-    bpy.context.scene.objects.active = ob
-    # go edit mode
-    bpy.ops.object.mode_set(mode='EDIT')
-    # select al faces
-    bpy.ops.mesh.select_all(action='SELECT')
-    # recalculate outside normals 
-    bpy.ops.mesh.normals_make_consistent(inside=False)
-    # go object mode again
-    bpy.ops.object.editmode_toggle()
+    Select( ob )
 
     return ob
 
@@ -1682,41 +2028,55 @@ def NGonPrism( name=None, r=1.0, h=1.0, sides=8, open=False, location=(0,0,0) ):
 
     Return the N-gon prism object
     """
-    h = h / 2.0
-
-    swath = ( 2.0 * math.pi ) / sides
-
-    verts = []
-    # Top
-    for i in range( 0, sides ):
-        x = r * math.cos( i * swath )
-        y = r * math.sin( i * swath )
-        verts.append( [ x, y, h ] )
-        verts.append( [ x, y, -h ] )
-    verts.append( [ 0, 0, h ] )
-    verts.append( [ 0, 0, -h ] )
-
-    faces = []
-    # quads on the sides
-    for i in range( 0, sides ):
-        l = i * 2
-        r = ( ( i + 1 ) % sides ) * 2
-        faces.append( [ l, l + 1, r + 1, r ] )
-
-    if not open:
-        for i in range( 0, sides ):
-            l = i * 2
-            r = ( ( i + 1 ) % sides ) * 2
-            faces.append( [ l, r, sides * 2 ] )
-            faces.append( [ l + 1, sides * 2 + 1, r + 1 ] )
-
-    m = Mesh( name, verts, [], faces )
+    m = Mesh( name, NGonPrismData( r, h, sides, open ) )
     TranslateToV( m, location )
 
     return m
 
-def Arrow( body_x=10, body_y=1, body_z=1, head_r=2 ):
-    """Draw an arrow and return the corresponding object
+def NGonPrismData( r=1.0, h=1.0, sides=8, open=False ):
+    """Return the MeshData of an N-gon prism centered on the origin, with the height along the Z axis
+
+    Keyword arguments:
+    r        -- The outer radius of the N-gon, ie. measured at the vertices
+    h        -- The height
+    sides    -- The number of sides to the N-gon ends of the prism
+    open     -- Leave the prism open at the ends?
+                Otherwise the ends are capped
+
+    Return the MeshData object
+    """
+    h = h / 2.0
+
+    # Top and bottom vertices alternate around the N-gon,
+    # followed by the top and bottom centers.
+    swath = ( 2.0 * math.pi ) / sides
+    angles = np.arange( sides ) * swath
+    verts = np.empty( ( sides * 2 + 2, 3 ) )
+    verts[ 0:sides * 2:2, 0 ] = verts[ 1:sides * 2:2, 0 ] = r * np.cos( angles )
+    verts[ 0:sides * 2:2, 1 ] = verts[ 1:sides * 2:2, 1 ] = r * np.sin( angles )
+    verts[ 0:sides * 2:2, 2 ] = h
+    verts[ 1:sides * 2:2, 2 ] = -h
+    verts[ sides * 2 ] = ( 0, 0, h )
+    verts[ sides * 2 + 1 ] = ( 0, 0, -h )
+
+    l = np.arange( sides ) * 2
+    r = ( ( np.arange( sides ) + 1 ) % sides ) * 2
+
+    # quads on the sides
+    sides_faces = np.column_stack( ( l, l + 1, r + 1, r ) )
+    if open:
+        return MeshData( verts, sides_faces, oriented=True )
+
+    top = np.column_stack( ( l, r, np.full( sides, sides * 2 ) ) )
+    bottom = np.column_stack( ( l + 1, np.full( sides, sides * 2 + 1 ), r + 1 ) )
+    caps = np.column_stack( ( top, bottom ) ).reshape( -1, 3 )
+
+    loops = np.concatenate( ( sides_faces.ravel(), caps.ravel() ) )
+    loop_starts = np.concatenate( ( np.arange( sides ) * 4, sides * 4 + np.arange( sides * 2 ) * 3 ) )
+    return MeshData( verts, loops, loop_starts, oriented=True )
+
+def Arrow( body_x=10, body_y=1, body_z=1, head_r=2 ):
+    """Draw an arrow and return the corresponding object
 
     The arrow lies along the X axis, pointing away from the origin towards the positive X-axis
     The arrow is viewable from the Z-axis, viewing towards the origin
@@ -2008,17 +2368,15 @@ def SocketJoint( ball_radius=10.0,
     Union( s, stem, True )
 
     i = Sphere( r=ball_radius )
-    Difference( s, i, True )
 
     gap_rectangle = RectangularPrism( x=4.0 * ball_radius, y=socket_finger_gap, z = 2.0 * socket_radius )
     TranslateZ( gap_rectangle, socket_radius - socket_finger_base_offset )
-    Difference( s, gap_rectangle, False )
-    RotateDegZ( gap_rectangle, 90.0 )
-    Difference( s, gap_rectangle, True )
+    cross_gap_rectangle = Duplicate( gap_rectangle )
+    RotateDegZ( cross_gap_rectangle, 90.0 )
 
     b = Sphere( r=ball_radius )
     TranslateZ( b, socket_finger_tip_offset )
-    Difference( s, b, True )
+    DifferenceAll( s, i, gap_rectangle, cross_gap_rectangle, b, delete=True )
 
     TranslateZ( s, socket_radius + stem_height )
     if center_in_socket:
@@ -2073,74 +2431,56 @@ def Spring( name=None, major_radius=1.0, major_segments=10, minor_radius=0.1, mi
 
     Return the spring object
     """
+    return Mesh( name, SpringData( major_radius, major_segments, minor_radius, minor_segments, rise, turns, capped ) )
 
-    verts = []
-    faces = []
-
-    start = ( 0.0, float( major_radius ), 0.0 )
-    end   = ( float( turns ) * rise, float( major_radius ), 0.0 )
-    verts.append( start )
-    circle_verts = CirclePoints( minor_radius, minor_segments, start )
-
-    deg_step  = 360.0 / float( major_segments )
-    r = RotationDeg( deg_step, axis=( 1.0, 0.0, 0.0 ), point=( 0.0, 0.0, 0.0 ) )
-
-    rise_step = float( rise ) / float( major_segments )
-    t = Translation( ( rise_step, 0.0, 0.0 ) )
+def SpringData( major_radius=1.0, major_segments=10, minor_radius=0.1, minor_segments=10, rise=1.0, turns=5, capped=1 ):
+    """Return the MeshData of a spring along the X axis
 
-    for turn in range( 0, turns ):
-        for s in range( 0, major_segments ):
-            for v in circle_verts:
-                verts.append( v )
-            circle_verts = r.apply( circle_verts )
-            circle_verts = t.apply( circle_verts )
+    Keyword arguments:
+    major_radius    -- The radius of the spring, to the center of the extruded circle
+    major_segments  -- The number of segments making a full turn of the spring
+    minor_radius    -- The radius of the extruded circle forming the spring
+    minor_segments  -- The number of segments in each circular cross-section
+    rise            -- The rise between each full turn
+    turns           -- The number of full turns in the spring
+    capped          -- Capped ends? (0=No, 1=flat, 2=sphere)
 
-    for v in circle_verts:
-        verts.append( v )
+    Return the MeshData object
+    """
+    r = float( minor_radius )
 
-    if capped == 1:
-        # Fill in the start face.
-        # The vertices are 0 (center), 1, ..., minor_segments
-        for v in range( 0, minor_segments - 1 ):
-            faces.append( ( 0, v + 2, v + 1 ) )
-        faces.append( ( 0, 1, minor_segments ) )
-
-    # Fill in the spring
-    turn_step = minor_segments * major_segments 
-    for turn in range( 0, turns ):
-        for s in range( 0, major_segments ):
-            for p in range( 0, minor_segments - 1 ):
-                # The start vertices are 1 + turn * ( minor_segments * major_segments ) + s * minor_segments, ..., + minor_segments - 1
-                sv1 = 1 + turn * turn_step + s * minor_segments + p
-                sv2 = sv1 + 1
-                ev1 = sv1 + minor_segments
-                ev2 = sv2 + minor_segments
-                faces.append( ( sv1, sv2, ev2, ev1 ) )
-
-            sv1 = 1 + turn * turn_step + s * minor_segments + minor_segments - 1
-            sv2 = sv1 - ( minor_segments - 1 )
-            ev1 = sv1 + minor_segments
-            ev2 = sv2 + minor_segments
-            faces.append( ( sv1, sv2, ev2, ev1 ) )
+    # The cross-section circle starts in the XY plane at (0,major_radius,0) and is turned
+    # around the X axis while it rises along it. In each frame, its first axis is X and
+    # its second axis points out from the X axis; it travels along the third axis, n.
+    theta = np.radians( np.arange( turns * major_segments + 1 ) * ( 360.0 / float( major_segments ) ) )
+    radial = np.column_stack( ( np.zeros( len( theta ) ), np.cos( theta ), np.sin( theta ) ) )
+    n = np.column_stack( ( np.zeros( len( theta ) ), -np.sin( theta ), np.cos( theta ) ) )
+    path = radial * float( major_radius )
+    path[ :, 0 ] = np.arange( len( theta ) ) * ( float( rise ) / float( major_segments ) )
+    scales = np.ones( len( theta ) )
 
+    start_pole = end_pole = None
     if capped == 1:
-        # Fill in the end face.
-        s = len( verts ) - minor_segments
-        e = len( verts ) - 1
-        verts.append( end )
-        c = e + 1
-        for v in range( s, e ):
-            faces.append( ( c, v, v + 1 ) )
-        faces.append( ( c, e - 1, s ) )
-
-    m = Mesh( name, verts, [], faces )
-
-    if capped == 2:
-        s1 = Sphere( r=minor_radius, location=start )
-        s2 = Sphere( r=minor_radius, location=end )
-        m = Join( m, s1, s2 )
-
-    return m
+        start_pole = path[ 0 ]
+        end_pole = path[ -1 ]
+    elif capped == 2:
+        # Round the ends with hemispheres, one ring per quarter of the cross-section's segments
+        rings = max( int( minor_segments / 4 ), 1 )
+        lat = np.radians( np.arange( 1, rings + 1 ) * ( 90.0 / float( rings + 1 ) ) )
+        path = np.concatenate( ( path[ 0 ] - r * np.sin( lat[ ::-1, None ] ) * n[ 0 ],
+                                 path,
+                                 path[ -1 ] + r * np.sin( lat[ :, None ] ) * n[ -1 ] ) )
+        radial = np.concatenate( ( np.tile( radial[ 0 ], ( rings, 1 ) ), radial, np.tile( radial[ -1 ], ( rings, 1 ) ) ) )
+        scales = np.concatenate( ( np.cos( lat[ ::-1 ] ), scales, np.cos( lat ) ) )
+        start_pole = path[ rings ] - r * n[ 0 ]
+        end_pole = path[ -1 - rings ] + r * n[ -1 ]
+
+    # Run the cross-section clockwise about n, so the faces point outward
+    t = -2.0 * math.pi * np.arange( minor_segments ) / float( minor_segments )
+    profile = r * np.column_stack( ( np.cos( t ), np.sin( t ) ) )
+    x_axes = np.tile( ( 1.0, 0.0, 0.0 ), ( len( path ), 1 ) )
+
+    return SweepData( path, x_axes, radial, profile, scales, start_pole, end_pole, oriented=True )
 
 def TriangularPrism( name=None, base=2.0, height=1.5, depth=0.5, location=(0,0,0) ):
     """Create a triangular prism, with the base along the X axis, and the top towards positive Y.
@@ -2430,8 +2770,13 @@ def Delete( ob=None ):
     Return nothing
     """
     if ob is not None:
-        Select( ob )
-    bpy.ops.object.delete()
+        # No operator is needed to delete a given object
+        Discard( ob )
+        if russbpy_selection is not None:
+            russbpy_selection.pop( ob.as_pointer(), None )
+        bpy.data.objects.remove( ob, do_unlink=True )
+        return
+    DeleteSelected()
 
 def DeleteSelected():
     """Delete the currently selected object
@@ -2441,7 +2786,10 @@ def DeleteSelected():
 
     Return nothing
     """
+    for ob in bpy.context.selected_objects:
+        Discard( ob )
     bpy.ops.object.delete()
+    TrackSelection()
 
 def Duplicate( ob=None ):
     """Duplicate an object
@@ -2449,12 +2797,21 @@ def Duplicate( ob=None ):
     Keyword arguments:
     ob -- The object to duplicate. If None, use the currently selected object.
 
-    Return the new object which is a duplicate of the input
+    Return the new object which is a duplicate of the input, left as the only selected and active object
     """
-    if ob is not None:
-        Select( ob )
-    bpy.ops.object.duplicate()
-    return Current()
+    if ob is None:
+        ob = Current()
+
+    # Copy the object and its data, as the operator does
+    Flush( ob )
+    d = ob.copy()
+    if ob.data is not None:
+        d.data = ob.data.copy()
+    bpy.context.scene.objects.link( d )
+
+    # The operator left the copy as the only selected and active object, which Current() and TransformTargets() rely on
+    Select( d )
+    return d
 
 def Join( *obs ):
     """Join objects into a single object
@@ -2472,11 +2829,15 @@ def Join( *obs ):
             Select( o, add )
             add = True
     bpy.ops.object.join()
+    TrackSelection( Current() )
     return Current()
 
 def ClearTransformations( ob ):
     Select( ob )
-    bpy.ops.object.transform_apply( location=True, rotation=True, scale=True )
+    if russbpy_matrix_transforms:
+        ConvertToWorldCoordinates( ob )
+    else:
+        bpy.ops.object.transform_apply( location=True, rotation=True, scale=True )
 
 def SetOrigin( ob, x, y, z ):
     """Set an object's origin
@@ -2492,6 +2853,18 @@ def SetOrigin( ob, x, y, z ):
 
     Return nothing
     """
+    if russbpy_matrix_transforms:
+        # Move the origin, and move the mesh data the other way so it stays in place
+        Flush( ob )
+        w = Transformation( ob.matrix_world )
+        a = w.array.copy()
+        a[ :3, 3 ] = ( x, y, z )
+        nw = Transformation( a )
+        ob.data.transform( ( nw.inverted() * w ).matrix )
+        ob.matrix_world = nw.matrix
+        ob.data.update()
+        return
+
     # store the location of current 3d cursor
     saved_location = bpy.context.scene.cursor_location  # returns a vector
     
@@ -2543,6 +2916,7 @@ def SetOriginCenter( ob ):
 
     Return nothing
     """
+    Flush( ob )
     bb = ob.bound_box
     min_x = min( bb[0][0], bb[1][0], bb[2][0], bb[3][0], bb[4][0], bb[5][0], bb[6][0], bb[7][0] )
     max_x = max( bb[0][0], bb[1][0], bb[2][0], bb[3][0], bb[4][0], bb[5][0], bb[6][0], bb[7][0] )
@@ -2567,6 +2941,14 @@ def SetOriginToGeometry( ob ):
 
     Return nothing
     """
+    if russbpy_matrix_transforms:
+        # Use the median of the vertices, as the operator does
+        Flush( ob )
+        co = np.empty( len( ob.data.vertices ) * 3 )
+        ob.data.vertices.foreach_get( "co", co )
+        SetOriginV( ob, Transformation( ob.matrix_world ).apply( co.reshape( -1, 3 ).mean( axis=0 ) ) )
+        return
+
     # set the origin on the current object to the 3dcursor location
     Select( ob )
     bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY')
@@ -2602,8 +2984,15 @@ def Scale( ob, x, y, z ):
 
     Return nothing
     """
+    if russbpy_matrix_transforms or russbpy_deferred_transforms:
+        obs = TransformTargets( ob )
+        TransformObjects( obs, Scaling( ( x, y, z ), TransformPivot( obs ) ) )
+        return
+
     if ob is not None:
         Select( ob )
+    else:
+        Flush()
     if russbpy_transform_metatdata:
         bpy.ops.object.mode_set(mode = 'EDIT')
     bpy.ops.transform.resize( value=( x, y, z ) )
@@ -2757,9 +3146,16 @@ def Translate( ob, x, y, z ):
 
     Return nothing
     """
+    if russbpy_matrix_transforms or russbpy_deferred_transforms:
+        if x is None:
+            ( x, y, z ) = -WorldMatrix( ob if ob is not None else bpy.context.active_object ).array[ :3, 3 ]
+        TransformObjects( TransformTargets( ob ), Translation( ( x, y, z ) ) )
+        return
+
     if ob is not None:
         Select( ob )
     else:
+        Flush()
         ob = bpy.context.active_object
 
     if russbpy_transform_metatdata:
@@ -2827,6 +3223,11 @@ def TranslateTo( ob, x, y, z ):
 
     Return nothing
     """
+    if russbpy_matrix_transforms or russbpy_deferred_transforms:
+        location = WorldMatrix( ob ).array[ :3, 3 ]
+        TransformObjects( [ ob ], Translation( ( x - location[ 0 ], y - location[ 1 ], z - location[ 2 ] ) ) )
+        return
+
     Select( ob )
     if russbpy_transform_metatdata:
         bpy.ops.object.mode_set(mode = 'EDIT')
@@ -2867,8 +3268,15 @@ def RotateRad( ob, angle, axis=(0,0,1.0) ):
 
     Return nothing
     """
+    if russbpy_matrix_transforms or russbpy_deferred_transforms:
+        obs = TransformTargets( ob )
+        TransformObjects( obs, RotationDeg( RadToDeg( angle ), axis, TransformPivot( obs ) ) )
+        return
+
     if ob is not None:
         Select( ob )
+    else:
+        Flush()
     if russbpy_transform_metatdata:
         bpy.ops.object.mode_set(mode = 'EDIT')
     bpy.ops.transform.rotate( value=angle, axis=axis )
@@ -3040,6 +3448,7 @@ def ShrinkWrap( ob ):
     global russbpy_modnum_gen
 
     # Find the biggest coordinate.
+    Flush( ob )
     bb = ob.bound_box
 
     m = 0;   
@@ -3093,9 +3502,7 @@ def SetColor( ob, rgb=None ):
     """
     global russbpy_color
 
-    if ob is not None:
-        Select( ob )
-    else:
+    if ob is None:
         # Just set the current color
         if rgb is None:
             raise Exception( "Cannot set the current color to None" )
@@ -3224,9 +3631,230 @@ def Hollow( ob, thickness=0.1, inward=True ):
 
     return ob
     
+def ObjectVertices( ob ):
+    """Return an object's vertices, in the object's local coordinates
+
+    Keyword arguments:
+    ob -- The mesh object
+
+    Return the N x 3 float32 array of vertices
+    """
+    verts = np.empty( len( ob.data.vertices ) * 3, dtype=np.float32 )
+    ob.data.vertices.foreach_get( "co", verts )
+    return verts.reshape( -1, 3 )
+
+def ObjectBox( ob ):
+    """Return an object's oriented bounding box: its local bounding box, placed in the world
+
+    Keyword arguments:
+    ob -- The mesh object
+
+    Return ( center, axes ), the world center and the 3 x 3 array of the world half-edge vectors, one per row,
+    or None if the object has no vertices
+    """
+    Flush( ob )
+    verts = ObjectVertices( ob )
+    if len( verts ) == 0:
+        return None
+    ( low, high ) = ( verts.min( axis=0 ).astype( np.float64 ), verts.max( axis=0 ).astype( np.float64 ) )
+    w = Transformation( ob.matrix_world ).array
+    return ( np.dot( w[ :3, :3 ], ( low + high ) / 2 ) + w[ :3, 3 ], ( w[ :3, :3 ] * ( ( high - low ) / 2 ) ).T )
+
+def WorldBounds( ob ):
+    """Return an object's world-space axis-aligned bounding box
+
+    Keyword arguments:
+    ob -- The mesh object
+
+    Return ( low, high ), the lowest and highest world coordinates of the object's vertices,
+    or None if the object has no vertices
+    """
+    Flush( ob )
+    verts = ObjectVertices( ob )
+    if len( verts ) == 0:
+        return None
+    verts = Transformation( ob.matrix_world ).apply( verts.astype( np.float64 ) )
+    return ( verts.min( axis=0 ), verts.max( axis=0 ) )
+
+def BoxesOverlap( box1, box2 ):
+    """Check whether two oriented boxes overlap, by the separating axis test
+
+    The boxes may be sheared by their objects' matrices; each is tested as the parallelepiped it is.
+    Boxes that touch count as overlapping.
+
+    Keyword arguments:
+    box1 -- The first ( center, axes ) box, as from ObjectBox()
+    box2 -- The second box
+
+    Return True if no axis separates them
+    """
+    ( a, b ) = ( box1[1], box2[1] )
+    # The boxes' face normals, and the cross products of their edges
+    candidates = [ np.cross( a[ ( i + 1 ) % 3 ], a[ ( i + 2 ) % 3 ] ) for i in range( 0, 3 ) ]
+    candidates += [ np.cross( b[ ( i + 1 ) % 3 ], b[ ( i + 2 ) % 3 ] ) for i in range( 0, 3 ) ]
+    candidates += [ np.cross( a[ i ], b[ j ] ) for i in range( 0, 3 ) for j in range( 0, 3 ) ]
+    axes = np.array( candidates )
+    axes = axes[ np.einsum( 'ij,ij->i', axes, axes ) > 1e-24 ]
+
+    distance = np.abs( np.dot( axes, box2[0] - box1[0] ) )
+    reach = np.abs( np.dot( axes, a.T ) ).sum( axis=1 ) + np.abs( np.dot( axes, b.T ) ).sum( axis=1 )
+    return bool( np.all( distance <= reach * ( 1 + 1e-9 ) + 1e-9 ) )
+
+def BooleanCanOverlap( ob1, ob2, planner=None ):
+    """Check whether two objects' bounding volumes overlap, so a Boolean operation on them can do anything
+
+    Keyword arguments:
+    ob1     -- The first object
+    ob2     -- The second object
+    planner -- 'AABB' to compare world-space axis-aligned bounding boxes, or 'OBB' to also compare oriented
+               bounding boxes. None means the russbpy_boolean_planner setting.
+
+    Return False if the objects are certainly disjoint
+    """
+    if planner is None:
+        planner = russbpy_boolean_planner
+    if not planner:
+        return True
+    ( b1, b2 ) = ( WorldBounds( ob1 ), WorldBounds( ob2 ) )
+    if b1 is None or b2 is None:
+        return False
+    # Boxes that touch count as overlapping, with some room for rounding
+    eps = 1e-6 * max( 1.0, np.abs( np.concatenate( b1 + b2 ) ).max() )
+    if np.any( b1[1] < b2[0] - eps ) or np.any( b2[1] < b1[0] - eps ):
+        return False
+    if planner == 'OBB':
+        return BoxesOverlap( ObjectBox( ob1 ), ObjectBox( ob2 ) )
+    return True
+
+def BooleanSolvers():
+    """Return the Boolean modifier's solvers in this version of Blender
+
+    Keyword arguments:
+    None
+
+    Return ( fast, exact ): ( 'FAST', 'EXACT' ) from Blender 2.91, ( 'BMESH', 'CARVE' ) in 2.79,
+    or None when the modifier has no choice of solver
+    """
+    props = bpy.types.BooleanModifier.bl_rna.properties
+    if 'solver' not in props.keys():
+        return None
+    names = [ e.identifier for e in props[ 'solver' ].enum_items ]
+    for pair in ( ( 'FAST', 'EXACT' ), ( 'BMESH', 'CARVE' ) ):
+        if pair[0] in names and pair[1] in names:
+            return pair
+    return None
+
+def MeshPlanes( verts, tris, tolerance ):
+    """Return the planes of a mesh's triangles, quantized so that coplanar triangles share a key
+
+    The normals are flipped to a common side, so faces that touch back to back share a key too.
+
+    Keyword arguments:
+    verts     -- The N x 3 vertices
+    tris      -- The T x 3 vertex indices of the triangles
+    tolerance -- The distance below which two planes are the same
+
+    Return the sorted array of distinct plane keys, with one ( x, y, z, d ) record of int64 fields per plane
+    """
+    corners = verts[ tris ]
+    n = TriangleNormals( corners )
+    # Degenerate triangles have no plane
+    solid = np.einsum( 'ij,ij->i', n, n ) > 0
+    ( n, corners ) = ( n[ solid ], corners[ solid ] )
+    n = n * np.where( np.dot( n, ( 1.0, 0.1414, 0.0314 ) ) < 0, -1.0, 1.0 )[ :, None ]
+    d = np.einsum( 'ij,ij->i', n, corners[ :, 0 ] )
+    q = np.concatenate( ( np.round( n * 1e4 ), np.round( d / tolerance )[ :, None ] ), axis=1 ).astype( np.int64 )
+    # Each row is viewed as one record, so the keys compare whole rows and never collide
+    keys = np.ascontiguousarray( q ).view( [ ( 'x', np.int64 ), ( 'y', np.int64 ), ( 'z', np.int64 ), ( 'd', np.int64 ) ] ).ravel()
+    return np.unique( keys )
+
+def MeshIsConvex( verts, tris, tolerance ):
+    """Check whether a closed triangle mesh is convex, with every vertex on or behind every triangle's plane
+
+    Keyword arguments:
+    verts     -- The N x 3 vertices
+    tris      -- The T x 3 vertex indices of the triangles
+    tolerance -- How far in front of a plane a vertex can be
+
+    Return True if the mesh is convex
+    """
+    corners = verts[ tris ]
+    n = TriangleNormals( corners )
+    d = np.einsum( 'ij,ij->i', n, corners[ :, 0 ] )
+    # Blocks of triangles keep the vertex x plane table small
+    for start in range( 0, len( n ), 256 ):
+        if np.any( np.dot( verts, n[ start : start + 256 ].T ) - d[ start : start + 256 ] > tolerance ):
+            return False
+    return True
+
+def MeshIsManifold( me ):
+    """Check whether a Blender mesh is closed and manifold, with every edge in exactly two faces
+
+    Keyword arguments:
+    me -- The mesh
+
+    Return True if the mesh has faces and is manifold
+    """
+    if len( me.polygons ) == 0:
+        return False
+    edges = np.empty( len( me.loops ), dtype=np.int32 )
+    me.loops.foreach_get( "edge_index", edges )
+    return bool( np.all( np.bincount( edges, minlength=len( me.edges ) ) == 2 ) )
+
+def ChooseBooleanSolver( ob1, ob2 ):
+    """Choose the Blender solver for a Boolean operation from its operands
+
+    Operands with coplanar faces get the exact solver, as the fast one often fails on them.
+    Otherwise a convex cutter of at most russbpy_boolean_convex_faces triangles gets the fast solver,
+    and other cutters get the exact solver, unless both operands have more than russbpy_boolean_exact_faces
+    triangles between them.
+
+    Keyword arguments:
+    ob1 -- The left-hand object
+    ob2 -- The right-hand object, the cutter
+
+    Return ( solver, reason ), the solver name and a description of the operands for the log,
+    or ( None, None ) when this Blender has no choice of solver
+    """
+    solvers = BooleanSolvers()
+    if solvers is None:
+        return ( None, None )
+    ( fast, exact ) = solvers
+
+    # A polygon of n corners makes n - 2 triangles, so empty operands are found without reading them
+    counts = [ len( ob.data.loops ) - 2 * len( ob.data.polygons ) for ob in ( ob1, ob2 ) ]
+    if min( counts ) == 0:
+        return ( fast, "%d faces" % sum( counts ) )
+    ( v1, t1 ) = ObjectWorldTriangles( ob1 )
+    ( v2, t2 ) = ObjectWorldTriangles( ob2 )
+    faces = len( t1 ) + len( t2 )
+    tolerance = 1e-5 * max( 1.0, np.abs( v1 ).max(), np.abs( v2 ).max() )
+
+    coplanar = len( np.intersect1d( MeshPlanes( v1, t1, tolerance ), MeshPlanes( v2, t2, tolerance ) ) ) > 0
+    convex = len( t2 ) <= russbpy_boolean_convex_faces and MeshIsConvex( v2, t2, tolerance )
+    reason = "%d faces, %s cutter, %s" % ( faces, "convex" if convex else "non-convex", "coplanar faces" if coplanar else "no coplanar faces" )
+    if coplanar:
+        return ( exact, reason )
+    if convex or faces > russbpy_boolean_exact_faces:
+        return ( fast, reason )
+    return ( exact, reason )
+
 def Boolean( ob1, ob2, op, delete=False ):
     """Perform a Boolean CSG (Constructive Solid Geometry) operation
 
+    The operands' bounding volumes are checked first, as russbpy_boolean_planner sets. When they are disjoint,
+    the solver is not run: a difference leaves ob1 as it is, an intersection leaves it empty,
+    and a union joins ob2 (or a copy of it, if it is kept) into ob1. Each skipped operation is logged.
+
+    Otherwise the solver is picked as russbpy_boolean_solver sets. With 'AUTO', ChooseBooleanSolver() picks it,
+    and a non-manifold result from manifold operands is thrown away and redone with the other solver.
+    So is an empty result that cannot be right: a union of two solids, or a difference where ob1 reaches outside
+    the cutter's bounding box. Other empty results are kept, as the operands may really have nothing in common.
+    The choices and retries are logged.
+
+    With russbpy_boolean_engine set to 'numpy', BooleanData() works out the result from the operands' triangles
+    instead, and it replaces ob1's mesh. The result is all triangles, with ob1's material on every face.
+
     Keyword arguments:
     ob1    -- The left-hand object
     ob2    -- The right-hand object
@@ -3235,22 +3863,101 @@ def Boolean( ob1, ob2, op, delete=False ):
 
     Return an object that is the result of the operation
     """
-    global russbpy_modnum_gen
+    Flush( ob2 )
+    if not BooleanCanOverlap( ob1, ob2 ):
+        Print( "Boolean %s of %s and %s skipped: their bounding boxes are disjoint" % ( op, ob1.name, ob2.name ) )
+        if op == 'UNION':
+            Join( ob1, ob2 if delete else Duplicate( ob2 ) )
+            return ob1
+        if op == 'INTERSECT':
+            bm = bmesh.new()
+            bm.to_mesh( ob1.data )
+            bm.free()
+            ob1.data.update()
+        if delete:
+            Delete( ob2 )
+        return ob1
 
     Select( ob1 )
-    # Add a modifier
-    mod = ob1.modifiers.new('joiner', 'BOOLEAN')
-    mod.name = "modifier_%d" % russbpy_modnum_gen
-    russbpy_modnum_gen = russbpy_modnum_gen + 1
-    mod.object = ob2
-    mod.operation = op
-    
+
     # Copy materials from one object to the other
     for mat in ob2.data.materials:
         ob1.data.materials.append( mat )
 
-    # Apply modifier
-    bpy.ops.object.modifier_apply(apply_as='DATA', modifier=mod.name)
+    if russbpy_boolean_engine == 'numpy':
+        Flush( ob1 )
+        start = time.time()
+        ( v1, t1 ) = ObjectWorldTriangles( ob1 )
+        ( v2, t2 ) = ObjectWorldTriangles( ob2 )
+        data = BooleanData( MeshData( v1, t1 ), MeshData( v2, t2 ), op )
+        data.verts = Transformation( ob1.matrix_world ).inverted().apply( data.verts.astype( np.float64 ) ).astype( np.float32 )
+        me = MeshFromData( data )
+        for mat in ob1.data.materials:
+            me.materials.append( mat )
+        old = ob1.data
+        ob1.data = me
+        if old.users == 0:
+            bpy.data.meshes.remove( old )
+        Print( "Boolean %s of %s and %s: numpy engine, %d faces in %.3fs" % ( op, ob1.name, ob2.name, data.face_count(), time.time() - start ) )
+        if delete:
+            Delete( ob2 )
+        return ob1
+
+    def apply( solver ):
+        global russbpy_modnum_gen
+
+        # Add a modifier
+        mod = ob1.modifiers.new('joiner', 'BOOLEAN')
+        mod.name = "modifier_%d" % russbpy_modnum_gen
+        russbpy_modnum_gen = russbpy_modnum_gen + 1
+        mod.object = ob2
+        mod.operation = op
+        if solver is not None:
+            mod.solver = solver
+
+        # Apply modifier
+        bpy.ops.object.modifier_apply(apply_as='DATA', modifier=mod.name)
+
+    if russbpy_boolean_solver == 'AUTO':
+        ( solver, reason ) = ChooseBooleanSolver( ob1, ob2 )
+    else:
+        ( solver, reason ) = ( russbpy_boolean_solver, None )
+        solvers = BooleanSolvers()
+        if solver is not None and ( solvers is None or solver not in solvers ):
+            raise Exception( "Cannot use the Boolean solver '%s': this Blender has %s" % ( solver, solvers ) )
+
+    if reason is None:
+        apply( solver )
+        if solver is not None:
+            Print( "Boolean %s of %s and %s: %s solver" % ( op, ob1.name, ob2.name, solver ) )
+    else:
+        Print( "Boolean %s of %s and %s: %s solver (%s)" % ( op, ob1.name, ob2.name, solver, reason ) )
+        # A bad result is only the solver's fault when the operands were manifold to begin with,
+        # so only then is a copy kept to retry from
+        manifold = MeshIsManifold( ob1.data ) and MeshIsManifold( ob2.data )
+        # An empty result may well be right, but not for a union of two solids, nor for a difference
+        # when ob1 reaches outside the cutter's bounding box, as that part of ob1 must be left over
+        never_empty = manifold and op == 'UNION'
+        if manifold and op == 'DIFFERENCE':
+            ( box1, box2 ) = ( WorldBounds( ob1 ), WorldBounds( ob2 ) )
+            margin = 1e-6 * max( 1.0, float( np.abs( np.concatenate( box1 + box2 ) ).max() ) )
+            never_empty = bool( np.any( box1[0] < box2[0] - margin ) or np.any( box1[1] > box2[1] + margin ) )
+        backup = ob1.data.copy() if manifold else None
+        apply( solver )
+        if len( ob1.data.polygons ) == 0:
+            problem = "an empty result" if never_empty else None
+        else:
+            problem = "a non-manifold result" if manifold and not MeshIsManifold( ob1.data ) else None
+        if problem is not None:
+            ( fast, exact ) = BooleanSolvers()
+            other = exact if solver == fast else fast
+            Print( "Boolean %s of %s and %s: %s solver gave %s, retrying with %s" % ( op, ob1.name, ob2.name, solver, problem, other ) )
+            failed = ob1.data
+            ob1.data = backup
+            backup = failed
+            apply( other )
+        if backup is not None:
+            bpy.data.meshes.remove( backup )
 
     if delete:
         # If requested, delete the second operand
@@ -3293,6 +4000,8 @@ def Union( ob1, ob2, delete=False ):
     for points being too close. Consider scaling the object by a factor of 10 or 100
     before calling this function.
 
+    To union more than two objects, use UnionAll().
+
     Keyword arguments:
     ob1    -- The left-hand operand
     ob2    -- The right-hand operand
@@ -3301,7 +4010,111 @@ def Union( ob1, ob2, delete=False ):
     Return an object consisting of the solid spaces that occur in either ob1 or ob2
     """
     return Boolean( ob1, ob2, 'UNION', delete )
-    
+
+def UnionAll( ob1, *obs, delete=False ):
+    """Union ob1 with any number of objects
+
+    WARNING! This operation can take a LONG time with complex objects!
+             It is strongly suggested you minimize the number of calls made to this function.
+             If you can affort the extra faces, consider using Join() instead.
+
+    The objects are merged by UnionTree(), smallest first, rather than one after another into ob1,
+    so the operands stay small.
+
+    Keyword arguments:
+    ob1    -- The left-hand operand, which holds the result
+    obs    -- The right-hand operands
+    delete -- Delete the right-hand operands after the operation?
+
+    Return an object consisting of the solid spaces that occur in any of the operands
+    """
+    if len( obs ) == 1:
+        return Boolean( ob1, obs[0], 'UNION', delete )
+    if not delete:
+        obs = [ Duplicate( o ) for o in obs ]
+    return UnionTree( [ ob1 ] + list( obs ), ob1 )
+
+def BoundsOverlaps( obs ):
+    """Check which pairs of objects have overlapping world-space bounding boxes
+
+    Boxes that touch count as overlapping. Objects without vertices overlap nothing.
+
+    Keyword arguments:
+    obs -- The list of objects
+
+    Return the N x N boolean array, True where two different objects' boxes overlap
+    """
+    bounds = [ WorldBounds( o ) for o in obs ]
+    low = np.array( [ b[0] if b is not None else ( np.inf, ) * 3 for b in bounds ] ).reshape( -1, 3 )
+    high = np.array( [ b[1] if b is not None else ( -np.inf, ) * 3 for b in bounds ] ).reshape( -1, 3 )
+    eps = 1e-6 * max( [ 1.0 ] + [ float( np.abs( np.concatenate( b ) ).max() ) for b in bounds if b is not None ] )
+    overlap = np.all( ( low[ :, None ] <= high[ None, : ] + eps ) & ( low[ None, : ] <= high[ :, None ] + eps ), axis=2 )
+    np.fill_diagonal( overlap, False )
+    return overlap
+
+def DisjointGroups( obs ):
+    """Split objects into groups whose bounding boxes do not overlap each other
+
+    Joining the objects of a group gives the same solid as their union, without a Boolean operation.
+    Each object goes into the first group it overlaps nothing in, so objects that all overlap stay apart.
+
+    Keyword arguments:
+    obs -- The list of objects
+
+    Return the list of groups, each a list of objects in their original order
+    """
+    overlap = BoundsOverlaps( obs )
+    groups = []
+    for i in range( 0, len( obs ) ):
+        for g in groups:
+            if not overlap[ i, g ].any():
+                g.append( i )
+                break
+        else:
+            groups.append( [ i ] )
+    return [ [ obs[ i ] for i in g ] for g in groups ]
+
+def UnionTree( obs, keep=None ):
+    """Union objects into one, as a balanced tree of Boolean operations
+
+    Objects whose bounding boxes overlap no other's are only joined, at the end.
+    The rest are merged smallest first, by face count, so each Boolean operation works on operands
+    of similar size, and the cost does not grow with the square of the number of objects.
+    All the objects but the result are deleted.
+
+    Keyword arguments:
+    obs  -- The list of objects
+    keep -- The object to hold the result. None means the first object.
+
+    Return the resulting object
+    """
+    obs = list( obs )
+    if keep is None:
+        keep = obs[0]
+    if len( obs ) == 1:
+        return keep
+
+    isolated = ~BoundsOverlaps( obs ).any( axis=1 )
+
+    # Merge the two objects with the fewest faces, until one is left
+    heap = [ ( len( o.data.polygons ), i, o ) for ( i, o ) in enumerate( obs ) if not isolated[ i ] ]
+    heapq.heapify( heap )
+    count = len( obs )
+    while len( heap ) > 1:
+        ( a, b ) = ( heapq.heappop( heap )[2], heapq.heappop( heap )[2] )
+        if b is keep:
+            ( a, b ) = ( b, a )
+        Boolean( a, b, 'UNION', True )
+        heapq.heappush( heap, ( len( a.data.polygons ), count, a ) )
+        count += 1
+
+    rest = [ h[2] for h in heap ] + [ o for ( i, o ) in enumerate( obs ) if isolated[ i ] ]
+    rest = [ keep ] + [ o for o in rest if o is not keep ]
+    if len( rest ) > 1:
+        Print( "Union of %d objects joined %d objects whose bounding boxes are disjoint" % ( len( obs ), len( rest ) - 1 ) )
+        Join( *rest )
+    return keep
+
 def Difference( ob1, ob2, delete=False ):
     """Perform a Boolean CSG (Constructive Solid Geometry) operation
 
@@ -3312,6 +4125,8 @@ def Difference( ob1, ob2, delete=False ):
     for points being too close. Consider scaling the object by a factor of 10 or 100
     before calling this function.
 
+    To cut with more than one object, use DifferenceAll().
+
     Keyword arguments:
     ob1    -- The left-hand operand
     ob2    -- The right-hand operand
@@ -3321,6 +4136,58 @@ def Difference( ob1, ob2, delete=False ):
     """
     return Boolean( ob1, ob2, 'DIFFERENCE', delete )
 
+def DifferenceAll( ob1, *obs, delete=False ):
+    """Cut any number of objects out of ob1
+
+    WARNING! This operation can take a LONG time with complex objects!
+             It is strongly suggested you minimize the number of calls made to this function.
+
+    Cutters whose bounding boxes miss ob1 are dropped, and the rest are split by DisjointGroups().
+    The cutters of each group are joined into one tool, so ob1 is cut once per group,
+    giving the same result as cutting with each cutter in turn.
+
+    Keyword arguments:
+    ob1    -- The left-hand operand, which holds the result
+    obs    -- The right-hand operands, the cutters
+    delete -- Delete the cutters after the operation?
+
+    Return an object consisting of the solid spaces in ob1 and not in any of the cutters
+    """
+    if len( obs ) == 1:
+        return Boolean( ob1, obs[0], 'DIFFERENCE', delete )
+
+    cutters = []
+    for o in obs:
+        if BooleanCanOverlap( ob1, o ):
+            cutters.append( o if delete else Duplicate( o ) )
+        elif delete:
+            Delete( o )
+    groups = DisjointGroups( cutters )
+    Print( "Difference of %s with %d cutters: %d can overlap it, in %d groups" % ( ob1.name, len( obs ), len( cutters ), len( groups ) ) )
+    for g in groups:
+        Boolean( ob1, Join( *g ) if len( g ) > 1 else g[0], 'DIFFERENCE', True )
+    return ob1
+
+def IntersectEach( obs, tool, delete=False ):
+    """Intersect each of a number of objects with the same tool
+
+    Each object is cut on its own, as objects joined into one Boolean operation can come out open
+    or disappear. Boolean() empties an object whose bounding box misses the tool's without running the solver.
+
+    Keyword arguments:
+    obs    -- The list of objects to intersect
+    tool   -- The object to intersect each of them with
+    delete -- Delete the tool after the operation?
+
+    Return the list of resulting objects, one per object
+    """
+    Print( "Intersection of %d objects with %s" % ( len( obs ), tool.name ) )
+    for o in obs:
+        Boolean( o, tool, 'INTERSECT' )
+    if delete:
+        Delete( tool )
+    return list( obs )
+
 def Clip( ob, x=0, y=0, z=0, size=10000000 ):
     """Remove up to half of the object in each axis
 
@@ -3482,6 +4349,7 @@ def FaceCenter( ob, face_num=0 ):
 
     Return the point at the center of the face.
     """
+    Flush( ob )
     sum_x = 0
     sum_y = 0
     sum_z = 0
@@ -3523,6 +4391,7 @@ def ConvertToWorldCoordinates( ob ):
 
     Return nothing
     """
+    Flush( ob )
     ob.data.transform( ob.matrix_world )
     ob.matrix_world = Matrix()
     ob.data.update(1)
@@ -3531,26 +4400,56 @@ class Transformation:
     def __init__( self, matrix ):
         """ Set the transformation
 
+        The transformation is held as a 4 x 4 homogeneous NumPy array, self.array.
+        Transformations compose with *, as matrices do: ( a * b ).apply( p ) is a.apply( b.apply( p ) ),
+        so a chain of rotations and translations collapses to one matrix before any points are touched.
+
         Keyword arguments:
-        matrix -- The transformation matrix, of type mathutils.Matrix
+        matrix -- The transformation matrix, as a 4 x 4 mathutils.Matrix, NumPy array or nested list
         """
-        self.matrix = matrix
+        self.array = np.array( [ list( row ) for row in matrix ], dtype=float ).reshape( 4, 4 )
+
+    @property
+    def matrix( self ):
+        """ Return the transformation as a mathutils.Matrix, or without Blender, as a 4 x 4 NumPy array
+        """
+        if Matrix is None:
+            return self.array.copy()
+        return Matrix( self.array.tolist() )
 
     def apply( self, point_or_list ):
         """ Apply the transformation
 
         Keyword arguments:
-        point_or_list -- A single point or a list of points to transform
+        point_or_list -- A single point, a list of points, or an N x 3 array of points to transform
 
-        Return the transformed point or list of points
+        Return the transformed point, list of points, or contiguous N x 3 array of points.
+        Points are mathutils Vectors, or without Blender, ( x, y, z ) tuples.
         """
-        if isinstance( point_or_list, list ):
-            points = []
-            for p in point_or_list:
-                points.append( self.matrix * Vec( p ) )
-            return points
+        point = Vec if Vec is not None else tuple
+        if isinstance( point_or_list, np.ndarray ):
+            points = point_or_list.reshape( -1, 3 )
+            out = np.dot( points, self.array[ :3, :3 ].T ) + self.array[ :3, 3 ]
+            return np.ascontiguousarray( out.reshape( point_or_list.shape ) )
+        elif isinstance( point_or_list, list ):
+            if len( point_or_list ) == 0:
+                return []
+            out = self.apply( np.array( [ tuple( p ) for p in point_or_list ], dtype=float ) )
+            return [ point( p ) for p in out.tolist() ]
         else:
-            return self.matrix * Vec( point_or_list )
+            return point( self.apply( np.array( tuple( point_or_list ), dtype=float ) ).tolist() )
+
+    def __mul__( self, other ):
+        """ Return the composition of this transformation after the other one
+        """
+        return Transformation( np.dot( self.array, other.array ) )
+
+    __matmul__ = __mul__
+
+    def inverted( self ):
+        """ Return the inverse transformation
+        """
+        return Transformation( np.linalg.inv( self.array ) )
 
 class RotationDeg( Transformation ):
     def __init__( self, angle, axis, point ):
@@ -3561,9 +4460,16 @@ class RotationDeg( Transformation ):
         axis  -- The axis of rotation, as a vector from the origin that will be translated to the point
         point -- The point to rotate around
         """
-        r = Matrix.Rotation(DegToRad( angle ), 4, axis)
-        t = Matrix.Translation(point)
-        super(RotationDeg, self).__init__( t * r * t.inverted() )
+        a = np.array( tuple( axis ), dtype=float )
+        ( x, y, z ) = a / np.sqrt( np.dot( a, a ) )
+        c = math.cos( DegToRad( angle ) )
+        s = math.sin( DegToRad( angle ) )
+        r = np.identity( 4 )
+        r[ :3, :3 ] = [ [ c + x*x*(1-c),   x*y*(1-c) - z*s, x*z*(1-c) + y*s ],
+                        [ y*x*(1-c) + z*s, c + y*y*(1-c),   y*z*(1-c) - x*s ],
+                        [ z*x*(1-c) - y*s, z*y*(1-c) + x*s, c + z*z*(1-c)   ] ]
+        t = Translation( point )
+        super(RotationDeg, self).__init__( ( t * Transformation( r ) * t.inverted() ).array )
 
 class Translation( Transformation ):
     def __init__( self, vector ):
@@ -3572,80 +4478,262 @@ class Translation( Transformation ):
         Keyword arguments:
         vector -- The translation vector
         """
-        t = Matrix.Translation(vector)
+        t = np.identity( 4 )
+        t[ :3, 3 ] = tuple( vector )
         super(Translation, self).__init__( t )
 
+class Scaling( Transformation ):
+    def __init__( self, factors, point=(0,0,0) ):
+        """ Set the scaling about the given point
+
+        Keyword arguments:
+        factors -- The (x,y,z) scale factors
+        point   -- The point to scale around
+        """
+        t = Translation( point )
+        s = np.diag( tuple( factors ) + ( 1.0, ) )
+        super(Scaling, self).__init__( ( t * Transformation( s ) * t.inverted() ).array )
+
 #################################################
-# Selecting
+# Deferred Transformations
 #################################################
 
-def SelectFace( ob, face_num=0 ):
-    """Select a specific face of an object
-
-    The selection of the face can be used to set up transformations that apply only to that face.
+def WorldMatrix( ob ):
+    """Return the object's world matrix, including any pending transformation
 
     Keyword arguments:
-    ob        -- The object containing the face
-    face_num  -- The zero-based face number to select
+    ob -- The object
 
-    Return nothing
+    Return the world matrix as a Transformation
     """
-    if ob is not None:
-        Select( ob )
+    w = Transformation( ob.matrix_world )
+    pending = russbpy_pending_transforms.get( ob.as_pointer() )
+    if pending is not None and not russbpy_transform_metatdata:
+        w = pending[1] * w
+    return w
 
-    # Select the given face of the active object.
-    bpy.ops.object.mode_set(mode = 'OBJECT')
-    obj = bpy.context.active_object
+def TransformPivot( ob ):
+    """Return the point that an object is rotated and scaled around, including any pending transformation
 
-    # deselect everything
-    bpy.ops.object.mode_set(mode = 'EDIT')
-    SelectNone()
+    This is the object's origin, or with transform metadata on, the median of its vertices.
+    For several objects, it is the median of their pivots.
 
-    # Select the face
-    bpy.ops.object.mode_set(mode = 'OBJECT')
-    obj.data.polygons[face_num].select = True
+    Keyword arguments:
+    ob -- The object, or a list of objects
 
-def SelectVertex( ob, vertex_num=0 ):
-    """Select a specific vertex of an object
+    Return the pivot point as an (x,y,z) NumPy array
+    """
+    if isinstance( ob, list ):
+        return np.mean( [ TransformPivot( o ) for o in ob ], axis=0 )
+    if not russbpy_transform_metatdata:
+        return WorldMatrix( ob ).array[ :3, 3 ]
 
-    The selection of the vertex can be used to set up transformations that apply only to that vertex.
+    pending = russbpy_pending_transforms.get( ob.as_pointer() )
+    if pending is not None and pending[2] is not None:
+        return pending[2]
+
+    # As with the Edit-mode operators, the pivot is the median of the selected vertices
+    co = np.empty( len( ob.data.vertices ) * 3 )
+    ob.data.vertices.foreach_get( "co", co )
+    co = co.reshape( -1, 3 )
+    selected = np.zeros( len( co ), dtype=bool )
+    ob.data.vertices.foreach_get( "select", selected )
+    if selected.any():
+        co = co[ selected ]
+    median = WorldMatrix( ob ).apply( co.mean( axis=0 ) )
+    if pending is not None:
+        median = pending[1].apply( median )
+        pending[2] = median
+    return median
+
+def PendTransformation( ob, t ):
+    """Add a world-space transformation to an object's pending transformation
 
     Keyword arguments:
-    ob          -- The object containing the face
-    vertex_num  -- The zero-based vertex number to select
+    ob -- The object
+    t  -- The Transformation to apply after any already pending
 
     Return nothing
     """
-    if ob is not None:
-        Select( ob )
+    key = ob.as_pointer()
+    pending = russbpy_pending_transforms.get( key )
+    if pending is None:
+        median = None
+        if russbpy_transform_metatdata:
+            median = TransformPivot( ob )
+        pending = [ ob, Transformation( np.identity( 4 ) ), median ]
+        russbpy_pending_transforms[ key ] = pending
+    pending[1] = t * pending[1]
+    if pending[2] is not None:
+        pending[2] = t.apply( pending[2] )
 
-    # Select the given face of the active object.
-    bpy.ops.object.mode_set(mode = 'OBJECT')
-    obj = bpy.context.active_object
+def ApplyWorldTransformation( ob, t ):
+    """Apply a world-space transformation to an object now
 
-#    # deselect everything
-#    bpy.ops.object.mode_set(mode = 'EDIT')
-#    SelectNone()
+    The transformation goes to the object's world matrix, or with transform metadata on, into its mesh data.
+    As with the Edit-mode operators, only the selected vertices are moved then, so a face picked by SelectFace()
+    is transformed on its own.
 
-    # Select the face
-#    bpy.ops.object.mode_set(mode = 'OBJECT')
-    obj.data.vertices[vertex_num].select = True
+    Keyword arguments:
+    ob -- The object
+    t  -- The Transformation to apply
 
-def Select( ob, add=False ):
-    """Select an object
+    Return nothing
+    """
+    w = Transformation( ob.matrix_world )
+    if russbpy_transform_metatdata:
+        me = ob.data
+        selected = np.zeros( len( me.vertices ), dtype=bool )
+        me.vertices.foreach_get( "select", selected )
+        local = w.inverted() * t * w
+        if selected.all():
+            me.transform( local.matrix )
+        elif selected.any():
+            co = np.empty( len( me.vertices ) * 3, dtype=np.float32 )
+            me.vertices.foreach_get( "co", co )
+            co = co.reshape( -1, 3 )
+            co[ selected ] = local.apply( co[ selected ].astype( np.float64 ) )
+            me.vertices.foreach_set( "co", co.ravel() )
+        me.update()
+    else:
+        ob.matrix_world = ( t * w ).matrix
 
-    The selection of the object can be used to set up tranformations that only apply to that object.
-    In general, it is best to explicitly pass objects around _instead_ of using Select(), but there
-    are some Blender operations that work better with the current selection, hence this function.
+def TransformTargets( ob ):
+    """Return the objects that a transformation function acts on
 
     Keyword arguments:
-    ob  -- The object to select
-    add -- Add the object to the current selection?
-           Otherwise, the object will be the only object selected.
+    ob -- The object. None means the currently-selected objects, or with transform metadata on, the active object.
 
-    Return nothing
+    Return the list of objects
     """
-    if not add:
+    if ob is not None:
+        return [ ob ]
+    if russbpy_transform_metatdata:
+        return [ bpy.context.active_object ]
+    return list( bpy.context.selected_objects )
+
+def TransformObjects( obs, t ):
+    """Transform objects by a world-space transformation, without operators
+
+    With deferred transforms on, the transformation is added to each object's pending transformation.
+    Otherwise it is applied now, by ApplyWorldTransformation().
+
+    Keyword arguments:
+    obs -- The list of objects
+    t   -- The Transformation
+
+    Return nothing
+    """
+    for ob in obs:
+        if russbpy_deferred_transforms:
+            PendTransformation( ob, t )
+        else:
+            Flush( ob )
+            ApplyWorldTransformation( ob, t )
+
+def Flush( ob=None ):
+    """Apply any pending transformations
+
+    With deferred transforms on, Translate(), Rotate*() and Scale() only add to a pending matrix per object.
+    It is applied by Flush(), which is called by Select(), SelectAll(), and the functions that read the object's state.
+
+    Keyword arguments:
+    ob -- The object or list of objects to flush. None means all objects.
+
+    Return nothing
+    """
+    if ob is None:
+        pendings = list( russbpy_pending_transforms.values() )
+        russbpy_pending_transforms.clear()
+    elif isinstance( ob, list ):
+        pendings = [ russbpy_pending_transforms.pop( o.as_pointer() ) for o in ob if o.as_pointer() in russbpy_pending_transforms ]
+    else:
+        pendings = [ russbpy_pending_transforms.pop( ob.as_pointer() ) ] if ob.as_pointer() in russbpy_pending_transforms else []
+
+    for ( o, t, median ) in pendings:
+        ApplyWorldTransformation( o, t )
+
+def Discard( ob ):
+    """Forget any pending transformation of an object that is about to be deleted
+
+    Keyword arguments:
+    ob -- The object
+
+    Return nothing
+    """
+    russbpy_pending_transforms.pop( ob.as_pointer(), None )
+
+#################################################
+# Selecting
+#################################################
+
+def SelectFace( ob, face_num=0 ):
+    """Select a specific face of an object
+
+    The selection of the face can be used to set up transformations that apply only to that face.
+
+    Keyword arguments:
+    ob        -- The object containing the face
+    face_num  -- The zero-based face number to select
+
+    Return nothing
+    """
+    if ob is not None:
+        Select( ob )
+
+    # Select the given face of the active object.
+    bpy.ops.object.mode_set(mode = 'OBJECT')
+    obj = bpy.context.active_object
+
+    # deselect everything
+    bpy.ops.object.mode_set(mode = 'EDIT')
+    SelectNone()
+
+    # Select the face
+    bpy.ops.object.mode_set(mode = 'OBJECT')
+    obj.data.polygons[face_num].select = True
+
+def SelectVertex( ob, vertex_num=0 ):
+    """Select a specific vertex of an object
+
+    The selection of the vertex can be used to set up transformations that apply only to that vertex.
+
+    Keyword arguments:
+    ob          -- The object containing the face
+    vertex_num  -- The zero-based vertex number to select
+
+    Return nothing
+    """
+    if ob is not None:
+        Select( ob )
+
+    # Select the given face of the active object.
+    bpy.ops.object.mode_set(mode = 'OBJECT')
+    obj = bpy.context.active_object
+
+#    # deselect everything
+#    bpy.ops.object.mode_set(mode = 'EDIT')
+#    SelectNone()
+
+    # Select the face
+#    bpy.ops.object.mode_set(mode = 'OBJECT')
+    obj.data.vertices[vertex_num].select = True
+
+def Select( ob, add=False ):
+    """Select an object
+
+    The selection of the object can be used to set up tranformations that only apply to that object.
+    In general, it is best to explicitly pass objects around _instead_ of using Select(), but there
+    are some Blender operations that work better with the current selection, hence this function.
+
+    Keyword arguments:
+    ob  -- The object to select
+    add -- Add the object to the current selection?
+           Otherwise, the object will be the only object selected.
+
+    Return nothing
+    """
+    if not add:
         SelectNone()
     if ob is not None:
         if isinstance( ob, list ):
@@ -3653,7 +4741,10 @@ def Select( ob, add=False ):
                 Select( o, add )
                 if not add: add = True
         else:
+            Flush( ob )
             ob.select = True
+            if russbpy_selection is not None:
+                russbpy_selection[ ob.as_pointer() ] = ob
     if not add:
         bpy.context.scene.objects.active = ob
 
@@ -3665,17 +4756,52 @@ def SelectAll():
 
     Return nothing
     """
+    global russbpy_selection
+
+    Flush()
     bpy.ops.object.select_all(action='SELECT')
+    russbpy_selection = None
 
 def SelectNone():
     """Deselect all objects
 
+    Only the objects that russbpy knows to be selected are deselected, unless the selection is not known.
+
     Keyword arguments:
     None
 
     Return nothing
     """
-    bpy.ops.object.select_all(action='DESELECT')
+    global russbpy_selection
+
+    if russbpy_selection is None:
+        bpy.ops.object.select_all(action='DESELECT')
+    else:
+        for ob in russbpy_selection.values():
+            try:
+                ob.select = False
+            except ReferenceError:
+                # The object has been removed since it was selected
+                pass
+    russbpy_selection = {}
+
+def TrackSelection( ob=None ):
+    """Record that an operator has left only the given object selected
+
+    Operators that add, duplicate, join or delete objects change the selection themselves,
+    so the functions calling them use this to keep the selection known to SelectNone().
+
+    Keyword arguments:
+    ob -- The only selected object, or None if nothing is selected
+
+    Return nothing
+    """
+    global russbpy_selection
+
+    if ob is None:
+        russbpy_selection = {}
+    else:
+        russbpy_selection = { ob.as_pointer(): ob }
 
 def ShowAll():
     """Show all objects
@@ -3879,6 +5005,7 @@ def Dimensions( ob ):
 
     Return the object's dimensions as (x,y,z)
     """
+    Flush( ob )
     return ob.dimensions # (x,y,z)
 
 def Location( ob ):
@@ -3889,6 +5016,7 @@ def Location( ob ):
 
     Return the object's location as (x,y,z)
     """
+    Flush( ob )
     return ob.location # (x,y,z)
 
 def VertexCount( ob ):
@@ -3911,6 +5039,7 @@ def VertexInfo( ob, vert_index ):
     Return the vertex information, as follows:
 	( global_position, normal )
     """
+    Flush( ob )
     v = ob.data.vertices[ vert_index ]
     mat = ob.matrix_world
     global_location = ( v.co[0], v.co[1], v.co[2] )
@@ -4032,14 +5161,1990 @@ def SaveSTL( fn ):
 
     Return nothing
     """
-    SelectAll()
-    bpy.ops.export_mesh.stl( filepath=fn )
+    WriteSTL( fn )
+
+def ObjectTriangles( ob ):
+    """Return an object's mesh as triangles, in the object's local coordinates
+
+    The faces are triangulated by Blender, so concave faces are split correctly.
+
+    Keyword arguments:
+    ob -- The mesh object
+
+    Return ( verts, tris ), the N x 3 float32 vertices and the T x 3 int32 vertex indices of the triangles
+    """
+    me = ob.data
+    verts = ObjectVertices( ob )
+
+    if hasattr( me, "loop_triangles" ):
+        me.calc_loop_triangles()
+        tris = np.empty( len( me.loop_triangles ) * 3, dtype=np.int32 )
+        me.loop_triangles.foreach_get( "vertices", tris )
+        tris = tris.reshape( -1, 3 )
+    else:
+        me.calc_tessface()
+        quads = np.empty( len( me.tessfaces ) * 4, dtype=np.int32 )
+        me.tessfaces.foreach_get( "vertices_raw", quads )
+        quads = quads.reshape( -1, 4 )
+        # A tessface is a triangle when its fourth vertex is 0, otherwise it is a quad to split along 0-2
+        split = quads[ quads[ :, 3 ] != 0 ]
+        tris = np.concatenate( ( quads[ :, :3 ], split[ :, [ 0, 2, 3 ] ] ) )
+
+    return ( verts, tris )
+
+def TriangleNormals( corners ):
+    """Return the unit normals of triangles, following the right-hand rule
+
+    Keyword arguments:
+    corners -- The T x 3 x 3 array of the triangles' corner points
+
+    Return the T x 3 array of normals, with zero normals for degenerate triangles
+    """
+    n = np.cross( corners[ :, 1 ] - corners[ :, 0 ], corners[ :, 2 ] - corners[ :, 0 ] )
+    l = np.sqrt( np.einsum( 'ij,ij->i', n, n ) )
+    l[ l == 0 ] = 1.0
+    return n / l[ :, None ]
+
+def ObjectWorldTriangles( ob ):
+    """Return an object's mesh as triangles, in world coordinates
+
+    Keyword arguments:
+    ob -- The mesh object
+
+    Return ( verts, tris ), the N x 3 float64 vertices and the T x 3 int32 vertex indices of the triangles
+    """
+    ( verts, tris ) = ObjectTriangles( ob )
+    return ( Transformation( ob.matrix_world ).apply( verts.astype( np.float64 ) ), tris )
+
+def WriteSTL( fn, obs=None, threads=4, chunk=1000000 ):
+    """Write objects to a binary STL file, straight from their mesh arrays
+
+    The arrays are read from Blender on this thread, then written by WriteSTLData().
+    No operator or UI context is needed.
+
+    Keyword arguments:
+    fn      -- The filename to write to
+    obs     -- The list of objects to write. None means all the mesh objects in the scene.
+    threads -- The number of worker threads
+    chunk   -- The number of triangles each worker writes at a time
+
+    Return the number of triangles written
+    """
+    Flush()
+    if obs is None:
+        obs = [ ob for ob in bpy.context.scene.objects if ob.type == 'MESH' ]
+
+    # Blender is not thread-safe, so the arrays are read on this thread.
+    return WriteSTLData( fn, [ ObjectWorldTriangles( ob ) for ob in obs ], threads, chunk )
+
+def WriteSTLData( fn, meshes, threads=4, chunk=1000000 ):
+    """Write meshes to a binary STL file, without using Blender
+
+    The triangles' normals are computed with NumPy.
+    The file is sized up front and memory-mapped, and worker threads fill disjoint ranges of it,
+    chunk triangles at a time.
+
+    Keyword arguments:
+    fn      -- The filename to write to
+    meshes  -- The list of ( verts, tris ) meshes, of N x 3 world coordinates and T x 3 vertex indices
+    threads -- The number of worker threads, or 1 to write on this thread
+    chunk   -- The number of triangles each worker writes at a time
+
+    Return the number of triangles written
+    """
+    total = sum( len( tris ) for ( v, tris ) in meshes )
+
+    record = np.dtype( [ ( 'normal', '<f4', ( 3, ) ), ( 'v', '<f4', ( 3, 3 ) ), ( 'attr', '<u2' ) ] )
+    with open( fn, 'wb' ) as f:
+        f.write( b'russbpy binary STL'.ljust( 80, b' ' ) )
+        f.write( np.array( [ total ], dtype='<u4' ).tobytes() )
+        f.truncate( 84 + record.itemsize * total )
+    if total == 0:
+        return 0
+
+    out = np.memmap( fn, dtype=record, mode='r+', offset=84, shape=( total, ) )
+
+    def fill( start, v, tris ):
+        corners = np.asarray( v )[ tris ]
+        dest = out[ start:start + len( tris ) ]
+        dest[ 'normal' ] = TriangleNormals( corners )
+        dest[ 'v' ] = corners
+        dest[ 'attr' ] = 0
+
+    ranges = []
+    start = 0
+    for ( v, tris ) in meshes:
+        for i in range( 0, len( tris ), chunk ):
+            ranges.append( ( start + i, v, tris[ i:i + chunk ] ) )
+        start += len( tris )
+
+    if threads <= 1:
+        for r in ranges:
+            fill( *r )
+    else:
+        with ThreadPoolExecutor( max_workers=threads ) as pool:
+            for job in [ pool.submit( fill, *r ) for r in ranges ]:
+                job.result()
+
+    out.flush()
+    del out
+    return total
+
+def ExportParts( directory, obs=None, format='stl', threads=None, manifest='manifest.json' ):
+    """Write each object to its own file, in parallel, with a manifest of the parts
+
+    The objects' world-space triangles are read from Blender on this thread, then written by ExportPartsData().
+
+    Keyword arguments:
+    directory -- The directory to write to, which is created if needed
+    obs       -- The list of objects to write. None means all the mesh objects in the scene.
+    format    -- 'stl' for binary STL files, or 'glb' for binary glTF files
+    threads   -- The number of worker threads. None means one per CPU.
+    manifest  -- The manifest's filename, in the directory, or None to not write one
+
+    Return the manifest, as a dictionary
+    """
+    Flush()
+    if obs is None:
+        obs = [ ob for ob in bpy.context.scene.objects if ob.type == 'MESH' ]
+    parts = [ ( ob.name, ObjectWorldTriangles( ob ), ObjectColor( ob ) if format == 'glb' else None ) for ob in obs ]
+    return ExportPartsData( directory, parts, format, threads, manifest )
+
+def ExportPartsData( directory, parts, format='stl', threads=None, manifest='manifest.json', skip=() ):
+    """Write each part to its own file, in parallel, with a manifest of the parts, without using Blender
+
+    The files are written on a thread pool; NumPy releases the interpreter lock for the heavy work,
+    so the writes run side by side. Each file is named after its part, with a suffix such as '_2' when
+    another part's name already gave the same file name, ignoring case. The manifest is a JSON file
+    listing, for each part, its file, triangle count and bounding box.
+    The files listed by the previous manifest for parts that are gone are deleted.
+
+    Keyword arguments:
+    directory -- The directory to write to, which is created if needed
+    parts     -- The list of ( name, ( verts, tris ), color ) parts, of N x 3 world coordinates,
+                 T x 3 vertex indices, and an (r,g,b) color or None
+    format    -- 'stl' for binary STL files, or 'glb' for binary glTF files
+    threads   -- The number of worker threads. None means one per CPU.
+    manifest  -- The manifest's filename, in the directory, or None to not write one
+    skip      -- The names of the parts whose files are up to date, and are not rewritten if they exist
+
+    Return the manifest, as a dictionary
+    """
+    if format not in ( 'stl', 'glb' ):
+        raise Exception( "Cannot export parts as '%s': the format must be 'stl' or 'glb'" % format )
+    if not os.path.isdir( directory ):
+        os.makedirs( directory )
+    skip = set( skip )
+
+    # Object names may hold characters that file names cannot, so different names can give the same
+    # file name, as can names differing only in case on a case-insensitive file system
+    names = []
+    taken = set()
+    for ( name, mesh, color ) in parts:
+        base = ''.join( c if c.isalnum() or c in '-_. ' else '_' for c in name )
+        fn = '%s.%s' % ( base, format )
+        k = 1
+        while fn.lower() in taken:
+            k += 1
+            fn = '%s_%d.%s' % ( base, k, format )
+        taken.add( fn.lower() )
+        names.append( fn )
+
+    def write( part, fn ):
+        ( name, ( verts, tris ), color ) = part
+        path = os.path.join( directory, fn )
+        if name in skip and os.path.exists( path ):
+            pass
+        elif format == 'stl':
+            WriteSTLData( path, [ ( verts, tris ) ], threads=1 )
+        else:
+            WriteGLBData( path, [ ( verts, tris ) ], [ ( 0, None, color, name ) ] )
+        return { 'name': name, 'file': fn, 'triangles': len( tris ),
+                 'min': verts.min( axis=0 ).tolist() if len( verts ) > 0 else None,
+                 'max': verts.max( axis=0 ).tolist() if len( verts ) > 0 else None }
+
+    with ThreadPoolExecutor( max_workers=threads or os.cpu_count() or 4 ) as pool:
+        listing = { 'format': format, 'parts': list( pool.map( write, parts, names ) ) }
+
+    if manifest is not None:
+        previous = ReadJSON( os.path.join( directory, manifest ) )
+        for part in previous.get( 'parts', [] ):
+            path = os.path.join( directory, os.path.basename( part.get( 'file', '' ) ) )
+            if part.get( 'file' ) and part[ 'file' ].lower() not in taken and os.path.isfile( path ):
+                os.remove( path )
+        if listing != previous:
+            with open( os.path.join( directory, manifest ), 'w' ) as f:
+                json.dump( listing, f, indent=1, sort_keys=True )
+    return listing
+
+def ReadJSON( fn ):
+    """Read a JSON file, such as a manifest written by an earlier run
+
+    Keyword arguments:
+    fn -- The filename to read
+
+    Return the contents, or an empty dictionary if the file is missing or unreadable
+    """
+    try:
+        with open( fn ) as f:
+            return json.load( f )
+    except ( IOError, OSError, ValueError ):
+        return {}
+
+def MeshFingerprint( verts, tris, color=None ):
+    """Return a fingerprint of a mesh's geometry, which changes whenever the mesh written out would
+
+    The vertices are hashed as float32, as the exporters write them, with -0.0 made 0.0.
+
+    Keyword arguments:
+    verts -- The N x 3 world coordinates
+    tris  -- The T x 3 vertex indices
+    color -- The (r,g,b) color, or None
+
+    Return the SHA-1 hex digest
+    """
+    h = hashlib.sha1( np.array( [ len( verts ), len( tris ) ], dtype='<i8' ).tobytes() )
+    h.update( ( np.ascontiguousarray( verts, dtype='<f4' ) + np.float32( 0 ) ).tobytes() )
+    h.update( np.ascontiguousarray( tris, dtype='<i4' ).tobytes() )
+    if color is not None:
+        h.update( np.array( color[ :3 ], dtype='<f4' ).tobytes() )
+    return h.hexdigest()
+
+def SceneFingerprints( parts ):
+    """Return the fingerprints of parts, and of all of them together
+
+    Keyword arguments:
+    parts -- The list of ( name, ( verts, tris ), color ) parts, as for ExportPartsData()
+
+    Return a dictionary of the 'scene' fingerprint, and the 'objects' fingerprints by name
+    """
+    objects = {}
+    h = hashlib.sha1()
+    for ( name, ( verts, tris ), color ) in parts:
+        objects[ name ] = MeshFingerprint( verts, tris, color )
+        h.update( ( '%s\0%s\0' % ( name, objects[ name ] ) ).encode( 'utf-8' ) )
+    return { 'scene': h.hexdigest(), 'objects': objects }
+
+def Save3MF( fn ):
+    """Export all objects to a 3MF file, writing each distinct mesh once
+
+    Keyword arguments:
+    fn -- The filename to export to
+
+    Return nothing
+    """
+    Write3MF( fn )
+
+def MeshInstances( obs, tolerance=1e-5 ):
+    """Find the distinct meshes among objects, and place each object as an instance of one
+
+    See MeshInstancesData().
+
+    Keyword arguments:
+    obs       -- The list of mesh objects
+    tolerance -- The distance, in the scene's units, by which matching vertices may differ
+
+    Return ( meshes, placements ), the list of distinct ( verts, tris ) meshes as from ObjectTriangles(),
+    and for each of the objects a ( mesh index, Transformation ) taking the mesh to the object's place in the world
+    """
+    Flush( obs )
+    return MeshInstancesData( [ ObjectTriangles( ob ) + ( Transformation( ob.matrix_world ), ) for ob in obs ], tolerance )
+
+def MeshInstancesData( parts, tolerance=1e-5 ):
+    """Find the distinct meshes among placed meshes, and place each as an instance of one, without using Blender
+
+    Two meshes are the same when their local triangles are the same, to within tolerance, once each is
+    moved to its lowest corner. Candidates are found by hashing the vertex indices and the mesh's size,
+    and then their vertices are compared. So copies made by Duplicate() are found, and so are copies
+    moved with the translations baked into the mesh.
+
+    Keyword arguments:
+    parts     -- The list of ( verts, tris, t ), the N x 3 local vertices, the T x 3 vertex indices of the triangles
+                 and the Transformation taking the vertices to world coordinates
+    tolerance -- The distance, in the scene's units, by which matching vertices may differ
+
+    Return ( meshes, placements ), the list of distinct ( verts, tris ) meshes,
+    and for each of the parts a ( mesh index, Transformation ) taking the mesh to the part's place in the world
+    """
+    meshes = []
+    ids = {}
+    lows = []
+    shapes = []
+    placements = []
+    for ( verts, tris, t ) in parts:
+        if len( verts ) > 0:
+            ( low, high ) = ( verts.min( axis=0 ), verts.max( axis=0 ) )
+        else:
+            ( low, high ) = ( np.zeros( 3, dtype=np.float32 ), np.zeros( 3, dtype=np.float32 ) )
+        key = hashlib.sha1( np.ascontiguousarray( tris, dtype=np.int32 ).tobytes() )
+        key.update( np.round( ( high - low ) / ( tolerance * 1000 ) ).astype( np.int64 ).tobytes() )
+        key = key.hexdigest()
+        local = verts - low
+        found = None
+        for i in ids.get( key, [] ):
+            if len( shapes[ i ] ) == len( local ) and np.allclose( shapes[ i ], local, rtol=0, atol=tolerance ):
+                found = i
+                break
+        if found is None:
+            found = len( meshes )
+            ids.setdefault( key, [] ).append( found )
+            meshes.append( ( verts, tris ) )
+            lows.append( low )
+            shapes.append( local )
+        t = t * Translation( ( low - lows[ found ] ).astype( np.float64 ) )
+        placements.append( ( found, t ) )
+    return ( meshes, placements )
+
+def Write3MF( fn, obs=None, tolerance=1e-5 ):
+    """Write objects to a 3MF file, with identical meshes written once and instanced as components
+
+    The distinct meshes are found by MeshInstances(). Each becomes a 3MF object, and each of
+    the objects a component of one assembly object, transforming the shared mesh to its place.
+    The model is streamed into a deflate zip. See Write3MFData().
+
+    Keyword arguments:
+    fn        -- The filename to write to
+    obs       -- The list of objects to write. None means all the mesh objects in the scene.
+    tolerance -- The distance, in the scene's units (millimeters), by which the vertices of copies may differ
+
+    Return the number of distinct meshes written
+    """
+    Flush()
+    if obs is None:
+        obs = [ ob for ob in bpy.context.scene.objects if ob.type == 'MESH' ]
+    ( meshes, components ) = MeshInstances( obs, tolerance )
+    Write3MFData( fn, meshes, components )
+    return len( meshes )
+
+def Write3MFData( fn, meshes, components ):
+    """Write meshes and their instances to a 3MF file, without using Blender
+
+    Each mesh becomes a 3MF object, and each instance a component of one assembly object. See MeshStream.
+
+    Keyword arguments:
+    fn         -- The filename to write to
+    meshes     -- The list of meshes, each a ( verts, tris ) pair of N x 3 vertices and T x 3 vertex indices
+    components -- The list of instances, each a ( mesh index, Transformation )
+
+    Return the number of triangles written
+    """
+    stream = MeshStream( fn )
+    ids = [ stream.add_mesh( verts, tris ) for ( verts, tris ) in meshes ]
+    for ( i, t ) in components:
+        stream.place( ids[ i ], t )
+    return stream.close()
+
+class MeshStream:
+    def __init__( self, fn ):
+        """ Open an STL or 3MF file to write meshes to, one after another
+
+        Nothing but the file is held open, so any number of meshes can be written with little memory.
+        An STL file gets its triangles in world coordinates, and its triangle count when it is closed.
+        A 3MF file's model is streamed into a deflate zip (spooled to a temporary file on Python 3.5),
+        with each distinct mesh written once and placed as a component of one assembly object:
+            fn        -- The filename
+            format    -- 'stl' or '3mf'
+            triangles -- The number of triangles written
+
+        Keyword arguments:
+        fn -- The filename to write to, ending in .stl or .3mf
+        """
+        self.fn = fn
+        self.format = os.path.splitext( fn )[1].lower().lstrip( '.' )
+        self.triangles = 0
+        if self.format == 'stl':
+            self.file = open( fn, 'wb' )
+            self.file.write( b'russbpy binary STL'.ljust( 80, b' ' ) + np.zeros( 1, dtype='<u4' ).tobytes() )
+            return
+        if self.format != '3mf':
+            raise Exception( "Cannot stream meshes to '%s': the file type is not STL or 3MF" % fn )
+
+        self.zip = zipfile.ZipFile( fn, 'w', zipfile.ZIP_DEFLATED )
+        self.zip.writestr( '[Content_Types].xml',
+                           '<?xml version="1.0" encoding="UTF-8"?>\n'
+                           '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\n'
+                           ' <Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\n'
+                           ' <Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>\n'
+                           '</Types>\n' )
+        self.zip.writestr( '_rels/.rels',
+                           '<?xml version="1.0" encoding="UTF-8"?>\n'
+                           '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\n'
+                           ' <Relationship Target="/3D/3dmodel.model" Id="rel0" '
+                           'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>\n'
+                           '</Relationships>\n' )
+        if sys.version_info >= ( 3, 6 ):
+            self.spool = None
+            self.model = io.TextIOWrapper( self.zip.open( '3D/3dmodel.model', 'w', force_zip64=True ), encoding='utf-8' )
+        else:
+            # Python 3.5 cannot stream into a zip entry, so the model is spooled to a temporary file first
+            ( handle, self.spool ) = tempfile.mkstemp( suffix='.model' )
+            self.model = io.open( handle, 'w', encoding='utf-8' )
+        self.model.write( '<?xml version="1.0" encoding="UTF-8"?>\n'
+                          '<model unit="millimeter" xml:lang="en-US" '
+                          'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n'
+                          ' <resources>\n' )
+        # The triangle count of each mesh by id, the ids of the meshes written by write() by the hash of their arrays,
+        # and the components placing them
+        self.meshes = {}
+        self.keys = {}
+        self.components = []
+
+    def add_mesh( self, verts, tris ):
+        """ Write a mesh to a 3MF file, to be placed by place()
+
+        Keyword arguments:
+        verts -- The N x 3 vertices
+        tris  -- The T x 3 vertex indices of the triangles
+
+        Return the mesh's 3MF object id
+        """
+        def chunks( form, rows, size=100000 ):
+            for i in range( 0, len( rows ), size ):
+                part = rows[ i:i + size ]
+                yield ( form * len( part ) ) % tuple( part.ravel().tolist() )
+
+        id = len( self.meshes ) + 1
+        self.meshes[ id ] = len( tris )
+        self.model.write( '  <object id="%d" type="model">\n   <mesh>\n    <vertices>\n' % id )
+        for text in chunks( '     <vertex x="%.9g" y="%.9g" z="%.9g"/>\n', np.asarray( verts, dtype=np.float32 ) ):
+            self.model.write( text )
+        self.model.write( '    </vertices>\n    <triangles>\n' )
+        for text in chunks( '     <triangle v1="%d" v2="%d" v3="%d"/>\n', np.asarray( tris ) ):
+            self.model.write( text )
+        self.model.write( '    </triangles>\n   </mesh>\n  </object>\n' )
+        return id
+
+    def place( self, id, t ):
+        """ Place a mesh written by add_mesh() in a 3MF file
+
+        Keyword arguments:
+        id -- The mesh's 3MF object id
+        t  -- The Transformation taking the mesh to its place
+
+        Return nothing
+        """
+        # 3MF transforms points as rows, so each matrix is written transposed, without its last column
+        self.components.append( '    <component objectid="%d" transform="%s"/>\n' %
+                                ( id, ' '.join( '%.9g' % x for x in t.array[ :3, : ].T.ravel() ) ) )
+        self.triangles += self.meshes[ id ]
+
+    def write( self, verts, tris, t ):
+        """ Write a mesh at its place
+
+        In a 3MF file, a mesh with the same vertices and triangles as one already written is only placed again,
+        as Duplicate() copies are.
+
+        Keyword arguments:
+        verts -- The N x 3 local vertices
+        tris  -- The T x 3 vertex indices of the triangles
+        t     -- The Transformation taking the vertices to world coordinates
+
+        Return nothing
+        """
+        if self.format == 'stl':
+            corners = t.apply( np.asarray( verts, dtype=np.float64 ) )[ tris ]
+            records = np.zeros( len( tris ), dtype=[ ( 'normal', '<f4', ( 3, ) ), ( 'v', '<f4', ( 3, 3 ) ), ( 'attr', '<u2' ) ] )
+            records[ 'normal' ] = TriangleNormals( corners )
+            records[ 'v' ] = corners
+            self.file.write( records.tobytes() )
+            self.triangles += len( tris )
+            return
+
+        key = hashlib.sha1( np.ascontiguousarray( verts, dtype='<f4' ).tobytes() )
+        key.update( np.ascontiguousarray( tris, dtype='<i4' ).tobytes() )
+        key = key.hexdigest()
+        if key not in self.keys:
+            self.keys[ key ] = self.add_mesh( verts, tris )
+        self.place( self.keys[ key ], t )
+
+    def close( self ):
+        """ Finish and close the file
+
+        Return the number of triangles written
+        """
+        if self.format == 'stl':
+            self.file.seek( 80 )
+            self.file.write( np.array( [ self.triangles ], dtype='<u4' ).tobytes() )
+            self.file.close()
+            return self.triangles
+
+        id = len( self.meshes ) + 1
+        self.model.write( '  <object id="%d" type="model">\n   <components>\n' % id )
+        self.model.writelines( self.components )
+        self.model.write( '   </components>\n  </object>\n </resources>\n'
+                          ' <build>\n  <item objectid="%d"/>\n </build>\n</model>\n' % id )
+        self.model.close()
+        if self.spool is not None:
+            try:
+                self.zip.write( self.spool, '3D/3dmodel.model' )
+            finally:
+                os.remove( self.spool )
+        self.zip.close()
+        return self.triangles
+
+def SaveGLB( fn ):
+    """Export all objects to a binary glTF (GLB) file, for previews in web viewers
+
+    Keyword arguments:
+    fn -- The filename to export to
+
+    Return nothing
+    """
+    WriteGLB( fn )
+
+def ObjectColor( ob ):
+    """Return an object's color, as set by SetColor()
+
+    Keyword arguments:
+    ob -- The object
+
+    Return the (r,g,b) color of the object's active material, or None if it has no material
+    """
+    mat = ob.active_material
+    if mat is None:
+        return None
+    return tuple( mat.diffuse_color )[ :3 ]
+
+def WriteGLB( fn, obs=None, tolerance=1e-5 ):
+    """Write objects to a binary glTF (GLB) file, with identical meshes sharing their buffers
+
+    The distinct meshes are found by MeshInstances(), and each object becomes a node using one of them,
+    with the object's color from SetColor() as its material. See WriteGLBData().
+
+    Keyword arguments:
+    fn        -- The filename to write to
+    obs       -- The list of objects to write. None means all the mesh objects in the scene.
+    tolerance -- The distance, in the scene's units, by which the vertices of copies may differ
+
+    Return the number of bytes written
+    """
+    Flush()
+    if obs is None:
+        obs = [ ob for ob in bpy.context.scene.objects if ob.type == 'MESH' ]
+    ( meshes, placements ) = MeshInstances( obs, tolerance )
+    nodes = [ ( i, t, ObjectColor( ob ), ob.name ) for ( ob, ( i, t ) ) in zip( obs, placements ) ]
+    return WriteGLBData( fn, meshes, nodes )
+
+def WriteGLBData( fn, meshes, nodes ):
+    """Write meshes and their instances to a binary glTF (GLB) file, without using Blender
+
+    All the vertex and index arrays are packed little-endian into the one binary chunk:
+    float32 positions, and uint16 indices for meshes with few enough vertices or uint32 otherwise.
+    Each mesh is stored once, and every node using it shares its buffers.
+    The nodes sit under a root node that turns the Z-up scene to glTF's Y-up.
+
+    Keyword arguments:
+    fn     -- The filename to write to
+    meshes -- The list of meshes, each a MeshData or a ( verts, tris ) pair of N x 3 vertices and T x 3 vertex indices
+    nodes  -- The list of instances, each a ( mesh index, transformation, color, name ), where the transformation
+              is a Transformation, a 4 x 4 matrix or None, the color an (r,g,b) or None, and the name a string or None
+
+    Return the number of bytes written
+    """
+    gltf = { 'asset': { 'version': '2.0', 'generator': 'russbpy' },
+             'scene': 0, 'scenes': [ { 'nodes': [ 0 ] } ],
+             'nodes': [ { 'name': 'russbpy', 'rotation': [ -math.sqrt( 0.5 ), 0.0, 0.0, math.sqrt( 0.5 ) ], 'children': [] } ],
+             'meshes': [], 'materials': [], 'accessors': [], 'bufferViews': [], 'buffers': [] }
+    pieces = []
+    offset = [ 0 ]
+
+    def view( data, target ):
+        data = data.tobytes()
+        gltf[ 'bufferViews' ].append( { 'buffer': 0, 'byteOffset': offset[0], 'byteLength': len( data ), 'target': target } )
+        pieces.append( data + b'\0' * ( -len( data ) % 4 ) )
+        offset[0] += len( pieces[ -1 ] )
+        return len( gltf[ 'bufferViews' ] ) - 1
+
+    # The buffers of each mesh: ( position accessor, index accessor ), or None if it is empty
+    arrays = []
+    for mesh in meshes:
+        if isinstance( mesh, MeshData ):
+            mesh = ( mesh.verts, mesh.triangles() )
+        verts = np.ascontiguousarray( mesh[0], dtype='<f4' ).reshape( -1, 3 )
+        tris = np.asarray( mesh[1] ).reshape( -1 )
+        if len( verts ) == 0 or len( tris ) == 0:
+            arrays.append( None )
+            continue
+        # glTF reserves the largest index value of each type
+        ( index_type, component ) = ( '<u2', 5123 ) if len( verts ) <= 65535 else ( '<u4', 5125 )
+        gltf[ 'accessors' ].append( { 'bufferView': view( verts, 34962 ), 'componentType': 5126, 'count': len( verts ),
+                                      'type': 'VEC3', 'min': verts.min( axis=0 ).tolist(), 'max': verts.max( axis=0 ).tolist() } )
+        gltf[ 'accessors' ].append( { 'bufferView': view( tris.astype( index_type ), 34963 ), 'componentType': component,
+                                      'count': len( tris ), 'type': 'SCALAR' } )
+        arrays.append( ( len( gltf[ 'accessors' ] ) - 2, len( gltf[ 'accessors' ] ) - 1 ) )
+
+    # A glTF mesh for each mesh and material used together, sharing the mesh's accessors
+    materials = {}
+    uses = {}
+    for ( i, t, color, name ) in nodes:
+        node = { 'name': name } if name is not None else {}
+        if arrays[ i ] is not None:
+            material = None
+            if color is not None:
+                color = tuple( float( c ) for c in color[ :3 ] )
+                if color not in materials:
+                    materials[ color ] = len( gltf[ 'materials' ] )
+                    gltf[ 'materials' ].append( { 'pbrMetallicRoughness': { 'baseColorFactor': list( color ) + [ 1.0 ],
+                                                                            'metallicFactor': 0.0, 'roughnessFactor': 0.8 } } )
+                material = materials[ color ]
+            if ( i, material ) not in uses:
+                primitive = { 'attributes': { 'POSITION': arrays[ i ][0] }, 'indices': arrays[ i ][1], 'mode': 4 }
+                if material is not None:
+                    primitive[ 'material' ] = material
+                uses[ ( i, material ) ] = len( gltf[ 'meshes' ] )
+                gltf[ 'meshes' ].append( { 'primitives': [ primitive ] } )
+            node[ 'mesh' ] = uses[ ( i, material ) ]
+        if t is not None:
+            a = t.array if isinstance( t, Transformation ) else Transformation( t ).array
+            if not np.array_equal( a, np.identity( 4 ) ):
+                # glTF matrices are stored column by column
+                node[ 'matrix' ] = a.T.ravel().tolist()
+        gltf[ 'nodes' ][0][ 'children' ].append( len( gltf[ 'nodes' ] ) )
+        gltf[ 'nodes' ].append( node )
+
+    gltf[ 'buffers' ].append( { 'byteLength': offset[0] } )
+    for key in ( 'meshes', 'materials', 'accessors', 'bufferViews' ):
+        if not gltf[ key ]:
+            del gltf[ key ]
+    if offset[0] == 0:
+        del gltf[ 'buffers' ]
+    text = json.dumps( gltf, separators=( ',', ':' ) ).encode( 'utf-8' )
+    text += b' ' * ( -len( text ) % 4 )
+
+    total = 12 + 8 + len( text ) + ( 8 + offset[0] if offset[0] > 0 else 0 )
+    with open( fn, 'wb' ) as f:
+        f.write( np.array( [ 0x46546C67, 2, total, len( text ), 0x4E4F534A ], dtype='<u4' ).tobytes() )
+        f.write( text )
+        if offset[0] > 0:
+            f.write( np.array( [ offset[0], 0x004E4942 ], dtype='<u4' ).tobytes() )
+            for piece in pieces:
+                f.write( piece )
+    return total
+
+#################################################
+# Import
+#################################################
+
+def ImportMesh( fn, name=None, weld=True, orient=False, location=(0,0,0) ):
+    """Import an STL, OBJ, PLY or compressed mesh (RBM) file as a mesh object
+
+    Keyword arguments:
+    fn       -- The filename to import
+    name     -- The name for the new object. None means the file's base name.
+    weld     -- Merge the STL vertices that are at the same position, so the triangles are connected?
+    orient   -- Make the faces consistent and facing outward with OrientOutward()?
+                Otherwise the faces are kept as the file winds them.
+    location -- The location of the object's origin
+
+    Return the new object
+    """
+    md = ReadMesh( fn, weld )
+    if orient:
+        md.oriented = False
+    if name is None:
+        name = os.path.splitext( os.path.basename( fn ) )[0]
+    ob = Mesh( name, md )
+    ob.location = location
+    return ob
+
+def ReadMesh( fn, weld=True ):
+    """Read an STL, OBJ, PLY or compressed mesh (RBM) file, chosen by the file's extension
+
+    Keyword arguments:
+    fn   -- The filename to read
+    weld -- Merge the STL vertices that are at the same position?
+
+    Return the MeshData object
+    """
+    ext = os.path.splitext( fn )[1].lower()
+    if ext == '.stl':
+        return ReadSTL( fn, weld )
+    elif ext == '.obj':
+        return ReadOBJ( fn )
+    elif ext == '.ply':
+        return ReadPLY( fn )
+    elif ext == '.rbm':
+        return ReadRBM( fn )
+    raise ValueError( "Cannot import '%s': the file type is not STL, OBJ, PLY or RBM" % fn )
+
+def WeldPoints( points ):
+    """Merge points that are at exactly the same position
+
+    Keyword arguments:
+    points -- The N x 3 array of points
+
+    Return ( unique, index ), the unique points, and the index into them of each of the points
+    """
+    # Compare the points by their bits, with -0.0 made 0.0 first
+    points = np.ascontiguousarray( points ) + points.dtype.type( 0 )
+    keys = points.view( 'i%d' % points.dtype.itemsize )
+    order = np.lexsort( ( keys[ :, 2 ], keys[ :, 1 ], keys[ :, 0 ] ) )
+    keys = keys[ order ]
+    first = np.empty( len( keys ), dtype=bool )
+    first[ :1 ] = True
+    np.any( keys[ 1: ] != keys[ :-1 ], axis=1, out=first[ 1: ] )
+    index = np.empty( len( keys ), dtype=np.int64 )
+    index[ order ] = np.cumsum( first ) - 1
+    return ( points[ order[ first ] ], index )
+
+def LineChunks( fn, size=1 << 24 ):
+    """Read a text file in blocks of whole lines
+
+    Keyword arguments:
+    fn   -- The filename to read
+    size -- The approximate number of bytes in each block
+
+    Return a generator of the blocks, as bytes
+    """
+    rest = b''
+    with open( fn, 'rb' ) as f:
+        while True:
+            data = f.read( size )
+            if not data:
+                if rest:
+                    yield rest
+                return
+            data = rest + data
+            cut = data.rfind( b'\n' ) + 1
+            if cut == 0:
+                rest = data
+                continue
+            rest = data[ cut: ]
+            yield data[ :cut ]
+
+def ReadSTL( fn, weld=True ):
+    """Read a binary or ASCII STL file
+
+    A binary file is memory-mapped and its triangles are read in place with NumPy.
+    An ASCII file is parsed a block of lines at a time.
+
+    Keyword arguments:
+    fn   -- The filename to read
+    weld -- Merge the vertices that are at the same position, so the triangles are connected?
+            Otherwise each triangle has its own three vertices.
+
+    Return the MeshData object
+    """
+    size = os.path.getsize( fn )
+    count = 0
+    if size >= 84:
+        with open( fn, 'rb' ) as f:
+            f.seek( 80 )
+            count = int( np.frombuffer( f.read( 4 ), dtype='<u4' )[0] )
+
+    if size >= 84 and size == 84 + 50 * count:
+        record = np.dtype( [ ( 'normal', '<f4', ( 3, ) ), ( 'v', '<f4', ( 3, 3 ) ), ( 'attr', '<u2' ) ] )
+        with open( fn, 'rb' ) as f:
+            mm = mmap.mmap( f.fileno(), 0, access=mmap.ACCESS_READ )
+            try:
+                points = np.array( np.frombuffer( mm, dtype=record, count=count, offset=84 )[ 'v' ] ).reshape( -1, 3 )
+            finally:
+                mm.close()
+    else:
+        parts = []
+        for block in LineChunks( fn ):
+            tokens = np.array( block.lower().split() )
+            at = np.flatnonzero( tokens == b'vertex' )
+            if len( at ) > 0:
+                parts.append( tokens[ at[ :, None ] + np.arange( 1, 4 ) ].astype( np.float32 ) )
+        points = np.concatenate( parts ) if parts else np.zeros( ( 0, 3 ), dtype=np.float32 )
+
+    if weld:
+        ( verts, loops ) = WeldPoints( points )
+    else:
+        ( verts, loops ) = ( points, np.arange( len( points ) ) )
+    return MeshData( verts, loops.reshape( -1, 3 ), oriented=True )
+
+def ReadOBJ( fn ):
+    """Read the vertices and faces of an OBJ file
+
+    The file is parsed a block of lines at a time. Texture coordinates, normals, groups and materials are ignored.
+
+    Keyword arguments:
+    fn -- The filename to read
+
+    Return the MeshData object
+    """
+    verts = []
+    loops = []
+    totals = []
+    nv = 0
+    for block in LineChunks( fn ):
+        v_lines = []
+        f_lines = []
+        f_bases = []
+        for l in block.split( b'\n' ):
+            if l.startswith( b'v ' ):
+                v_lines.append( l )
+            elif l.startswith( b'f ' ):
+                f_lines.append( l )
+                f_bases.append( nv + len( v_lines ) )
+
+        if v_lines:
+            tokens = b' '.join( v_lines ).split()
+            if len( tokens ) == 4 * len( v_lines ):
+                verts.append( np.array( tokens ).reshape( -1, 4 )[ :, 1: ].astype( np.float32 ) )
+            else:
+                # Some vertices have a w or a color, too
+                verts.append( np.array( [ l.split()[ 1:4 ] for l in v_lines ] ).astype( np.float32 ) )
+            nv += len( v_lines )
+
+        if f_lines:
+            faces = [ l.split()[ 1: ] for l in f_lines ]
+            sizes = np.array( [ len( f ) for f in faces ] )
+            refs = np.array( [ r for f in faces for r in f ] )
+            index = np.char.partition( refs, b'/' )[ :, 0 ].astype( np.int64 )
+            # Indices count from 1, or back from the last vertex read when negative
+            base = np.repeat( np.array( f_bases ), sizes )
+            loops.append( np.where( index < 0, base + index, index - 1 ) )
+            totals.append( sizes )
+
+    verts = np.concatenate( verts ) if verts else np.zeros( ( 0, 3 ), dtype=np.float32 )
+    if not loops:
+        return MeshData( verts, oriented=True )
+    totals = np.concatenate( totals )
+    return MeshData( verts, np.concatenate( loops ), np.cumsum( totals ) - totals, oriented=True )
+
+def ReadPLY( fn ):
+    """Read the vertices and faces of an ASCII or binary PLY file
+
+    Binary data is memory-mapped and read with NumPy; ASCII data is parsed with NumPy.
+    Elements other than vertices and faces are skipped.
+
+    Keyword arguments:
+    fn -- The filename to read
+
+    Return the MeshData object
+    """
+    types = { 'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+              'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+              'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+              'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8' }
+
+    def list_starts( mm, offset, count, count_type, index_type, window=1 << 20 ):
+        # Find where each record of a list element starts, when the lists' lengths vary.
+        # Each record starts where the one before it ends, so a window of the data is read as if a record
+        # started at every byte, which gives where the next one would start. Jumping along those links in
+        # doubling steps finds the records from the window's first one, and the last one gives the next window.
+        ( csize, isize ) = ( np.dtype( count_type ).itemsize, np.dtype( index_type ).itemsize )
+        ( starts, totals ) = ( [], [] )
+        found = 0
+        while found < count:
+            w = min( window, len( mm ) - offset - csize + 1 )
+            if w <= 0:
+                raise ValueError( "Cannot read '%s': the PLY data ends early" % fn )
+            n = np.ndarray( ( w, ), dtype=count_type, buffer=mm, offset=offset, strides=( 1, ) ).astype( np.int64 )
+            following = np.arange( w ) + csize + n * isize
+            jump = np.append( np.where( ( n >= 0 ) & ( following < w ), following, w ), w )
+            reached = np.zeros( 1, dtype=np.int64 )
+            ahead = reached
+            while found + len( reached ) < count:
+                ahead = jump[ ahead ]
+                ahead = ahead[ ahead < w ]
+                if len( ahead ) == 0:
+                    break
+                reached = np.concatenate( ( reached, ahead ) )
+                ahead = reached
+                jump = jump[ jump ]
+            reached = np.sort( reached )[ :count - found ]
+            starts.append( offset + reached )
+            totals.append( n[ reached ] )
+            found += len( reached )
+            offset += int( following[ reached[ -1 ] ] )
+        if count == 0:
+            return ( np.zeros( 0, dtype=np.int64 ), np.zeros( 0, dtype=np.int64 ) )
+        return ( np.concatenate( starts ), np.concatenate( totals ) )
+
+    # Read the header: the format, then each element with its count and properties
+    elements = []
+    fmt = None
+    with open( fn, 'rb' ) as f:
+        if f.readline().strip() != b'ply':
+            raise ValueError( "Cannot read '%s': it is not a PLY file" % fn )
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError( "Cannot read '%s': the PLY header has no end" % fn )
+            words = line.decode( 'ascii', 'replace' ).split()
+            if not words or words[0] in ( 'comment', 'obj_info' ):
+                continue
+            if words[0] == 'format':
+                fmt = words[1]
+            elif words[0] == 'element':
+                elements.append( ( words[1], int( words[2] ), [] ) )
+            elif words[0] == 'property':
+                if words[1] == 'list':
+                    elements[-1][2].append( ( words[4], types[ words[2] ], types[ words[3] ] ) )
+                else:
+                    elements[-1][2].append( ( words[2], types[ words[1] ], None ) )
+            elif words[0] == 'end_header':
+                break
+        offset = f.tell()
+    if fmt is None:
+        raise ValueError( "Cannot read '%s': the PLY header has no format" % fn )
+
+    verts = np.zeros( ( 0, 3 ), dtype=np.float32 )
+    loops = np.zeros( 0, dtype=np.int64 )
+    totals = np.zeros( 0, dtype=np.int64 )
+
+    if fmt == 'ascii':
+        with open( fn, 'rb' ) as f:
+            f.seek( offset )
+            lines = f.read().split( b'\n' )
+        start = 0
+        for ( name, count, props ) in elements:
+            block = lines[ start:start + count ]
+            start += count
+            if name == 'vertex':
+                names = [ p[0] for p in props ]
+                values = np.array( b' '.join( block ).split() ).astype( np.float64 ).reshape( count, len( props ) )
+                verts = values[ :, [ names.index( 'x' ), names.index( 'y' ), names.index( 'z' ) ] ]
+            elif name == 'face':
+                # The first value on each line is the number of vertices of the face, and any values after them are
+                # other properties. The words are found on the bytes, so each one's line is known without a Python loop.
+                data = b'\n'.join( block )
+                values = np.array( data.split() ).astype( np.float64 ).astype( np.int64 )
+                space = np.zeros( 256, dtype=bool )
+                space[ [ 9, 10, 11, 12, 13, 32 ] ] = True
+                chars = np.frombuffer( data, dtype=np.uint8 )
+                starts = np.nonzero( ~space[ chars ] & np.concatenate( ( [ True ], space[ chars[ :-1 ] ] ) ) )[0]
+                line = np.cumsum( chars == 10 )[ starts ]
+                first = np.searchsorted( line, line )
+                rank = np.arange( len( values ) ) - first
+                totals = values[ rank == 0 ]
+                loops = values[ ( rank > 0 ) & ( rank <= values[ first ] ) ]
+    else:
+        order = '<' if fmt == 'binary_little_endian' else '>'
+        with open( fn, 'rb' ) as f:
+            mm = mmap.mmap( f.fileno(), 0, access=mmap.ACCESS_READ )
+            try:
+                for ( name, count, props ) in elements:
+                    lists = [ p for p in props if p[2] is not None ]
+                    if not lists:
+                        dtype = np.dtype( [ ( p[0], order + p[1] ) for p in props ] )
+                        data = np.frombuffer( mm, dtype=dtype, count=count, offset=offset )
+                        offset += dtype.itemsize * count
+                        if name == 'vertex':
+                            verts = np.column_stack( ( data[ 'x' ], data[ 'y' ], data[ 'z' ] ) )
+                        data = None
+                        continue
+                    if name != 'face' or len( props ) != 1:
+                        raise ValueError( "Cannot read '%s': the PLY element '%s' is not supported" % ( fn, name ) )
+
+                    ( count_type, index_type ) = ( order + props[0][1], order + props[0][2] )
+                    k = int( np.frombuffer( mm, dtype=count_type, count=1, offset=offset )[0] ) if count > 0 else 0
+                    dtype = np.dtype( [ ( 'n', count_type ), ( 'i', index_type, ( k, ) ) ] )
+                    uniform = False
+                    if offset + dtype.itemsize * count <= len( mm ):
+                        data = np.frombuffer( mm, dtype=dtype, count=count, offset=offset )
+                        uniform = np.all( data[ 'n' ] == k )
+                        if uniform:
+                            # Every face has the same number of vertices
+                            loops = np.array( data[ 'i' ], dtype=np.int64 ).ravel()
+                            totals = np.full( count, k, dtype=np.int64 )
+                            offset += dtype.itemsize * count
+                        data = None
+                    if not uniform:
+                        ( starts, totals ) = list_starts( mm, offset, count, count_type, index_type )
+                        ( csize, isize ) = ( np.dtype( count_type ).itemsize, np.dtype( index_type ).itemsize )
+                        end = int( starts[ -1 ] + csize + totals[ -1 ] * isize ) if count > 0 else offset
+                        at = np.repeat( starts + csize - offset, totals ) + \
+                             ( np.arange( totals.sum() ) - np.repeat( np.cumsum( totals ) - totals, totals ) ) * isize
+                        region = np.ndarray( ( max( end - offset - isize + 1, 0 ), ), dtype=index_type, buffer=mm, offset=offset, strides=( 1, ) )
+                        loops = np.array( region[ at ], dtype=np.int64 )
+                        region = None
+                        offset = end
+            finally:
+                mm.close()
+
+    if len( totals ) == 0:
+        return MeshData( verts, oriented=True )
+    return MeshData( verts, loops, np.cumsum( totals ) - totals, oriented=True )
+
+#################################################
+# Snapshots
+#################################################
+
+# A snapshot file holds the objects of a model as raw arrays, so it can be memory-mapped and read without Blender.
+# It starts with the 8 byte magic b'RBSNAP01' and the little-endian uint64 length of a JSON header,
+# giving the offset, dtype and shape of each array. Each array starts on a 64 byte boundary:
+#     verts       -- float32 N x 3 vertices of all the objects, in their local coordinates
+#     tris        -- int32 T x 3 triangles of all the objects, indexing each object's own vertices
+#     vert_starts -- int64 K + 1 index of each object's first vertex, then N
+#     tri_starts  -- int64 K + 1 index of each object's first triangle, then T
+#     matrices    -- float64 K x 4 x 4 world matrices
+#     colors      -- float32 K x 3 colors, NaN for objects without a color
+#     names       -- uint8 UTF-8 names of all the objects, one after another
+#     name_starts -- int64 K + 1 offset of each object's name in names, then the length of names
+
+def ObjectSnapshot( ob ):
+    """Return the snapshot of an object, as written by WriteSnapshotData()
+
+    Keyword arguments:
+    ob -- The mesh object
+
+    Return ( name, verts, tris, matrix, color ), with the mesh as from ObjectTriangles(),
+    the 4 x 4 world matrix as a NumPy array, and the color as from ObjectColor()
+    """
+    ( verts, tris ) = ObjectTriangles( ob )
+    return ( ob.name, verts, tris, Transformation( ob.matrix_world ).array, ObjectColor( ob ) )
+
+def WriteSnapshot( fn, obs=None ):
+    """Write objects to a snapshot file, which can be memory-mapped and loaded without Blender
+
+    Keyword arguments:
+    fn  -- The filename to write to
+    obs -- The list of objects to write. None means all the mesh objects in the scene.
+
+    Return the number of objects written
+    """
+    Flush()
+    if obs is None:
+        obs = [ ob for ob in bpy.context.scene.objects if ob.type == 'MESH' ]
+    return WriteSnapshotData( fn, [ ObjectSnapshot( ob ) for ob in obs ] )
+
+def WriteSnapshotData( fn, objects ):
+    """Write objects to a snapshot file, without using Blender
+
+    The objects' arrays are written one after another, so they are never gathered in memory.
+
+    Keyword arguments:
+    fn      -- The filename to write to
+    objects -- The list of ( name, verts, tris, matrix, color ) objects, as from ObjectSnapshot()
+
+    Return the number of objects written
+    """
+    names = [ o[0].encode( 'utf-8' ) for o in objects ]
+    counts = np.array( [ ( len( o[1] ), len( o[2] ), len( n ) ) for ( o, n ) in zip( objects, names ) ], dtype=np.int64 ).reshape( -1, 3 )
+    starts = np.zeros( ( len( objects ) + 1, 3 ), dtype=np.int64 )
+    np.cumsum( counts, axis=0, out=starts[ 1: ] )
+    colors = np.array( [ tuple( o[4] )[ :3 ] if o[4] is not None else ( np.nan, ) * 3 for o in objects ], dtype='<f4' ).reshape( -1, 3 )
+    matrices = np.array( [ np.asarray( o[3], dtype=float ) for o in objects ], dtype='<f8' ).reshape( -1, 4, 4 )
+
+    layout = [ ( 'verts', '<f4', ( int( starts[ -1, 0 ] ), 3 ) ), ( 'tris', '<i4', ( int( starts[ -1, 1 ] ), 3 ) ),
+               ( 'vert_starts', '<i8', ( len( starts ), ) ), ( 'tri_starts', '<i8', ( len( starts ), ) ),
+               ( 'matrices', '<f8', matrices.shape ), ( 'colors', '<f4', colors.shape ),
+               ( 'names', 'u1', ( int( starts[ -1, 2 ] ), ) ), ( 'name_starts', '<i8', ( len( starts ), ) ) ]
+
+    # The header's size depends on the offsets it holds, so it is given room to spare
+    arrays = {}
+    header = b''
+    while True:
+        offset = ( 16 + len( header ) + 63 ) // 64 * 64 + 64
+        for ( key, dtype, shape ) in layout:
+            arrays[ key ] = { 'offset': offset, 'dtype': dtype, 'shape': list( shape ) }
+            offset = ( offset + np.dtype( dtype ).itemsize * int( np.prod( shape ) ) + 63 ) // 64 * 64
+        text = json.dumps( { 'version': 1, 'count': len( objects ), 'arrays': arrays }, sort_keys=True ).encode( 'utf-8' )
+        if 16 + len( text ) <= arrays[ 'verts' ][ 'offset' ]:
+            break
+        header = text
+
+    with open( fn, 'wb' ) as f:
+        f.write( b'RBSNAP01' + np.array( [ len( text ) ], dtype='<u8' ).tobytes() + text )
+
+        def seek( key ):
+            f.write( b'\0' * ( arrays[ key ][ 'offset' ] - f.tell() ) )
+
+        seek( 'verts' )
+        for o in objects:
+            f.write( np.ascontiguousarray( o[1], dtype='<f4' ).tobytes() )
+        seek( 'tris' )
+        for o in objects:
+            f.write( np.ascontiguousarray( o[2], dtype='<i4' ).tobytes() )
+        for ( key, data ) in ( ( 'vert_starts', starts[ :, 0 ] ), ( 'tri_starts', starts[ :, 1 ] ), ( 'matrices', matrices ),
+                               ( 'colors', colors ), ( 'names', np.frombuffer( b''.join( names ), dtype='u1' ) ),
+                               ( 'name_starts', starts[ :, 2 ] ) ):
+            seek( key )
+            f.write( np.ascontiguousarray( data, dtype=arrays[ key ][ 'dtype' ] ).tobytes() )
+        f.write( b'\0' * ( offset - f.tell() ) )
+    return len( objects )
+
+class SnapshotData:
+    def __init__( self, fn ):
+        """ Open a snapshot file, as written by WriteSnapshot()
+
+        The arrays are memory-mapped, not read, so opening even a very large snapshot is quick,
+        and only the parts of it that are used are paged in:
+            verts, tris, vert_starts, tri_starts, matrices, colors, names, name_starts -- The arrays, as described above
+
+        Keyword arguments:
+        fn -- The filename to open
+        """
+        with open( fn, 'rb' ) as f:
+            if f.read( 8 ) != b'RBSNAP01':
+                raise Exception( "Cannot open '%s': it is not a russbpy snapshot" % fn )
+            size = int( np.frombuffer( f.read( 8 ), dtype='<u8' )[0] )
+            header = json.loads( f.read( size ).decode( 'utf-8' ) )
+        self.count = header[ 'count' ]
+        for ( key, a ) in header[ 'arrays' ].items():
+            if np.prod( a[ 'shape' ] ) == 0:
+                setattr( self, key, np.zeros( a[ 'shape' ], dtype=a[ 'dtype' ] ) )
+            else:
+                setattr( self, key, np.memmap( fn, dtype=a[ 'dtype' ], mode='r', offset=a[ 'offset' ], shape=tuple( a[ 'shape' ] ) ) )
+
+    def __len__( self ):
+        """ Return the number of objects
+        """
+        return self.count
+
+    def name( self, i ):
+        """ Return the name of object i
+        """
+        return bytes( self.names[ self.name_starts[ i ]:self.name_starts[ i + 1 ] ] ).decode( 'utf-8' )
+
+    def index( self, name ):
+        """ Return the index of the object with a name, or raise ValueError if there is none
+        """
+        if not hasattr( self, 'indices' ):
+            self.indices = dict( ( self.name( i ), i ) for i in range( self.count - 1, -1, -1 ) )
+        if name not in self.indices:
+            raise ValueError( "There is no object '%s' in the snapshot" % name )
+        return self.indices[ name ]
+
+    def mesh( self, i ):
+        """ Return ( verts, tris ), the local vertices and the triangles of object i, as read-only views into the file
+        """
+        return ( self.verts[ self.vert_starts[ i ]:self.vert_starts[ i + 1 ] ],
+                 self.tris[ self.tri_starts[ i ]:self.tri_starts[ i + 1 ] ] )
+
+    def world_mesh( self, i ):
+        """ Return ( verts, tris ), the world vertices and the triangles of object i
+        """
+        ( verts, tris ) = self.mesh( i )
+        return ( self.transformation( i ).apply( verts.astype( np.float64 ) ), tris )
+
+    def transformation( self, i ):
+        """ Return the world Transformation of object i
+        """
+        return Transformation( self.matrices[ i ] )
+
+    def color( self, i ):
+        """ Return the (r,g,b) color of object i, or None if it has none
+        """
+        c = self.colors[ i ]
+        return None if np.isnan( c[0] ) else tuple( float( x ) for x in c )
+
+def LoadSnapshot( fn, names=None ):
+    """Load the objects of a snapshot file back into the scene
+
+    Each object is made from its triangles by Mesh(), and given its world matrix and color.
+
+    Keyword arguments:
+    fn    -- The filename of the snapshot, as written by WriteSnapshot()
+    names -- The list of the names of the objects to load. None means all of them.
+
+    Return the list of new objects
+    """
+    snap = SnapshotData( fn )
+    if names is None:
+        indices = range( 0, len( snap ) )
+    else:
+        indices = [ snap.index( name ) for name in names ]
+
+    obs = []
+    for i in indices:
+        ( verts, tris ) = snap.mesh( i )
+        ob = Mesh( snap.name( i ), MeshData( verts, tris, oriented=True ) )
+        ob.matrix_world = snap.transformation( i ).matrix
+        if snap.color( i ) is not None:
+            SetColor( ob, snap.color( i ) )
+        obs.append( ob )
+    return obs
+
+#################################################
+# Compressed Meshes
+#################################################
+
+# A compressed mesh file holds one mesh, encoded by EncodeMeshData(). It starts with the 4 byte magic b'RBMZ'
+# and the little-endian uint32 length of a JSON header, giving the quantization and the sizes of the
+# zlib-compressed streams that follow: the vertex deltas, then the triangles' first vertex deltas,
+# then the triangles' other vertices relative to their first.
+
+def MortonCodes( q ):
+    """Return the Morton (Z-order) codes of grid points, which sort nearby points near each other
+
+    Keyword arguments:
+    q -- The N x 3 array of non-negative integer grid coordinates. Only their top 21 bits are used.
+
+    Return the N uint64 codes
+    """
+    q = np.asarray( q, dtype=np.uint64 )
+    top = int( q.max() ).bit_length() if len( q ) > 0 else 0
+    if top > 21:
+        q = q >> np.uint64( top - 21 )
+    code = np.zeros( len( q ), dtype=np.uint64 )
+    for axis in range( 0, 3 ):
+        x = q[ :, axis ] & np.uint64( 0x1fffff )
+        for ( shift, mask ) in ( ( 32, 0x1f00000000ffff ), ( 16, 0x1f0000ff0000ff ), ( 8, 0x100f00f00f00f00f ),
+                                 ( 4, 0x10c30c30c30c30c3 ), ( 2, 0x1249249249249249 ) ):
+            x = ( x | ( x << np.uint64( shift ) ) ) & np.uint64( mask )
+        code |= x << np.uint64( axis )
+    return code
+
+def EncodeMeshData( verts, tris, step=None ):
+    """Encode a mesh compactly, for caches and archives
+
+    The vertices are quantized to a grid of the given step, and put in Morton order so neighbors are close
+    in the file. The triangles are renumbered to match, rotated to start at their lowest vertex, which keeps
+    their winding, and sorted. Then each stream is delta-coded, packed in the fewest bytes that hold it with
+    its bytes split into planes, and compressed with zlib.
+
+    Each coordinate decodes to within step / 2 of the original, plus float32 rounding.
+    Vertices that quantize to the same grid point are kept, so the triangles are unchanged.
+
+    Keyword arguments:
+    verts -- The N x 3 vertices
+    tris  -- The T x 3 vertex indices of the triangles
+    step  -- The grid size. None means the resolution of Shapeways_StrongAndFlexiblePlasticUnpolished.
+
+    Return the encoded bytes
+    """
+    if step is None:
+        step = Shapeways_StrongAndFlexiblePlasticUnpolished().resolution_mm
+    verts = np.asarray( verts, dtype=np.float64 ).reshape( -1, 3 )
+    tris = np.asarray( tris, dtype=np.int64 ).reshape( -1, 3 )
+    origin = verts.min( axis=0 ) if len( verts ) > 0 else np.zeros( 3 )
+    q = np.round( ( verts - origin ) / step ).astype( np.int64 )
+
+    order = np.argsort( MortonCodes( q ), kind='mergesort' )
+    rank = np.empty( len( order ), dtype=np.int64 )
+    rank[ order ] = np.arange( len( order ) )
+    q = q[ order ]
+
+    t = rank[ tris ]
+    first = np.argmin( t, axis=1 )
+    t = t[ np.arange( len( t ) )[ :, None ], ( first[ :, None ] + np.arange( 3 ) ) % 3 ]
+    t = t[ np.lexsort( ( t[ :, 2 ], t[ :, 1 ], t[ :, 0 ] ) ) ]
+
+    def pack( values ):
+        # Zigzag the signed values, so small magnitudes have small codes
+        z = ( values.astype( np.int64 ) << 1 ) ^ ( values.astype( np.int64 ) >> 63 )
+        top = int( z.max() ) if z.size > 0 else 0
+        width = 1 if top < 1 << 8 else 2 if top < 1 << 16 else 4 if top < 1 << 32 else 8
+        planes = z.astype( '<u%d' % width ).view( np.uint8 ).reshape( -1, width ).T
+        return ( width, zlib.compress( np.ascontiguousarray( planes ).tobytes(), 6 ) )
+
+    streams = [ pack( np.diff( np.vstack( ( np.zeros( ( 1, 3 ), dtype=np.int64 ), q ) ), axis=0 ).ravel() ),
+                pack( np.diff( np.concatenate( ( [ 0 ], t[ :, 0 ] ) ) ) ),
+                pack( ( t[ :, 1: ] - t[ :, :1 ] ).ravel() ) ]
+    header = json.dumps( { 'version': 1, 'step': step, 'origin': origin.tolist(), 'vertices': len( q ), 'triangles': len( t ),
+                           'streams': [ [ width, len( data ) ] for ( width, data ) in streams ] }, sort_keys=True ).encode( 'utf-8' )
+    return b''.join( [ b'RBMZ', np.array( [ len( header ) ], dtype='<u4' ).tobytes(), header ] + [ data for ( width, data ) in streams ] )
+
+def DecodeMeshData( data ):
+    """Decode a mesh encoded by EncodeMeshData()
+
+    Keyword arguments:
+    data -- The encoded bytes
+
+    Return ( verts, tris ), the N x 3 float32 vertices and the T x 3 int32 vertex indices of the triangles
+    """
+    if data[ :4 ] != b'RBMZ':
+        raise Exception( "Cannot decode the mesh: it was not encoded by EncodeMeshData()" )
+    size = int( np.frombuffer( data[ 4:8 ], dtype='<u4' )[0] )
+    header = json.loads( data[ 8:8 + size ].decode( 'utf-8' ) )
+    offset = 8 + size
+
+    streams = []
+    for ( width, length ) in header[ 'streams' ]:
+        planes = np.frombuffer( zlib.decompress( data[ offset:offset + length ] ), dtype=np.uint8 )
+        z = np.ascontiguousarray( planes.reshape( width, -1 ).T ).view( '<u%d' % width ).ravel().astype( np.int64 )
+        streams.append( ( z >> 1 ) ^ -( z & 1 ) )
+        offset += length
+
+    q = np.cumsum( streams[0].reshape( -1, 3 ), axis=0 )
+    verts = ( np.array( header[ 'origin' ] ) + q * header[ 'step' ] ).astype( np.float32 )
+    t0 = np.cumsum( streams[1] )
+    tris = np.column_stack( ( t0, t0[ :, None ] + streams[2].reshape( -1, 2 ) ) ).astype( np.int32 )
+    return ( verts.reshape( -1, 3 ), tris.reshape( -1, 3 ) )
+
+def WriteRBM( fn, obs=None, step=None ):
+    """Write objects to a compressed mesh file, as one mesh in world coordinates
+
+    Keyword arguments:
+    fn   -- The filename to write to
+    obs  -- The list of objects to write. None means all the mesh objects in the scene.
+    step -- The grid size the vertices are quantized to. See EncodeMeshData().
+
+    Return the number of bytes written
+    """
+    Flush()
+    if obs is None:
+        obs = [ ob for ob in bpy.context.scene.objects if ob.type == 'MESH' ]
+    meshes = [ ObjectWorldTriangles( ob ) for ob in obs ]
+    bases = np.cumsum( [ 0 ] + [ len( v ) for ( v, t ) in meshes ] )
+    verts = np.concatenate( [ v for ( v, t ) in meshes ] ) if meshes else np.zeros( ( 0, 3 ) )
+    tris = np.concatenate( [ t + b for ( ( v, t ), b ) in zip( meshes, bases ) ] ) if meshes else np.zeros( ( 0, 3 ), dtype=np.int32 )
+    data = EncodeMeshData( verts, tris, step )
+    with open( fn, 'wb' ) as f:
+        f.write( data )
+    return len( data )
+
+def ReadRBM( fn ):
+    """Read a compressed mesh file, as written by WriteRBM()
+
+    Keyword arguments:
+    fn -- The filename to read
+
+    Return the MeshData object
+    """
+    with open( fn, 'rb' ) as f:
+        ( verts, tris ) = DecodeMeshData( f.read() )
+    return MeshData( verts, tris, oriented=True )
+
+#################################################
+# Mesh Booleans
+#################################################
+
+def ReducePairs( values, ufunc ):
+    """Combine neighbouring rows of an array pairwise, for building a tree one level up
+
+    Keyword arguments:
+    values -- The array, with one row per node
+    ufunc  -- The NumPy function combining two rows, eg. np.minimum or np.add
+
+    Return the array of the combined rows 0 and 1, 2 and 3, ..., with an odd last row passed up as it is
+    """
+    even = len( values ) - len( values ) % 2
+    out = ufunc( values[ 0:even:2 ], values[ 1:even:2 ] )
+    if even < len( values ):
+        out = np.concatenate( ( out, values[ even: ] ) )
+    return out
+
+class TriangleTree:
+    def __init__( self, corners ):
+        """ Build a bounding volume hierarchy over triangles
+
+        The triangles are sorted along a Morton curve through their centers, then the tree is built
+        bottom-up, a level at a time: level 0 holds a node per triangle, and each node of a level above
+        bounds two neighbouring nodes of the level below, up to a single root.
+
+        Keyword arguments:
+        corners -- The T x 3 x 3 float64 array of the triangles' corner points
+        """
+        self.order = np.zeros( 0, dtype=np.int64 )
+        if len( corners ) > 0:
+            centers = corners.mean( axis=1 )
+            low = centers.min( axis=0 )
+            span = max( float( np.ptp( centers, axis=0 ).max() ), 1e-300 )
+            self.order = np.argsort( MortonCodes( ( centers - low ) * ( ( ( 1 << 21 ) - 1 ) / span ) ), kind='mergesort' )
+        self.corners = corners[ self.order ]
+        self.lows = [ self.corners.min( axis=1 ) if len( corners ) > 0 else np.zeros( ( 0, 3 ) ) ]
+        self.highs = [ self.corners.max( axis=1 ) if len( corners ) > 0 else np.zeros( ( 0, 3 ) ) ]
+        while len( self.lows[ -1 ] ) > 1:
+            self.lows.append( ReducePairs( self.lows[ -1 ], np.minimum ) )
+            self.highs.append( ReducePairs( self.highs[ -1 ], np.maximum ) )
+
+    def children( self, nodes, level ):
+        """ Return the children of nodes one level down
+
+        Keyword arguments:
+        nodes -- The array of node numbers at the given level. Levels above the root repeat the root.
+        level -- The level of the nodes
+
+        Return ( children, valid ), two N x K arrays of the children's node numbers and whether each exists
+        """
+        top = len( self.lows ) - 1
+        if level > top:
+            return ( nodes[ :, None ], np.ones( ( len( nodes ), 1 ), dtype=bool ) )
+        c = np.column_stack( ( 2 * nodes, 2 * nodes + 1 ) )
+        return ( c, c < len( self.lows[ level - 1 ] ) )
+
+    def pairs( self, other, tolerance=0.0 ):
+        """ Find the pairs of triangles, one from each tree, whose bounding boxes overlap
+
+        Both trees are walked down together, a level at a time, keeping the pairs of nodes whose boxes overlap.
+
+        Keyword arguments:
+        other     -- The other TriangleTree
+        tolerance -- How far apart two boxes can be and still count as overlapping
+
+        Return ( i, j ), the arrays of the paired triangles' indices in this tree and in the other one
+        """
+        if len( self.order ) == 0 or len( other.order ) == 0:
+            return ( np.zeros( 0, dtype=np.int64 ), np.zeros( 0, dtype=np.int64 ) )
+        depth = max( len( self.lows ), len( other.lows ) )
+        a = np.zeros( 1, dtype=np.int64 )
+        b = np.zeros( 1, dtype=np.int64 )
+        for level in range( depth - 1, -1, -1 ):
+            if level < depth - 1:
+                ( ca, va ) = self.children( a, level + 1 )
+                ( cb, vb ) = other.children( b, level + 1 )
+                shape = ( len( a ), ca.shape[1], cb.shape[1] )
+                valid = ( va[ :, :, None ] & vb[ :, None, : ] ).ravel()
+                a = np.broadcast_to( ca[ :, :, None ], shape ).ravel()[ valid ]
+                b = np.broadcast_to( cb[ :, None, : ], shape ).ravel()[ valid ]
+            ( la, lb ) = ( min( level, len( self.lows ) - 1 ), min( level, len( other.lows ) - 1 ) )
+            keep = np.all( ( self.lows[ la ][ a ] <= other.highs[ lb ][ b ] + tolerance ) &
+                           ( other.lows[ lb ][ b ] <= self.highs[ la ][ a ] + tolerance ), axis=1 )
+            ( a, b ) = ( a[ keep ], b[ keep ] )
+        return ( self.order[ a ], other.order[ b ] )
+
+    def winding_numbers( self, points, beta=2.0 ):
+        """ Return the generalized winding numbers of the triangles around points
+
+        Each triangle adds the solid angle it covers, as seen from the point, over 4 pi. The sum is 1 inside
+        a closed mesh with outward normals and 0 outside, and changes smoothly across holes in an open one.
+        A node further from a point than beta times its radius counts as a single dipole, so only the
+        triangles near each point are summed exactly.
+
+        Keyword arguments:
+        points -- The N x 3 array of points
+        beta   -- How many radii away a node must be to use its dipole
+
+        Return the N winding numbers
+        """
+        w = np.zeros( len( points ) )
+        if len( self.order ) == 0 or len( points ) == 0:
+            return w
+        c = self.corners
+        normals = [ 0.5 * np.cross( c[ :, 1 ] - c[ :, 0 ], c[ :, 2 ] - c[ :, 0 ] ) ]
+        areas = [ np.sqrt( np.einsum( 'ij,ij->i', normals[0], normals[0] ) ) ]
+        moments = [ areas[0][ :, None ] * c.mean( axis=1 ) ]
+        for level in range( 1, len( self.lows ) ):
+            normals.append( ReducePairs( normals[ -1 ], np.add ) )
+            areas.append( ReducePairs( areas[ -1 ], np.add ) )
+            moments.append( ReducePairs( moments[ -1 ], np.add ) )
+
+        q = np.arange( len( points ) )
+        nodes = np.zeros( len( points ), dtype=np.int64 )
+        for level in range( len( self.lows ) - 1, 0, -1 ):
+            ( low, high ) = ( self.lows[ level ][ nodes ], self.highs[ level ][ nodes ] )
+            area = areas[ level ][ nodes ]
+            center = np.where( area[ :, None ] > 0, moments[ level ][ nodes ] / np.maximum( area, 1e-300 )[ :, None ], ( low + high ) / 2 )
+            extent = np.maximum( np.abs( high - center ), np.abs( low - center ) )
+            r = center - points[ q ]
+            dist2 = np.einsum( 'ij,ij->i', r, r )
+            far = dist2 > beta * beta * np.einsum( 'ij,ij->i', extent, extent )
+            w += np.bincount( q[ far ], weights=np.einsum( 'ij,ij->i', normals[ level ][ nodes[ far ] ], r[ far ] ) / dist2[ far ] ** 1.5, minlength=len( points ) )
+            ( ch, valid ) = self.children( nodes[ ~far ], level )
+            q = np.repeat( q[ ~far ], ch.shape[1] )[ valid.ravel() ]
+            nodes = ch.ravel()[ valid.ravel() ]
+
+        # Exact solid angles of the nearby triangles
+        ( a, b, c ) = ( self.corners[ nodes, 0 ] - points[ q ], self.corners[ nodes, 1 ] - points[ q ], self.corners[ nodes, 2 ] - points[ q ] )
+        ( la, lb, lc ) = [ np.sqrt( np.einsum( 'ij,ij->i', v, v ) ) for v in ( a, b, c ) ]
+        det = np.einsum( 'ij,ij->i', a, np.cross( b, c ) )
+        den = la * lb * lc + np.einsum( 'ij,ij->i', a, b ) * lc + np.einsum( 'ij,ij->i', a, c ) * lb + np.einsum( 'ij,ij->i', b, c ) * la
+        w += np.bincount( q, weights=2.0 * np.arctan2( det, den ), minlength=len( points ) )
+        return w / ( 4.0 * math.pi )
+
+def TrianglePlanes( corners ):
+    """Return the planes of triangles
+
+    Keyword arguments:
+    corners -- The T x 3 x 3 array of the triangles' corner points
+
+    Return ( normals, offsets ), where a point p is on a triangle's plane when dot( normal, p ) == offset.
+    The normals are not normalized, and are zero for degenerate triangles.
+    """
+    normals = np.cross( corners[ :, 1 ] - corners[ :, 0 ], corners[ :, 2 ] - corners[ :, 0 ] )
+    return ( normals, np.einsum( 'ij,ij->i', normals, corners[ :, 0 ] ) )
+
+def CrossingPoints( p, q, dp, dq ):
+    """Return the points where edges cross a plane, from their ends' signed distances to it
+
+    Each point is interpolated from the end on the front of the plane, so an edge gives the same point
+    whichever way round it is walked.
+
+    Keyword arguments:
+    p, q   -- The ... x 3 arrays of the edges' ends
+    dp, dq -- The signed distances of the ends to the plane
+
+    Return the ... x 3 array of crossing points
+    """
+    front = ( dp >= 0 )[ ..., None ]
+    ( pf, pb ) = ( np.where( front, p, q ), np.where( front, q, p ) )
+    ( df, db ) = ( np.where( front[ ..., 0 ], dp, dq ), np.where( front[ ..., 0 ], dq, dp ) )
+    with np.errstate( divide='ignore', invalid='ignore' ):
+        return pf + ( pb - pf ) * ( df / ( df - db ) )[ ..., None ]
+
+def MeshEdges( tris, n ):
+    """Number the edges of triangles, each once whichever way round the triangles walk it
+
+    Keyword arguments:
+    tris -- The T x 3 array of triangles
+    n    -- The number of vertices
+
+    Return ( edges, sides ): the E x 2 array of edges, lower vertex first, and the T x 3 array of the edge
+    along each side of each triangle, side k running from corner k to corner k + 1
+    """
+    ( a, b ) = ( tris.ravel(), tris[ :, [ 1, 2, 0 ] ].ravel() )
+    ( key, sides ) = np.unique( np.minimum( a, b ) * n + np.maximum( a, b ), return_inverse=True )
+    return ( np.column_stack( ( key // n, key % n ) ), sides.reshape( -1, 3 ) )
+
+def EdgePierces( u, v, corners, ids, normals, offsets ):
+    """Check which edges pass through which triangles, and where
+
+    Each test is worked out the same way whichever pair of triangles asks for it, so neighbours agree:
+    an edge passing between two triangles goes through exactly one of them, and a crossing point is
+    the same point for every triangle that has it.
+
+    Keyword arguments:
+    u, v             -- The P x 3 arrays of the edges' ends, lower vertex number first
+    corners          -- The P x 3 x 3 array of the triangles' corners
+    ids              -- The P x 3 array of the corners' vertex numbers
+    normals, offsets -- The triangles' planes, from TrianglePlanes()
+
+    Return ( pierce, points ): whether each edge passes through its triangle, and where it crosses the triangle's plane
+    """
+    du = np.einsum( 'ij,ij->i', u, normals ) - offsets
+    dv = np.einsum( 'ij,ij->i', v, normals ) - offsets
+    pierce = ( du >= 0 ) != ( dv >= 0 )
+    # The edge's line passes through the triangle when it turns the same way round all three sides,
+    # each side being tested from its lower vertex, as the triangle beside it would test it
+    turns = []
+    for k in range( 3 ):
+        swap = ids[ :, k ] > ids[ :, ( k + 1 ) % 3 ]
+        ( p, q ) = ( corners[ :, k ], corners[ :, ( k + 1 ) % 3 ] )
+        ( p, q ) = ( np.where( swap[ :, None ], q, p ), np.where( swap[ :, None ], p, q ) )
+        turns.append( ( np.einsum( 'ij,ij->i', v - u, np.cross( p - u, q - u ) ) >= 0 ) != swap )
+    pierce &= ( turns[0] == turns[1] ) & ( turns[1] == turns[2] )
+    return ( pierce, CrossingPoints( u, v, du, dv ) )
+
+def EarClip( xy, ids=None ):
+    """Triangulate a polygon by clipping its ears
+
+    An ear is a convex corner whose triangle holds none of the polygon's other points. Each round clips
+    the ears that are not next to each other. When no ear is left, as with points in line, the most convex
+    corner is clipped anyway, so the triangles always use exactly the polygon's sides.
+
+    Keyword arguments:
+    xy  -- The N x 2 array of the polygon's points, counterclockwise
+    ids -- The N numbers of the points, where a point visited twice, as where a hole is bridged in, has the same number both times
+
+    Return the ( N - 2 ) x 3 array of triangles, as indices into xy
+    """
+    def cross( a, b ):
+        return a[ ..., 0 ] * b[ ..., 1 ] - a[ ..., 1 ] * b[ ..., 0 ]
+
+    xy = np.asarray( xy, dtype=np.float64 )
+    ids = np.arange( len( xy ) ) if ids is None else np.asarray( ids )
+    idx = np.arange( len( xy ) )
+    out = []
+    span = float( np.ptp( xy, axis=0 ).max() ) if len( xy ) > 0 else 0.0
+    eps = 1e-12 * span * span
+    while len( idx ) > 3:
+        n = len( idx )
+        p = xy[ idx ]
+        ( a, c ) = ( np.roll( p, 1, axis=0 ), np.roll( p, -1, axis=0 ) )
+        turn = cross( p - a, c - p )
+        ears = np.nonzero( turn > eps )[0]
+        rest = np.nonzero( turn <= eps )[0]
+        if len( ears ) > 0 and len( rest ) > 0:
+            # Only a corner that is not convex can be inside an ear
+            q = p[ rest ][ None ]
+            ( A, B, C ) = ( a[ ears ][ :, None ], p[ ears ][ :, None ], c[ ears ][ :, None ] )
+            within = ( cross( B - A, q - A ) > 0 ) & ( cross( C - B, q - B ) > 0 ) & ( cross( A - C, q - C ) > 0 )
+            ( own, other ) = ( ids[ idx ], ids[ idx[ rest ] ][ None ] )
+            for k in ( -1, 0, 1 ):
+                within &= other != own[ ( ears + k ) % n ][ :, None ]
+            ears = ears[ ~within.any( axis=1 ) ]
+        if len( ears ) == 0:
+            ears = [ int( np.argmax( turn ) ) ]
+        clip = []
+        for k in ears:
+            if len( clip ) == 0 or k - clip[ -1 ] >= 2:
+                clip.append( int( k ) )
+        if len( clip ) > 1 and clip[0] == 0 and clip[ -1 ] == n - 1:
+            clip.pop()
+        clip = clip[ :n - 3 ]
+        out.extend( ( idx[ ( k - 1 ) % n ], idx[ k ], idx[ ( k + 1 ) % n ] ) for k in clip )
+        idx = np.delete( idx, clip )
+    out.append( tuple( idx ) )
+    return np.array( out, dtype=np.int64 ).reshape( -1, 3 )
+
+def CutTriangles( verts, tris, edges, sides, normals, points, on_edges, segments ):
+    """Triangulate the triangles crossed by an intersection curve, along the curve
+
+    The sides of a cut triangle, split at the curve's points along them, and the curve's segments inside
+    it make a planar graph. Sorting the graph's half-edges by angle around each point links each one to the
+    next around its face, so the faces are the cycles of those links. A loop of segments touching no side
+    is a hole, bridged into the face around it. The faces are then triangulated by EarClip().
+
+    Keyword arguments:
+    verts        -- The N x 3 array of the mesh's vertices
+    tris         -- The T x 3 array of its triangles
+    edges, sides -- The mesh's edges, and the edge along each side of each triangle, from MeshEdges()
+    normals      -- The T x 3 array of the triangles' normals
+    points       -- The M x 3 array of the curve's points
+    on_edges     -- ( edge, point ), the arrays of the curve's points that lie on the mesh's edges, and their edges
+    segments     -- ( tri, p, q ), the arrays of the segments, the triangle each crosses, and their ends' point numbers
+
+    Return ( faces, face, cut ): the F x 3 array of triangles, where point k is numbered N + k, the face
+    each one belongs to, and the triangles that were cut
+    """
+    n = len( verts )
+    ( seg_tri, p, q ) = segments
+    cut = np.unique( seg_tri )
+    if len( cut ) == 0:
+        return ( np.zeros( ( 0, 3 ), dtype=np.int64 ), np.zeros( 0, dtype=np.int64 ), cut )
+    coords = np.concatenate( ( verts, points ) )
+
+    # The points along each edge, in order from its lower vertex
+    ( on, at ) = on_edges
+    low = verts[ edges[ on, 0 ] ]
+    order = np.lexsort( ( np.einsum( 'ij,ij->i', points[ at ] - low, verts[ edges[ on, 1 ] ] - low ), on ) )
+    ( on, at ) = ( on[ order ], np.append( at[ order ], 0 ) )
+
+    # Walk each side of each cut triangle from its first corner, through its points, to the next corner
+    tri = np.repeat( cut, 3 )
+    k = np.tile( np.arange( 3 ), len( cut ) )
+    e = sides[ tri, k ]
+    ( c0, c1 ) = ( tris[ tri, k ], tris[ tri, ( k + 1 ) % 3 ] )
+    start = np.searchsorted( on, e )
+    m = np.searchsorted( on, e, side='right' ) - start
+    s = np.repeat( np.arange( len( e ) ), m + 1 )
+    step = np.arange( len( s ) ) - np.repeat( np.cumsum( m + 1 ) - ( m + 1 ), m + 1 )
+
+    def along( step ):
+        pos = np.where( c0[ s ] < c1[ s ], start[ s ] + step - 1, start[ s ] + m[ s ] - step )
+        pos = np.clip( pos, 0, len( at ) - 1 )
+        return np.where( step == 0, c0[ s ], np.where( step > m[ s ], c1[ s ], n + at[ pos ] ) )
+
+    ( u, v ) = ( along( step ), along( step + 1 ) )
+    owner = np.concatenate( ( tri[ s ], tri[ s ], seg_tri, seg_tri ) )
+    org = np.concatenate( ( u, v, n + p, n + q ) )
+    dst = np.concatenate( ( v, u, n + q, n + p ) )
+    outside = np.concatenate( ( np.zeros( len( u ), dtype=bool ), np.ones( len( u ), dtype=bool ), np.zeros( 2 * len( p ), dtype=bool ) ) )
+    H = len( owner )
+    r = np.arange( H )
+
+    # Flatten each triangle onto the axis plane it faces most, keeping it counterclockwise
+    nrm = normals[ owner ]
+    axis = np.argmax( np.abs( nrm ), axis=1 )
+    flip = nrm[ r, axis ] < 0
+    ( ix, iy ) = ( ( axis + 1 ) % 3, ( axis + 2 ) % 3 )
+    ( ix, iy ) = ( np.where( flip, iy, ix ), np.where( flip, ix, iy ) )
+    base = verts[ tris[ owner, 0 ] ]
+    ( x0, y0 ) = ( coords[ org, ix ] - base[ r, ix ], coords[ org, iy ] - base[ r, iy ] )
+    ( x1, y1 ) = ( coords[ dst, ix ] - base[ r, ix ], coords[ dst, iy ] - base[ r, iy ] )
+
+    # Around each point, the next half-edge of a face leaves clockwise after the one coming back
+    order = np.lexsort( ( np.arctan2( y1 - y0, x1 - x0 ), org, owner ) )
+    pos = np.empty( H, dtype=np.int64 )
+    pos[ order ] = r
+    first = np.concatenate( ( [ True ], ( owner[ order ][ 1: ] != owner[ order ][ :-1 ] ) | ( org[ order ][ 1: ] != org[ order ][ :-1 ] ) ) )
+    last = np.concatenate( ( first[ 1: ], [ True ] ) )
+    group_last = np.minimum.accumulate( np.where( last, r, H )[ ::-1 ] )[ ::-1 ]
+    prev = np.where( first, group_last, r - 1 )
+    twin = np.empty( H, dtype=np.int64 )
+    twin[ np.lexsort( ( org, dst, owner ) ) ] = np.lexsort( ( dst, org, owner ) )
+    nxt = order[ prev[ pos[ twin ] ] ]
+
+    # The cycles with positive area are faces, those with negative area are holes,
+    # and those walking the triangle's sides the wrong way round are outside it
+    label = ConnectedComponents( H, np.column_stack( ( r, nxt ) ) )
+    area = np.bincount( label, weights=x0 * y1 - x1 * y0, minlength=H )
+    bad = np.zeros( H, dtype=bool )
+    bad[ label[ outside ] ] = True
+    roots = np.nonzero( ( label == r ) & ~bad )[0]
+    ( nxt, org, owner, x0, y0 ) = ( nxt.tolist(), org.tolist(), owner.tolist(), x0.tolist(), y0.tolist() )
+
+    def cycle( h ):
+        walk = [ h ]
+        g = nxt[ h ]
+        while g != h:
+            walk.append( g )
+            g = nxt[ g ]
+        return ( [ org[ g ] for g in walk ], np.array( [ ( x0[ g ], y0[ g ] ) for g in walk ] ) )
+
+    polys = {}
+    holes = {}
+    for h in roots.tolist():
+        # A cycle of two half-edges only walks round a segment with no face beside it
+        if nxt[ nxt[ h ] ] == h:
+            continue
+        ( polys if area[ h ] > 0 else holes ).setdefault( owner[ h ], [] ).append( cycle( h ) + ( abs( area[ h ] ), ) )
+
+    def contains( xy, pt ):
+        ( a, b ) = ( xy, np.roll( xy, -1, axis=0 ) )
+        with np.errstate( divide='ignore', invalid='ignore' ):
+            hit = ( ( a[ :, 1 ] > pt[1] ) != ( b[ :, 1 ] > pt[1] ) ) & ( pt[0] < ( b[ :, 0 ] - a[ :, 0 ] ) * ( pt[1] - a[ :, 1 ] ) / ( b[ :, 1 ] - a[ :, 1 ] ) + a[ :, 0 ] )
+        return hit.sum() % 2 == 1
+
+    def crosses( a, b, xy, ids, skip ):
+        # Whether segment a-b properly crosses any side of the polygon, other than sides at the points skipped
+        def turn( p, q, r ):
+            return ( q[ ..., 0 ] - p[ ..., 0 ] ) * ( r[ ..., 1 ] - p[ ..., 1 ] ) - ( q[ ..., 1 ] - p[ ..., 1 ] ) * ( r[ ..., 0 ] - p[ ..., 0 ] )
+        ( c, d ) = ( xy, np.roll( xy, -1, axis=0 ) )
+        ( ic, id_ ) = ( np.asarray( ids ), np.roll( ids, -1 ) )
+        hit = ( turn( a, b, c ) * turn( a, b, d ) < 0 ) & ( turn( c, d, a ) * turn( c, d, b ) < 0 )
+        for k in skip:
+            hit &= ( ic != k ) & ( id_ != k )
+        return hit.any()
+
+    def bridge( ids, xy, inner ):
+        # Join each hole to the nearest point of the polygon it can see, by a cut in and back out
+        inner = sorted( inner, key=lambda hole: -hole[1][ :, 0 ].max() )
+        for ( w, ( hids, hxy ) ) in enumerate( inner ):
+            k = int( np.argmax( hxy[ :, 0 ] ) )
+            dist = np.einsum( 'ij,ij->i', xy - hxy[ k ], xy - hxy[ k ] )
+            best = int( np.argmin( dist ) )
+            for j in np.argsort( dist, kind='mergesort' ).tolist():
+                if not any( crosses( hxy[ k ], xy[ j ], oxy, oids, ( hids[ k ], ids[ j ] ) )
+                            for ( oids, oxy ) in [ ( ids, xy ) ] + inner[ w: ] ):
+                    best = j
+                    break
+            ids = ids[ :best + 1 ] + hids[ k: ] + hids[ :k ] + [ hids[ k ], ids[ best ] ] + ids[ best + 1: ]
+            xy = np.concatenate( ( xy[ :best + 1 ], hxy[ k: ], hxy[ :k ], hxy[ k:k + 1 ], xy[ best:best + 1 ], xy[ best + 1: ] ) )
+        return ( ids, xy )
+
+    faces = []
+    face = []
+    for ( t, group ) in polys.items():
+        inner = [ [] for g in group ]
+        for ( hids, hxy, harea ) in holes.get( t, [] ):
+            # A hole belongs to the smallest face around it, among the faces it is not part of
+            around = [ f for ( f, ( ids, xy, a ) ) in enumerate( group ) if not set( ids ) & set( hids ) and contains( xy, hxy[0] ) ]
+            if len( around ) > 0:
+                inner[ min( around, key=lambda f: group[ f ][2] ) ].append( ( hids, hxy ) )
+        for ( f, ( ids, xy, a ) ) in enumerate( group ):
+            if len( inner[ f ] ) > 0:
+                ( ids, xy ) = bridge( ids, xy, inner[ f ] )
+            face.append( np.full( len( ids ) - 2, len( faces ), dtype=np.int64 ) )
+            faces.append( np.asarray( ids )[ EarClip( xy, ids ) ] )
+    if len( faces ) == 0:
+        return ( np.zeros( ( 0, 3 ), dtype=np.int64 ), np.zeros( 0, dtype=np.int64 ), cut )
+    return ( np.concatenate( faces ), np.concatenate( face ), cut )
+
+def BooleanData( md1, md2, op, grow=1e-5 ):
+    """Perform a Boolean CSG (Constructive Solid Geometry) operation on mesh data, without Blender
+
+    Both meshes should be closed, with their normals facing outward. The steps are:
+      1. Pairs of triangles whose boxes overlap are found by walking a TriangleTree of each mesh.
+      2. The points where the edges of each mesh pass through the triangles of the other, by EdgePierces(),
+         are the points of the intersection curve. Each pair of crossing triangles has two of them, which
+         are the ends of the curve's segment across both triangles.
+      3. The triangles the curve crosses are triangulated along it, by CutTriangles().
+      4. Each face of a cut triangle, and each connected patch of uncut triangles, is kept or dropped
+         by the winding number of the other mesh around it, from TriangleTree.winding_numbers().
+    Both sides share the curve's points, so the result is closed wherever the tests agree.
+
+    Faces that lie in the same plane have no well-defined crossing, so md2 is first grown about its center,
+    moving its faces out by about grow times the size of both meshes. A cutter flush with a face then cuts through it,
+    as it would in practice. This works around coplanar faces rather than handling them: md2's vertices, and so
+    the faces it adds and the cuts it makes, are that much off in the result. With grow=0, faces in the same plane
+    are left to the crossing tests, which cannot agree on them, and the result may have holes or doubled faces there.
+
+    Keyword arguments:
+    md1  -- The MeshData of the left-hand operand
+    md2  -- The MeshData of the right-hand operand
+    op   -- The Boolean CSG operation ( 'DIFFERENCE', 'INTERSECT', or 'UNION' )
+    grow -- How far to move md2's faces out, as a fraction of the size of both meshes
+
+    Return the MeshData of the result, as triangles with their normals facing outward
+    """
+    if op not in ( 'DIFFERENCE', 'INTERSECT', 'UNION' ):
+        raise Exception( "Unknown Boolean operation '%s': it must be 'DIFFERENCE', 'INTERSECT' or 'UNION'" % op )
+    ( va, ta ) = ( md1.verts.astype( np.float64 ), md1.triangles().astype( np.int64 ) )
+    ( vb, tb ) = ( md2.verts.astype( np.float64 ), md2.triangles().astype( np.int64 ) )
+    both = np.concatenate( ( va, vb ) )
+    if len( both ) == 0:
+        return MeshData( np.zeros( ( 0, 3 ) ), oriented=True )
+    size = max( float( np.ptp( both, axis=0 ).max() ), 1e-300 )
+    if len( vb ) > 0:
+        # Scale each axis so that the faces across it move out by about the same distance. The axes grow
+        # by slightly different amounts, and the center is nudged by less than that, so that symmetric
+        # meshes do not keep edges of one meeting edges of the other exactly.
+        ( low, high ) = ( vb.min( axis=0 ), vb.max( axis=0 ) )
+        half = ( high - low ) / 2
+        out = grow * size * np.array( ( 1.0, 1.1, 1.2 ) )
+        vb = ( low + high ) / 2 + ( vb - ( low + high ) / 2 ) * np.where( half > 0, 1.0 + out / np.maximum( half, 1e-300 ), 1.0 ) + \
+             grow * size * np.array( ( 0.31, -0.23, 0.17 ) )
+
+    ( ca, cb ) = ( va[ ta ], vb[ tb ] )
+    ( planes_a, planes_b ) = ( TrianglePlanes( ca ), TrianglePlanes( cb ) )
+    ( edges_a, sides_a ) = MeshEdges( ta, len( va ) )
+    ( edges_b, sides_b ) = MeshEdges( tb, len( vb ) )
+    ( tree_a, tree_b ) = ( TriangleTree( ca ), TriangleTree( cb ) )
+    ( i, j ) = tree_a.pairs( tree_b, 1e-9 * size )
+
+    # Test the sides of each triangle against the other triangle of its pair
+    ( ri, rj ) = ( np.repeat( i, 3 ), np.repeat( j, 3 ) )
+    ( ea, eb ) = ( sides_a[ i ].ravel(), sides_b[ j ].ravel() )
+    ( pierce_a, points_a ) = EdgePierces( va[ edges_a[ ea, 0 ] ], va[ edges_a[ ea, 1 ] ], cb[ rj ], tb[ rj ], planes_b[0][ rj ], planes_b[1][ rj ] )
+    ( pierce_b, points_b ) = EdgePierces( vb[ edges_b[ eb, 0 ] ], vb[ edges_b[ eb, 1 ] ], ca[ ri ], ta[ ri ], planes_a[0][ ri ], planes_a[1][ ri ] )
+    pierce = np.concatenate( ( pierce_a.reshape( -1, 3 ), pierce_b.reshape( -1, 3 ) ), axis=1 )
+    key = np.concatenate( ( ( ea * len( tb ) + rj ).reshape( -1, 3 ), ( len( edges_a ) * len( tb ) + eb * len( ta ) + ri ).reshape( -1, 3 ) ), axis=1 )
+
+    # Number the curve's points, each once however many pairs found it
+    ( key, number ) = np.unique( key[ pierce ], return_inverse=True )
+    points = np.zeros( ( len( key ), 3 ) )
+    points[ number ] = np.concatenate( ( points_a.reshape( -1, 3, 3 ), points_b.reshape( -1, 3, 3 ) ), axis=1 )[ pierce ]
+    numbers = np.full( pierce.shape, -1, dtype=np.int64 )
+    numbers[ pierce ] = number
+
+    # A pair crossing cleanly has two points. Other counts only come from edges passing
+    # through each other, where the tests cannot agree, and give no segment.
+    two = np.nonzero( pierce.sum( axis=1 ) == 2 )[0]
+    ends = numbers[ two ][ pierce[ two ] ].reshape( -1, 2 )
+
+    def side( verts, tris, edges, sides, normals, tested, cols, mine, tree ):
+        # Triangulate the cut triangles, and find which of their faces, and of the patches of uncut triangles, are inside the other mesh
+        found = pierce[ :, cols ]
+        ( at, first ) = np.unique( numbers[ :, cols ][ found ], return_index=True )
+        ( faces, face, cut ) = CutTriangles( verts, tris, edges, sides, normals, points, ( tested[ found ][ first ], at ),
+                                             ( mine[ two ], ends[ :, 0 ], ends[ :, 1 ] ) )
+
+        # Sample each face at the center of its largest triangle
+        corners = np.concatenate( ( verts, points ) )[ faces ]
+        normal = np.cross( corners[ :, 1 ] - corners[ :, 0 ], corners[ :, 2 ] - corners[ :, 0 ] )
+        order = np.lexsort( ( np.einsum( 'ij,ij->i', normal, normal ), face ) )
+        largest = order[ np.concatenate( ( face[ order ][ 1: ] != face[ order ][ :-1 ], np.ones( min( len( face ), 1 ), dtype=bool ) ) ) ]
+
+        uncut = np.ones( len( tris ), dtype=bool )
+        uncut[ cut ] = False
+        whole = np.nonzero( uncut )[0]
+        ( a, b ) = ( tris[ whole ].ravel(), tris[ whole ][ :, [ 1, 2, 0 ] ].ravel() )
+        key = np.minimum( a, b ) * len( verts ) + np.maximum( a, b )
+        by_key = np.argsort( key, kind='mergesort' )
+        same = np.nonzero( key[ by_key ][ 1: ] == key[ by_key ][ :-1 ] )[0]
+        patch = ConnectedComponents( len( whole ), np.column_stack( ( by_key[ same ] // 3, by_key[ same + 1 ] // 3 ) ) )
+        ( leaders, patch ) = np.unique( patch, return_inverse=True )
+
+        inside = tree.winding_numbers( np.concatenate( ( verts[ tris[ whole[ leaders ] ] ].mean( axis=1 ), corners[ largest ].mean( axis=1 ) ) ) ) > 0.5
+        return ( whole, inside[ :len( leaders ) ][ patch ], faces, inside[ len( leaders ): ][ face ] )
+
+    parts = []
+    for ( verts, tris, edges, sides, planes, tested, cols, mine, tree, offset, flip ) in (
+            ( va, ta, edges_a, sides_a, planes_a, ea.reshape( -1, 3 ), slice( 0, 3 ), i, tree_b, 0, False ),
+            ( vb, tb, edges_b, sides_b, planes_b, eb.reshape( -1, 3 ), slice( 3, 6 ), j, tree_a, len( va ), op == 'DIFFERENCE' ) ):
+        ( whole, whole_inside, faces, faces_inside ) = side( verts, tris, edges, sides, planes[0], tested, cols, mine, tree )
+        want = op == 'INTERSECT' or ( op == 'DIFFERENCE' and flip )
+        kept = np.concatenate( ( tris[ whole[ whole_inside == want ] ], faces[ faces_inside == want ] ) )
+        # The curve's points are numbered after both meshes' vertices
+        kept = np.where( kept < len( verts ), kept + offset, kept - len( verts ) + len( va ) + len( vb ) )
+        parts.append( kept[ :, ::-1 ] if flip else kept )
+
+    verts = np.concatenate( ( va, vb, points ) )
+    ( used, tris ) = np.unique( np.concatenate( parts ), return_inverse=True )
+    return MeshData( verts[ used ], tris.reshape( -1, 3 ), oriented=True )
+
+#################################################
+# Streaming
+#################################################
+
+def OpenStream( fn=None ):
+    """Start streaming finished objects to an STL or 3MF file, so they need not stay in the scene
+
+    While the stream is open, Emit() writes objects to it and then deletes them.
+    Fini() emits the objects that are left and closes the stream, in place of writing its STL file.
+
+    Keyword arguments:
+    fn -- The filename to write to, ending in .stl or .3mf. None means the STL file Fini() would write.
+
+    Return nothing
+    """
+    global russbpy_stream
+
+    if russbpy_stream is not None:
+        raise Exception( "Cannot open a stream to '%s': '%s' is still open" % ( fn, russbpy_stream.fn ) )
+    if fn is None:
+        fn = "%s.stl" % os.path.splitext( sys.argv[ len( sys.argv ) - 1 ] )[0]
+    russbpy_stream = MeshStream( fn )
+
+def Emit( *obs ):
+    """Write finished objects to the open stream, then delete them along with their meshes and materials
+
+    Blender cannot tell which objects the script still refers to, so objects are only emitted when
+    passed here. An emitted object must not be used again.
+
+    Keyword arguments:
+    obs -- The objects to emit
+
+    Return nothing
+    """
+    if russbpy_stream is None:
+        raise Exception( "Cannot emit objects: no stream is open. Call OpenStream() first." )
+    for ob in obs:
+        Flush( ob )
+        ( verts, tris ) = ObjectTriangles( ob )
+        russbpy_stream.write( verts, tris, Transformation( ob.matrix_world ) )
+
+        ( me, mats ) = ( ob.data, [ m for m in ob.data.materials if m is not None ] )
+        Delete( ob )
+        if me.users == 0:
+            bpy.data.meshes.remove( me )
+        for mat in mats:
+            if mat.users == 0:
+                bpy.data.materials.remove( mat )
+
+def CloseStream():
+    """Finish and close the open stream
+
+    Keyword arguments:
+    None
+
+    Return the number of triangles written
+    """
+    global russbpy_stream
+
+    if russbpy_stream is None:
+        raise Exception( "Cannot close the stream: no stream is open" )
+    ( stream, russbpy_stream ) = ( russbpy_stream, None )
+    return stream.close()
+
+#################################################
+# Background Output
+#################################################
+
+def QueueOutput( job, *args ):
+    """Run an output job on the background writer thread
+
+    The writer thread is started by the first call. The queue holds only a few jobs, so when the writer
+    falls behind, this call blocks until there is room, and no more than that many snapshots are held in memory.
+    The jobs must not use Blender, which is not thread-safe; pass them arrays read on this thread.
+
+    Keyword arguments:
+    job  -- The function to call
+    args -- The arguments to call it with
+
+    Return nothing
+    """
+    global russbpy_output_queue
+
+    if russbpy_output_queue is None:
+        russbpy_output_queue = queue.Queue( maxsize=2 )
+
+        def writer():
+            while True:
+                ( job, args ) = russbpy_output_queue.get()
+                try:
+                    job( *args )
+                except Exception as e:
+                    russbpy_output_errors.append( e )
+                finally:
+                    russbpy_output_queue.task_done()
+
+        thread = threading.Thread( target=writer, name='russbpy output' )
+        thread.daemon = True
+        thread.start()
+        atexit.register( WaitForOutput )
+    russbpy_output_queue.put( ( job, args ) )
+
+def WaitForOutput():
+    """Wait for the background writer thread to finish the queued output jobs
+
+    This is called when the process exits, so the files are complete even if it is never called directly.
+
+    Keyword arguments:
+    None
+
+    Return nothing
+    """
+    if russbpy_output_queue is not None:
+        russbpy_output_queue.join()
+    if russbpy_output_errors:
+        e = russbpy_output_errors[0]
+        del russbpy_output_errors[:]
+        raise e
 
 #################################################
 # Mainline
 #################################################
 
-def Init( fn=32, transform_metadata=False, quiet=False ):
+def Init( fn=32, transform_metadata=False, quiet=False, deferred_transforms=False, matrix_transforms=True, background_output=False, boolean_planner='AABB', boolean_solver='AUTO', boolean_engine='blender' ):
     """ Initialize the russbpy module
 
     The elapsed time for the Elapsed() function starts when Init() is called.
@@ -4047,12 +7152,19 @@ def Init( fn=32, transform_metadata=False, quiet=False ):
     The current cursor location is put to the origin (0,0,0)
 
     Keyword arguments:
-    fn                 -- The fineness setting, which determines how finely objects will be faceted by default
-    transform_metadata -- Whether or not metadata gets transformed with objects.
+    fn                  -- The fineness setting, which determines how finely objects will be faceted by default
+    transform_metadata  -- Whether or not metadata gets transformed with objects.
+    quiet               -- Whether or not to keep Print() output off the console.
+    deferred_transforms -- Whether or not to collect transformations until they are needed. See Flush().
+    matrix_transforms   -- Whether or not to transform objects directly, instead of with operators.
+    background_output   -- Whether or not Fini() writes its files on a background thread. See WaitForOutput().
+    boolean_planner     -- How Boolean() checks for disjoint operands: 'AABB', 'OBB' or None. See BooleanCanOverlap().
+    boolean_solver      -- How Boolean() picks the solver: 'AUTO', a solver name, or None. See ChooseBooleanSolver().
+    boolean_engine      -- What Boolean() runs: 'blender' or 'numpy'. See BooleanData().
 
     Return nothing
     """
-    global russbpy_fn, russbpy_transform_metatdata, russbpy_quiet, russbpy_start_time, russbpy_last_time, my_log
+    global russbpy_fn, russbpy_transform_metatdata, russbpy_deferred_transforms, russbpy_matrix_transforms, russbpy_background_output, russbpy_boolean_planner, russbpy_boolean_solver, russbpy_boolean_engine, russbpy_quiet, russbpy_start_time, russbpy_last_time, my_log
 
     my_log = open( "%s.log" % os.path.splitext( sys.argv[ len( sys.argv ) - 1 ] )[0], 'w' )
 
@@ -4061,7 +7173,14 @@ def Init( fn=32, transform_metadata=False, quiet=False ):
 
     russbpy_fn = fn
     russbpy_transform_metatdata = transform_metadata
+    russbpy_deferred_transforms = deferred_transforms
+    russbpy_matrix_transforms = matrix_transforms
+    russbpy_background_output = background_output
+    russbpy_boolean_planner = boolean_planner
+    russbpy_boolean_solver = boolean_solver
+    russbpy_boolean_engine = boolean_engine
     russbpy_quiet = quiet
+    russbpy_pending_transforms.clear()
 
     # Delete the current objects
     SelectAll()
@@ -4092,6 +7211,8 @@ def Percent( progress, final, bar_length=0 ):
 def Print( msg ):
     """ Append a message to the *.log file
 
+    After Fini(), the message is only printed, as the log file is closed.
+
     Keyword arguments:
     msg -- The message to append
 
@@ -4101,7 +7222,8 @@ def Print( msg ):
 
     if not russbpy_quiet:
         print( "RJC: %s" % msg )
-    my_log.write( "%s\n" % msg )
+    if my_log is not None:
+        my_log.write( "%s\n" % msg )
 
 def PrintV( v, msg ):
     """ Print a vector/point.
@@ -4156,31 +7278,272 @@ def SetTransformMetadata( transform_metadata=True ):
     """
     global russbpy_transform_metatdata
 
+    # Pending transformations are applied according to the setting they were made under
+    Flush()
     russbpy_transform_metatdata = transform_metadata
 
-def Fini():
+def GetMatrixTransforms():
+    """ Get the current matrix_transforms setting
+
+    Keyword arguments:
+    None
+
+    Return the current matrix_transforms setting
+    """
+    return russbpy_matrix_transforms
+
+def SetMatrixTransforms( matrix_transforms=True ):
+    """ Set the current matrix_transforms setting
+
+    While it is on, the transformation functions write the objects' matrices or mesh data directly,
+    without selections, mode switches or bpy.ops.transform operators, so they also work in background mode.
+
+    Keyword arguments:
+    matrix_transforms -- The new matrix_transforms setting
+
+    Return nothing
+    """
+    global russbpy_matrix_transforms
+
+    russbpy_matrix_transforms = matrix_transforms
+
+def GetBooleanPlanner():
+    """ Get the current boolean_planner setting
+
+    Keyword arguments:
+    None
+
+    Return the current boolean_planner setting
+    """
+    return russbpy_boolean_planner
+
+def SetBooleanPlanner( boolean_planner='AABB' ):
+    """ Set the current boolean_planner setting
+
+    Boolean() skips the solver when the operands' bounding volumes are disjoint. See BooleanCanOverlap().
+
+    Keyword arguments:
+    boolean_planner -- The new boolean_planner setting: 'AABB', 'OBB', or None to always run the solver
+
+    Return nothing
+    """
+    global russbpy_boolean_planner
+
+    if boolean_planner not in ( None, False, 'AABB', 'OBB' ):
+        raise Exception( "Cannot set the Boolean planner to '%s': it must be 'AABB', 'OBB' or None" % boolean_planner )
+    russbpy_boolean_planner = boolean_planner
+
+def GetBooleanSolver():
+    """ Get the current boolean_solver setting
+
+    Keyword arguments:
+    None
+
+    Return the current boolean_solver setting
+    """
+    return russbpy_boolean_solver
+
+def SetBooleanSolver( boolean_solver='AUTO' ):
+    """ Set the current boolean_solver setting
+
+    Keyword arguments:
+    boolean_solver -- The new boolean_solver setting: 'AUTO' to choose per operation, see ChooseBooleanSolver(),
+                      a solver name ( 'FAST' or 'EXACT' from Blender 2.91, 'BMESH' or 'CARVE' in 2.79 ),
+                      or None to use Blender's default
+
+    Return nothing
+    """
+    global russbpy_boolean_solver
+
+    if boolean_solver not in ( None, 'AUTO', 'FAST', 'EXACT', 'BMESH', 'CARVE' ):
+        raise Exception( "Cannot set the Boolean solver to '%s': it must be 'AUTO', 'FAST', 'EXACT', 'BMESH', 'CARVE' or None" % boolean_solver )
+    russbpy_boolean_solver = boolean_solver
+
+def GetBooleanEngine():
+    """ Get the current boolean_engine setting
+
+    Keyword arguments:
+    None
+
+    Return the current boolean_engine setting
+    """
+    return russbpy_boolean_engine
+
+def SetBooleanEngine( boolean_engine='blender' ):
+    """ Set the current boolean_engine setting
+
+    Keyword arguments:
+    boolean_engine -- The new boolean_engine setting: 'blender' to apply a Boolean modifier,
+                      or 'numpy' to run BooleanData() on the operands' triangles
+
+    Return nothing
+    """
+    global russbpy_boolean_engine
+
+    if boolean_engine not in ( 'blender', 'numpy' ):
+        raise Exception( "Cannot set the Boolean engine to '%s': it must be 'blender' or 'numpy'" % boolean_engine )
+    russbpy_boolean_engine = boolean_engine
+
+def GetDeferredTransforms():
+    """ Get the current deferred_transforms setting
+
+    Keyword arguments:
+    None
+
+    Return the current deferred_transforms setting
+    """
+    return russbpy_deferred_transforms
+
+def SetDeferredTransforms( deferred_transforms=True ):
+    """ Set the current deferred_transforms setting
+
+    While it is on, Translate(), Rotate*() and Scale() on an object only add to a pending matrix,
+    which is applied once by Flush() when the object's state is needed.
+
+    Keyword arguments:
+    deferred_transforms -- The new deferred_transforms setting
+
+    Return nothing
+    """
+    global russbpy_deferred_transforms
+
+    if not deferred_transforms:
+        Flush()
+    russbpy_deferred_transforms = deferred_transforms
+
+def GetBackgroundOutput():
+    """ Get the current background_output setting
+
+    Keyword arguments:
+    None
+
+    Return the current background_output setting
+    """
+    return russbpy_background_output
+
+def SetBackgroundOutput( background_output=True ):
+    """ Set the current background_output setting
+
+    While it is on, Fini() snapshots the mesh arrays and leaves writing the files and the log to a background thread.
+    Turning it off waits for the output already queued.
+
+    Keyword arguments:
+    background_output -- The new background_output setting
+
+    Return nothing
+    """
+    global russbpy_background_output
+
+    if not background_output:
+        WaitForOutput()
+    russbpy_background_output = background_output
+
+def Fini( parts=False, incremental=False, snapshot=True ):
     """ Finalize the russbpy module
 
     This function calls ShowAll() to show all objects.
     This function calls SaveSTL() to export all objects to an STL file with the same filename as the main Python module.
+    If parts is True, it also calls ExportParts() to write each object to its own STL file,
+    in the directory "<main Python module>_parts".
+    If snapshot is True, it also writes the objects to a snapshot file, "<main Python module>.rbs",
+    which SnapshotData() and LoadSnapshot() can read back quickly. See WriteSnapshot().
     This function calls SelectNone() to remove all selections (which can be distracting).
     Finally, Elapsed() is called to show the total elapsed time since Init() was called.
 
+    If a stream was opened by OpenStream(), the objects that are left are emitted to it and it is closed,
+    in place of writing the STL, snapshot, part and .blend files.
+
+    With background output on, the mesh arrays are read here, and the files are written and the log closed
+    by the background writer thread, so this returns without waiting for them. The .blend file is still saved here,
+    unless the objects were streamed.
+    Call WaitForOutput() to wait for the files.
+
+    With incremental set, the fingerprint of each object, from SceneFingerprints(), is compared with those kept
+    from the last run in "<main Python module>.fingerprints.json". The STL, snapshot and .blend files are only rewritten
+    if any object changed, and the part files only for the objects that changed. The log is always rewritten.
+
     Keyword arguments:
-    None
+    parts       -- Also export each object to its own file?
+    incremental -- Skip rewriting the outputs that are unchanged since the last run?
+    snapshot    -- Also write a snapshot file?
 
     Return nothing
     """
     global my_log
+    Flush()
     ShowAll()
-    if bpy.context.screen is not None:
+    base = os.path.splitext( sys.argv[ len( sys.argv ) - 1 ] )[0]
+    streamed = russbpy_stream is not None
+    if streamed:
+        fn = russbpy_stream.fn
+        Emit( *[ ob for ob in bpy.context.scene.objects if ob.type == 'MESH' ] )
+        Print( "Streamed %d triangles to %s" % ( CloseStream(), fn ) )
+    sidecar = "%s.fingerprints.json" % base
+    log = my_log
+
+    # The fingerprints only describe the outputs once they are all written
+    previous = ReadJSON( sidecar )
+    if os.path.exists( sidecar ):
+        os.remove( sidecar )
+
+    # Blender is not thread-safe, so the arrays are all read here
+    snapshots = [ ObjectSnapshot( ob ) for ob in bpy.context.scene.objects if ob.type == 'MESH' ]
+    meshes = [ ( name, ( Transformation( matrix ).apply( verts.astype( np.float64 ) ), tris ), color )
+               for ( name, verts, tris, matrix, color ) in snapshots ]
+
+    ( stl, blend, fingerprints, unchanged ) = ( True, True, None, [] )
+    if incremental:
+        fingerprints = SceneFingerprints( meshes )
+        changed = fingerprints[ 'scene' ] != previous.get( 'scene' )
+        stl = changed or not os.path.exists( "%s.stl" % base )
+        blend = changed or not os.path.exists( "%s.blend" % base )
+        unchanged = [ name for ( name, fp ) in fingerprints[ 'objects' ].items() if previous.get( 'objects', {} ).get( name ) == fp ]
+
+    def output():
+        if stl:
+            count = WriteSTLData( "%s.stl" % base, [ mesh for ( name, mesh, color ) in meshes ] )
+            log.write( "Wrote %d triangles to %s.stl\n" % ( count, base ) )
+        else:
+            log.write( "%s.stl is unchanged\n" % base )
+        if snapshot and ( stl or not os.path.exists( "%s.rbs" % base ) ):
+            WriteSnapshotData( "%s.rbs" % base, snapshots )
+        if parts:
+            ExportPartsData( "%s_parts" % base, meshes, skip=unchanged )
+
+    def record():
+        # Only written once every output, including the .blend file, is complete
+        if fingerprints is not None:
+            with open( sidecar, 'w' ) as f:
+                json.dump( fingerprints, f, indent=1, sort_keys=True )
+
+    def background_output():
+        try:
+            output()
+            record()
+        finally:
+            log.close()
+
+    if not russbpy_background_output and not streamed:
+        output()
+    if streamed:
+        # Emit() deleted the objects, so the .blend file would be empty
+        Print( "%s.blend is not saved: the objects were streamed to %s" % ( base, fn ) )
+    elif bpy.context.screen is not None and blend:
         for a in bpy.context.screen.areas:
             if a.type == 'VIEW_3D':
                 for s in a.spaces:
                     if s.type == 'VIEW_3D':
                         s.clip_end = 100000000.0
-        SaveSTL( "%s.stl" % os.path.splitext( sys.argv[ len( sys.argv ) - 1 ] )[0] )
-        bpy.ops.wm.save_as_mainfile( filepath="%s.blend" % os.path.splitext( sys.argv[ len( sys.argv ) - 1 ] )[0] )
+        bpy.ops.wm.save_as_mainfile( filepath="%s.blend" % base )
+    elif not blend:
+        Print( "%s.blend is unchanged" % base )
+    if not russbpy_background_output and not streamed:
+        record()
     SelectNone()
     Elapsed( "DONE" )
-    my_log.close()
+    if russbpy_background_output and not streamed:
+        QueueOutput( background_output )
+    else:
+        log.close()
+    # The writer thread may close the log at any time, so nothing more is logged to it
+    my_log = None
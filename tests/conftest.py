@@ -0,0 +1,6 @@
+#
+# conftest.py - Lets the tests import russbpy from the repository root, without Blender
+#
+import os, sys
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
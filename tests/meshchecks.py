@@ -0,0 +1,34 @@
+#
+# meshchecks.py - Checks of mesh data shared by the tests
+#
+import numpy as np
+
+def EdgeUses( md ):
+    """Return the number of faces using each distinct edge, ignoring direction"""
+    tris = md.triangles().astype( np.int64 )
+    ( a, b ) = ( tris.ravel(), tris[ :, [ 1, 2, 0 ] ].ravel() )
+    keys = np.minimum( a, b ) * len( md.verts ) + np.maximum( a, b )
+    return np.unique( keys, return_counts=True )[1]
+
+def IsClosed( md ):
+    """Return True if every edge of the mesh data is in exactly two faces"""
+    uses = EdgeUses( md )
+    return len( uses ) > 0 and bool( np.all( uses == 2 ) )
+
+def OpenEdges( md ):
+    """Return ( open, doubled ), the numbers of directed edges with no opposite edge, and used more than once
+
+    Both are 0 when the mesh is closed, manifold and wound consistently.
+    """
+    tris = md.triangles().astype( np.int64 )
+    n = len( md.verts )
+    edges = tris.ravel() * n + tris[ :, [ 1, 2, 0 ] ].ravel()
+    opposite = np.sort( tris[ :, [ 1, 2, 0 ] ].ravel() * n + tris.ravel() )
+    found = opposite[ np.minimum( np.searchsorted( opposite, edges ), len( opposite ) - 1 ) ] == edges
+    return ( int( np.sum( ~found ) ), len( edges ) - len( np.unique( edges ) ) )
+
+def Volume( md ):
+    """Return the signed volume of closed mesh data, positive when its normals face outward"""
+    v = md.verts.astype( np.float64 )
+    tris = md.triangles()
+    return np.einsum( 'ij,ij->i', v[ tris[ :, 0 ] ], np.cross( v[ tris[ :, 1 ] ], v[ tris[ :, 2 ] ] ) ).sum() / 6.0
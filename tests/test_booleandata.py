@@ -0,0 +1,109 @@
+#
+# test_booleandata.py - Tests of BooleanData(), the Boolean operations on mesh data
+#
+import math
+
+import numpy as np
+import pytest
+
+from russbpy import *
+from meshchecks import *
+
+OPS = ( 'DIFFERENCE', 'INTERSECT', 'UNION' )
+
+def Moved( md, offset ):
+    """Return a copy of mesh data with its vertices moved by an offset"""
+    moved = md.copy()
+    moved.verts = moved.verts + np.float32( offset )
+    return moved
+
+def Scaled( md, scale, offset=( 0, 0, 0 ) ):
+    """Return a copy of mesh data with its vertices scaled, then moved by an offset"""
+    scaled = md.copy()
+    scaled.verts = scaled.verts * np.float32( scale ) + np.float32( offset )
+    return scaled
+
+def CheckAll( a, b, intersection=None, rel=1e-3 ):
+    """Run all three operations, check each result is closed and manifold, and check their volumes agree
+
+    Return the volumes of the results, by operation
+    """
+    volumes = {}
+    for op in OPS:
+        result = BooleanData( a, b, op )
+        assert OpenEdges( result ) == ( 0, 0 ), op
+        volumes[ op ] = Volume( result )
+        assert volumes[ op ] >= 0, op
+    ( va, vb ) = ( Volume( a ), Volume( b ) )
+    assert volumes[ 'DIFFERENCE' ] + volumes[ 'INTERSECT' ] == pytest.approx( va, rel=rel )
+    assert volumes[ 'UNION' ] == pytest.approx( va + vb - volumes[ 'INTERSECT' ], rel=rel )
+    if intersection is not None:
+        assert volumes[ 'INTERSECT' ] == pytest.approx( intersection, rel=rel )
+    return volumes
+
+def PrismArea( r, vertices ):
+    """Return the area of a regular polygon, the cross-section of CylinderData()"""
+    return 0.5 * vertices * r * r * math.sin( 2.0 * math.pi / vertices )
+
+def test_operands_are_closed():
+    for md in ( CubeData(), CylinderData( 0.5, 3, 64 ), UVSphereData( 1, 32, 16 ), TorusData( 2, 0.5, 48, 24 ) ):
+        assert OpenEdges( md ) == ( 0, 0 )
+        assert Volume( md ) > 0
+
+def test_cube_cube():
+    volumes = CheckAll( CubeData(), Moved( CubeData(), ( 1, 1, 1 ) ), intersection=1.0 )
+    assert volumes[ 'DIFFERENCE' ] == pytest.approx( 7.0, rel=1e-3 )
+    assert volumes[ 'UNION' ] == pytest.approx( 15.0, rel=1e-3 )
+
+def test_cube_cylinder():
+    CheckAll( CubeData(), CylinderData( 0.5, 3, 64 ), intersection=2.0 * PrismArea( 0.5, 64 ) )
+
+def test_flush_slab():
+    # The slab shares the cube's faces at x = 1, y = +-1 and z = +-1
+    slab = Scaled( CubeData(), ( 0.5, 1, 1 ), ( 0.5, 0, 0 ) )
+    volumes = CheckAll( CubeData(), slab, intersection=4.0 )
+    assert volumes[ 'DIFFERENCE' ] == pytest.approx( 4.0, rel=1e-3 )
+
+def test_through_hole():
+    pin = Moved( CylinderData( 0.1, 3, 32 ), ( 0.5, -0.5, 0 ) )
+    volumes = CheckAll( CubeData(), pin, intersection=2.0 * PrismArea( 0.1, 32 ) )
+    assert volumes[ 'DIFFERENCE' ] == pytest.approx( 8.0 - 2.0 * PrismArea( 0.1, 32 ), rel=1e-3 )
+
+def test_tube():
+    tube = BooleanData( CylinderData( 0.3, 3, 48 ), CylinderData( 0.15, 4, 40 ), 'DIFFERENCE' )
+    assert OpenEdges( tube ) == ( 0, 0 )
+    ring = PrismArea( 0.3, 48 ) - PrismArea( 0.15, 40 )
+    assert Volume( tube ) == pytest.approx( 3.0 * ring, rel=1e-3 )
+    CheckAll( CubeData(), Moved( tube, ( 0.45, -0.45, 0 ) ), intersection=2.0 * ring )
+
+def test_torus_cube():
+    CheckAll( TorusData( 2, 0.5, 48, 24 ), Moved( CubeData(), ( 2, 0, 0.5 ) ) )
+
+def test_spheres():
+    CheckAll( UVSphereData( 1, 32, 16 ), Moved( UVSphereData( 1, 40, 20 ), ( 0.5, 0.3, 0.2 ) ) )
+
+def test_disjoint():
+    cube = CubeData()
+    far = Moved( cube, ( 5, 0, 0 ) )
+    assert Volume( BooleanData( cube, far, 'DIFFERENCE' ) ) == pytest.approx( 8.0 )
+    assert BooleanData( cube, far, 'INTERSECT' ).face_count() == 0
+    union = BooleanData( cube, far, 'UNION' )
+    assert OpenEdges( union ) == ( 0, 0 )
+    assert Volume( union ) == pytest.approx( 16.0, rel=1e-3 )
+
+def test_empty_operand():
+    union = BooleanData( MeshData( np.zeros( ( 0, 3 ), dtype=np.float32 ) ), CubeData(), 'UNION' )
+    assert Volume( union ) == pytest.approx( 8.0, rel=1e-3 )
+
+def test_flush_faces_are_offset_by_grow():
+    # The limitation: md2 is grown so flush faces cross, so its faces end up about grow * size off
+    slab = Scaled( CubeData(), ( 0.5, 1, 1 ), ( 0.5, 0, 0 ) )
+    union = BooleanData( CubeData(), slab, 'UNION', grow=1e-5 )
+    assert union.verts[ :, 0 ].max() > 1.0
+    assert union.verts[ :, 0 ].max() == pytest.approx( 1.0, abs=1e-3 )
+
+@pytest.mark.xfail( strict=True, reason="Without growing md2, faces in the same plane have no well-defined crossing" )
+def test_flush_faces_without_grow():
+    slab = Scaled( CubeData(), ( 0.5, 1, 1 ), ( 0.5, 0, 0 ) )
+    for op in OPS:
+        assert OpenEdges( BooleanData( CubeData(), slab, op, grow=0 ) ) == ( 0, 0 ), op
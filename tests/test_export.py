@@ -0,0 +1,187 @@
+#
+# test_export.py - Tests of the instancing exporters' Blender-free parts: MeshInstancesData(), Write3MFData() and WriteGLBData()
+#
+import json
+import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
+import pytest
+
+from russbpy import *
+
+def ReadGLB( fn ):
+    """Return ( gltf, binary ), the JSON and binary chunks of a GLB file"""
+    with open( fn, 'rb' ) as f:
+        data = f.read()
+    ( magic, version, total, length, kind ) = np.frombuffer( data[ :20 ], dtype='<u4' ).tolist()
+    assert ( magic, version, kind ) == ( 0x46546C67, 2, 0x4E4F534A )
+    assert total == len( data )
+    assert length % 4 == 0
+    gltf = json.loads( data[ 20:20 + length ].decode( 'utf-8' ) )
+    binary = b''
+    if 20 + length < len( data ):
+        ( size, kind ) = np.frombuffer( data[ 20 + length:28 + length ], dtype='<u4' ).tolist()
+        assert kind == 0x004E4942
+        binary = data[ 28 + length:28 + length + size ]
+        assert len( binary ) == size == gltf[ 'buffers' ][0][ 'byteLength' ]
+    return ( gltf, binary )
+
+def Accessor( gltf, binary, i ):
+    """Return the data of a glTF accessor as an array"""
+    a = gltf[ 'accessors' ][ i ]
+    view = gltf[ 'bufferViews' ][ a[ 'bufferView' ] ]
+    dtype = { 5126: '<f4', 5123: '<u2', 5125: '<u4' }[ a[ 'componentType' ] ]
+    width = 3 if a[ 'type' ] == 'VEC3' else 1
+    data = np.frombuffer( binary, dtype=dtype, count=a[ 'count' ] * width, offset=view[ 'byteOffset' ] )
+    return data.reshape( -1, 3 ) if width == 3 else data
+
+NS = '{http://schemas.microsoft.com/3dmanufacturing/core/2015/02}'
+
+def Read3MF( fn ):
+    """Return ( meshes, components ), the ( verts, tris ) of each object of a 3MF file by id,
+    and the ( object id, 4 x 4 matrix ) of each component of its built assembly"""
+    with zipfile.ZipFile( fn ) as z:
+        assert '[Content_Types].xml' in z.namelist() and '_rels/.rels' in z.namelist()
+        model = ET.fromstring( z.read( '3D/3dmodel.model' ) )
+    assert model.get( 'unit' ) == 'millimeter'
+    meshes = {}
+    for ob in model.iter( NS + 'object' ):
+        mesh = ob.find( NS + 'mesh' )
+        if mesh is not None:
+            verts = [ [ float( v.get( k ) ) for k in 'xyz' ] for v in mesh.iter( NS + 'vertex' ) ]
+            tris = [ [ int( t.get( k ) ) for k in ( 'v1', 'v2', 'v3' ) ] for t in mesh.iter( NS + 'triangle' ) ]
+            meshes[ int( ob.get( 'id' ) ) ] = ( np.array( verts ).reshape( -1, 3 ), np.array( tris, dtype=int ).reshape( -1, 3 ) )
+    items = list( model.iter( NS + 'item' ) )
+    assert len( items ) == 1
+    assembly = [ ob for ob in model.iter( NS + 'object' ) if ob.get( 'id' ) == items[0].get( 'objectid' ) ][0]
+    components = []
+    for c in assembly.iter( NS + 'component' ):
+        m = np.identity( 4 )
+        m[ :3, : ] = np.array( [ float( x ) for x in c.get( 'transform' ).split() ] ).reshape( 4, 3 ).T
+        components.append( ( int( c.get( 'objectid' ) ), m ) )
+    return ( meshes, components )
+
+def Cube( offset=( 0, 0, 0 ) ):
+    """Return the ( verts, tris ) of CubeData(), as triangles, with the vertices moved by offset"""
+    md = CubeData()
+    return ( md.verts + np.float32( offset ), md.triangles() )
+
+def test_instances_of_moved_copies():
+    ( verts, tris ) = Cube()
+    ( moved, _ ) = Cube( ( 5, 0, 0 ) )
+    parts = [ ( verts, tris, Translation( ( 0, 0, 1 ) ) ), ( moved, tris, Transformation( np.identity( 4 ) ) ) ]
+    ( meshes, placements ) = MeshInstancesData( parts )
+    assert len( meshes ) == 1
+    assert [ i for ( i, t ) in placements ] == [ 0, 0 ]
+    # Each placement takes the shared mesh to its part's world coordinates
+    for ( ( v, tr, t ), ( i, placement ) ) in zip( parts, placements ):
+        assert np.allclose( placement.apply( meshes[ i ][0].astype( np.float64 ) ), t.apply( v.astype( np.float64 ) ), atol=1e-6 )
+
+def test_instances_within_tolerance():
+    ( verts, tris ) = Cube()
+    near = verts.copy()
+    near[ 0 ] += np.float32( 1e-6 )
+    far = verts.copy()
+    far[ 0 ] += np.float32( 1e-3 )
+    identity = Transformation( np.identity( 4 ) )
+    ( meshes, placements ) = MeshInstancesData( [ ( verts, tris, identity ), ( near, tris, identity ), ( far, tris, identity ) ] )
+    assert [ i for ( i, t ) in placements ] == [ 0, 0, 1 ]
+    assert len( meshes ) == 2
+
+def test_instances_differ_in_triangles():
+    ( verts, tris ) = Cube()
+    identity = Transformation( np.identity( 4 ) )
+    ( meshes, placements ) = MeshInstancesData( [ ( verts, tris, identity ), ( verts, tris[ :, ::-1 ], identity ) ] )
+    assert [ i for ( i, t ) in placements ] == [ 0, 1 ]
+
+def test_3mf( tmpdir ):
+    fn = str( tmpdir.join( 'two.3mf' ) )
+    ( verts, tris ) = Cube()
+    sphere = UVSphereData( 1, 8, 4 )
+    t = Translation( ( 1, 2, 3 ) )
+    meshes = [ ( verts, tris ), ( sphere.verts, sphere.triangles() ) ]
+    assert Write3MFData( fn, meshes, [ ( 0, t ), ( 1, t ), ( 0, Translation( ( 5, 0, 0 ) ) ) ] ) == 2 * len( tris ) + len( sphere.triangles() )
+    ( read, components ) = Read3MF( fn )
+    assert len( read ) == 2
+    ids = [ i for ( i, m ) in components ]
+    assert ids[ 0 ] == ids[ 2 ] != ids[ 1 ]
+    for ( ( v, tr ), i ) in zip( meshes, ids ):
+        assert np.allclose( read[ i ][0], v, atol=1e-6 )
+        assert np.array_equal( read[ i ][1], tr )
+    assert np.allclose( components[ 0 ][1], t.array )
+    assert np.allclose( components[ 2 ][1][ :3, 3 ], ( 5, 0, 0 ) )
+
+def test_3mf_rotation( tmpdir ):
+    # 3MF transforms points as rows, so the matrix read back must still move the mesh as the Transformation did
+    fn = str( tmpdir.join( 'turned.3mf' ) )
+    ( verts, tris ) = Cube()
+    t = Translation( ( 1, 0, 0 ) ) * Transformation( [ [ 0, -1, 0, 0 ], [ 1, 0, 0, 0 ], [ 0, 0, 1, 0 ], [ 0, 0, 0, 1 ] ] )
+    Write3MFData( fn, [ ( verts, tris ) ], [ ( 0, t ) ] )
+    ( read, components ) = Read3MF( fn )
+    assert np.allclose( components[0][1], t.array )
+
+def test_3mf_stream_dedups( tmpdir ):
+    fn = str( tmpdir.join( 'stream.3mf' ) )
+    ( verts, tris ) = Cube()
+    stream = MeshStream( fn )
+    for x in range( 3 ):
+        stream.write( verts, tris, Translation( ( x, 0, 0 ) ) )
+    assert stream.close() == 3 * len( tris )
+    ( read, components ) = Read3MF( fn )
+    assert len( read ) == 1
+    assert [ m[ 0, 3 ] for ( i, m ) in components ] == [ 0, 1, 2 ]
+
+def test_glb_mesh( tmpdir ):
+    fn = str( tmpdir.join( 'cube.glb' ) )
+    cube = CubeData()
+    assert WriteGLBData( fn, [ cube ], [ ( 0, None, None, 'cube' ) ] ) == len( open( fn, 'rb' ).read() )
+    ( gltf, binary ) = ReadGLB( fn )
+    assert gltf[ 'asset' ][ 'version' ] == '2.0'
+    root = gltf[ 'nodes' ][0]
+    assert root[ 'children' ] == [ 1 ]
+    assert gltf[ 'nodes' ][1] == { 'name': 'cube', 'mesh': 0 }
+    primitive = gltf[ 'meshes' ][0][ 'primitives' ][0]
+    verts = Accessor( gltf, binary, primitive[ 'attributes' ][ 'POSITION' ] )
+    indices = Accessor( gltf, binary, primitive[ 'indices' ] )
+    assert np.array_equal( verts, cube.verts )
+    assert indices.dtype == np.dtype( '<u2' )
+    assert np.array_equal( indices.reshape( -1, 3 ), cube.triangles() )
+    assert gltf[ 'accessors' ][ primitive[ 'attributes' ][ 'POSITION' ] ][ 'min' ] == [ -1, -1, -1 ]
+
+def test_glb_instances_share_buffers( tmpdir ):
+    fn = str( tmpdir.join( 'copies.glb' ) )
+    move = np.identity( 4 )
+    move[ :3, 3 ] = ( 5, 0, 0 )
+    nodes = [ ( 0, None, ( 1, 0, 0 ), 'a' ), ( 0, move, ( 1, 0, 0 ), 'b' ), ( 0, None, ( 0, 0, 1 ), 'c' ), ( 1, None, None, 'd' ) ]
+    WriteGLBData( fn, [ CubeData(), ( UVSphereData().verts, UVSphereData().triangles() ) ], nodes )
+    ( gltf, binary ) = ReadGLB( fn )
+    # One pair of accessors per mesh, however many nodes use it
+    assert len( gltf[ 'accessors' ] ) == 4
+    ( a, b, c, d ) = gltf[ 'nodes' ][ 1: ]
+    assert a[ 'mesh' ] == b[ 'mesh' ]
+    assert c[ 'mesh' ] != a[ 'mesh' ]
+    assert gltf[ 'meshes' ][ c[ 'mesh' ] ][ 'primitives' ][0][ 'indices' ] == gltf[ 'meshes' ][ a[ 'mesh' ] ][ 'primitives' ][0][ 'indices' ]
+    assert len( gltf[ 'materials' ] ) == 2
+    assert 'material' not in gltf[ 'meshes' ][ d[ 'mesh' ] ][ 'primitives' ][0]
+    # glTF matrices are column by column
+    assert b[ 'matrix' ][ 12:15 ] == [ 5, 0, 0 ]
+    assert 'matrix' not in a
+
+def test_glb_wide_indices( tmpdir ):
+    fn = str( tmpdir.join( 'big.glb' ) )
+    verts = np.zeros( ( 70000, 3 ), dtype=np.float32 )
+    verts[ :, 0 ] = np.arange( 70000 )
+    tris = np.array( [ ( 0, 1, 69999 ) ] )
+    WriteGLBData( fn, [ ( verts, tris ) ], [ ( 0, None, None, None ) ] )
+    ( gltf, binary ) = ReadGLB( fn )
+    indices = Accessor( gltf, binary, gltf[ 'meshes' ][0][ 'primitives' ][0][ 'indices' ] )
+    assert indices.dtype == np.dtype( '<u4' )
+    assert indices.tolist() == [ 0, 1, 69999 ]
+
+def test_glb_empty_mesh( tmpdir ):
+    fn = str( tmpdir.join( 'empty.glb' ) )
+    WriteGLBData( fn, [ ( np.zeros( ( 0, 3 ) ), np.zeros( ( 0, 3 ), dtype=np.int32 ) ) ], [ ( 0, None, None, 'empty' ) ] )
+    ( gltf, binary ) = ReadGLB( fn )
+    assert gltf[ 'nodes' ][1] == { 'name': 'empty' }
+    assert binary == b''
@@ -0,0 +1,116 @@
+#
+# test_generators.py - Tests that the vectorized generators build closed meshes, wound outward
+#
+import math
+
+import numpy as np
+import pytest
+
+from russbpy import *
+from meshchecks import *
+
+def CheckSolid( md ):
+    """Check that mesh data is closed, manifold and oriented, with a positive volume"""
+    assert IsClosed( md )
+    assert OpenEdges( md ) == ( 0, 0 )
+    assert md.oriented
+    assert Volume( md ) > 0
+
+def PolygonArea( r, sides ):
+    """Return the area of a regular polygon of a given circumradius"""
+    return 0.5 * sides * r * r * math.sin( 2.0 * math.pi / sides )
+
+def test_parametric_layout():
+    md = ParametricSurfaceData( lambda u, v: ( u, v, u * v ), [ 0.0, 1.0, 2.0 ], [ 0.0, 0.5 ], v_closed=False )
+    assert md.vertex_count() == 6
+    for i in range( 3 ):
+        for j in range( 2 ):
+            assert md.verts[ i * 2 + j ].tolist() == [ [ 0.0, 1.0, 2.0 ][ i ], [ 0.0, 0.5 ][ j ], [ 0.0, 1.0, 2.0 ][ i ] * [ 0.0, 0.5 ][ j ] ]
+    assert md.face_count() == 2
+    # One step along u, then one along v
+    face = md.face_list()[ 0 ]
+    k = face.index( 0 )
+    assert face[ k: ] + face[ :k ] == ( 0, 2, 3, 1 )
+
+def test_parametric_closed_surface():
+    # A torus, closed in both directions, with df/du x df/dv facing out
+    def f( u, v ):
+        ( a, b ) = ( 2.0 * math.pi * u, 2.0 * math.pi * v )
+        return ( ( 2 + 0.5 * np.cos( b ) ) * np.cos( a ), ( 2 + 0.5 * np.cos( b ) ) * np.sin( a ), 0.5 * np.sin( b ) )
+    md = ParametricSurfaceData( f, 24, 12, u_closed=True, v_closed=True, oriented=True )
+    assert md.vertex_count() == 24 * 12
+    assert md.face_count() == 24 * 12
+    CheckSolid( md )
+
+def test_parametric_poles():
+    # A cylinder wall, capped at each end with a fan of triangles
+    f = lambda u, v: ( np.cos( 2.0 * math.pi * v ), -np.sin( 2.0 * math.pi * v ), u )
+    md = ParametricSurfaceData( f, 2, 16, start_pole=( 0, 0, 0 ), end_pole=( 0, 0, 1 ), oriented=True )
+    assert md.vertex_count() == 2 * 16 + 2
+    assert md.verts[ -2 ].tolist() == [ 0, 0, 0 ] and md.verts[ -1 ].tolist() == [ 0, 0, 1 ]
+    CheckSolid( md )
+    assert Volume( md ) == pytest.approx( PolygonArea( 1, 16 ), rel=1e-5 )
+    tris = ParametricSurfaceData( f, 2, 16, start_pole=( 0, 0, 0 ), end_pole=( 0, 0, 1 ), quads=False, oriented=True )
+    assert np.all( tris.loop_totals == 3 )
+    assert Volume( tris ) == pytest.approx( Volume( md ), rel=1e-6 )
+
+@pytest.mark.parametrize( 'quads', [ True, False ] )
+def test_mesh_sphere( quads ):
+    md = MeshSphereData( quads=quads )
+    CheckSolid( md )
+    assert np.allclose( np.linalg.norm( md.verts, axis=1 ), 1.0, atol=1e-6 )
+
+@pytest.mark.parametrize( 'quads', [ True, False ] )
+def test_mesh_torus( quads ):
+    md = MeshTorusData( quads=quads )
+    CheckSolid( md )
+    assert md.vertex_count() == 10 * 5
+
+@pytest.mark.parametrize( 'quads', [ True, False ] )
+def test_mesh_cylinder( quads ):
+    md = MeshCylinderData( r=1.0, h=5.0, quads=quads )
+    CheckSolid( md )
+    assert Volume( md ) == pytest.approx( 5.0 * PolygonArea( 1.0, 10 ), rel=1e-5 )
+
+@pytest.mark.parametrize( 'quads', [ True, False ] )
+def test_mesh_rectangular_prism( quads ):
+    md = MeshRectangularPrismData( 2, 3, 4, 5, 6, 7, quads=quads )
+    CheckSolid( md )
+    # The lattice is welded: only the surface points of the ( 3 + 1 ) x ( 5 + 1 ) x ( 7 + 1 ) grid are kept
+    assert md.vertex_count() == 4 * 6 * 8 - 2 * 4 * 6
+    assert md.face_count() == 2 * ( 3 * 5 + 5 * 7 + 3 * 7 ) * ( 1 if quads else 2 )
+    assert Volume( md ) == pytest.approx( 48.0 )
+    assert md.verts.min( axis=0 ).tolist() == [ -1, -2, -3 ]
+    assert md.verts.max( axis=0 ).tolist() == [ 1, 2, 3 ]
+
+def test_mesh_rectangular_prism_one_face_a_side():
+    md = MeshRectangularPrismData( 1, 1, 1, 1, 1, 1 )
+    CheckSolid( md )
+    assert ( md.vertex_count(), md.face_count() ) == ( 8, 6 )
+
+def test_sweep():
+    # A square swept straight up Z, clockwise about the direction of travel, and scaled halfway up
+    path = np.array( [ ( 0, 0, 0 ), ( 0, 0, 1 ), ( 0, 0, 2 ) ], dtype=np.float64 )
+    x_axes = np.tile( ( 1.0, 0.0, 0.0 ), ( 3, 1 ) )
+    y_axes = np.tile( ( 0.0, 1.0, 0.0 ), ( 3, 1 ) )
+    profile = [ ( -1, -1 ), ( -1, 1 ), ( 1, 1 ), ( 1, -1 ) ]
+    md = SweepData( path, x_axes, y_axes, profile, start_pole=( 0, 0, 0 ), end_pole=( 0, 0, 2 ), oriented=True )
+    CheckSolid( md )
+    assert Volume( md ) == pytest.approx( 8.0 )
+    scaled = SweepData( path, x_axes, y_axes, profile, scales=[ 1, 2, 1 ], start_pole=( 0, 0, 0 ), end_pole=( 0, 0, 2 ), oriented=True )
+    CheckSolid( scaled )
+    assert scaled.verts[ 4:8, :2 ].tolist() == ( 2 * np.array( profile ) ).tolist()
+
+@pytest.mark.parametrize( 'capped', [ 1, 2 ] )
+def test_spring( capped ):
+    md = SpringData( capped=capped )
+    CheckSolid( md )
+    # Roughly Pappus: the cross-section's area times the length of the path its center follows,
+    # 10 straight segments a turn
+    length = 5 * 10 * math.hypot( 2.0 * math.sin( math.pi / 10 ), 1.0 / 10 )
+    assert Volume( md ) == pytest.approx( PolygonArea( 0.1, 10 ) * length, rel=0.1 )
+
+def test_spring_uncapped():
+    md = SpringData( capped=0 )
+    assert not IsClosed( md )
+    assert OpenEdges( md ) == ( 2 * 10, 0 )
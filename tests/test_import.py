@@ -0,0 +1,138 @@
+#
+# test_import.py - Tests of ReadSTL(), ReadOBJ(), ReadPLY() and ReadMesh(), the mesh file importers
+#
+import struct
+
+import numpy as np
+import pytest
+
+from russbpy import *
+
+def RandomMesh( verts=50, faces=200, seed=1 ):
+    """Return ( verts, faces ), random float32 vertices and a list of random faces of 3 to 6 vertices"""
+    rng = np.random.RandomState( seed )
+    v = rng.random_sample( ( verts, 3 ) ).astype( np.float32 )
+    f = [ rng.randint( 0, verts, rng.randint( 3, 7 ) ).tolist() for i in range( faces ) ]
+    return ( v, f )
+
+def WriteBinarySTL( fn, verts, tris ):
+    """Write the triangles of a mesh to a binary STL file, with zero normals"""
+    records = np.zeros( len( tris ), dtype=[ ( 'normal', '<f4', ( 3, ) ), ( 'v', '<f4', ( 3, 3 ) ), ( 'attr', '<u2' ) ] )
+    records[ 'v' ] = verts[ tris ]
+    with open( fn, 'wb' ) as f:
+        f.write( b'test'.ljust( 80, b' ' ) )
+        f.write( np.array( [ len( tris ) ], dtype='<u4' ).tobytes() )
+        f.write( records.tobytes() )
+
+def CheckMesh( md, verts, faces ):
+    """Check that mesh data has the given vertices and faces, in order"""
+    assert np.allclose( md.verts, verts )
+    assert md.loop_totals.tolist() == [ len( f ) for f in faces ]
+    assert md.loops.tolist() == [ i for f in faces for i in f ]
+
+def PLYHeader( format, verts, faces, count_type='uchar', index_type='int', extra='' ):
+    """Return the header of a PLY file of float vertices and a list of faces"""
+    return ( "ply\nformat %s 1.0\nelement vertex %d\nproperty float x\nproperty float y\nproperty float z\n"
+             "element face %d\nproperty list %s %s vertex_indices\n%send_header\n" % ( format, verts, faces, count_type, index_type, extra ) )
+
+def test_stl_ascii( tmpdir ):
+    fn = str( tmpdir.join( 'tri.stl' ) )
+    with open( fn, 'w' ) as f:
+        f.write( "solid test\n" )
+        for tri in ( ( ( 0, 0, 0 ), ( 1, 0, 0 ), ( 0, 1, 0 ) ), ( ( 1, 0, 0 ), ( 1, 1, 0 ), ( 0, 1, 0 ) ) ):
+            f.write( "facet normal 0 0 1\n outer loop\n" )
+            for p in tri:
+                f.write( "  vertex %g %g %g\n" % p )
+            f.write( " endloop\nendfacet\n" )
+        f.write( "endsolid test\n" )
+    md = ReadSTL( fn )
+    assert md.vertex_count() == 4
+    assert md.face_count() == 2
+    assert ReadSTL( fn, weld=False ).vertex_count() == 6
+
+def test_stl_binary_welds( tmpdir ):
+    fn = str( tmpdir.join( 'cube.stl' ) )
+    cube = CubeData()
+    WriteBinarySTL( fn, cube.verts, cube.triangles() )
+    md = ReadSTL( fn )
+    assert md.vertex_count() == 8
+    assert np.array_equal( md.verts[ md.triangles() ], cube.verts[ cube.triangles() ] )
+    unwelded = ReadSTL( fn, weld=False )
+    assert unwelded.vertex_count() == 3 * unwelded.face_count()
+
+def test_obj( tmpdir ):
+    fn = str( tmpdir.join( 'mesh.obj' ) )
+    with open( fn, 'w' ) as f:
+        f.write( "# comment\nmtllib x.mtl\nv 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0 1.0\nvt 0 0\nvn 0 0 1\n" )
+        f.write( "g quad\nf 1/1/1 2/1/1 3/1/1 4/1/1\n" )
+        f.write( "v 0 0 1\nf -5 -4 -1\nf 2//1 3//1 5//1\n" )
+    md = ReadOBJ( fn )
+    CheckMesh( md, [ ( 0, 0, 0 ), ( 1, 0, 0 ), ( 1, 1, 0 ), ( 0, 1, 0 ), ( 0, 0, 1 ) ], [ [ 0, 1, 2, 3 ], [ 0, 1, 4 ], [ 1, 2, 4 ] ] )
+
+def test_ply_ascii( tmpdir ):
+    fn = str( tmpdir.join( 'mesh.ply' ) )
+    ( verts, faces ) = RandomMesh()
+    with open( fn, 'w' ) as f:
+        f.write( PLYHeader( 'ascii', len( verts ), len( faces ), extra='property uchar red\n' ) )
+        for v in verts:
+            f.write( "%r %r %r\n" % tuple( float( x ) for x in v ) )
+        for ( k, face ) in enumerate( faces ):
+            f.write( "%d %s %d\n" % ( len( face ), ' '.join( str( i ) for i in face ), k % 256 ) )
+    CheckMesh( ReadPLY( fn ), verts, faces )
+
+@pytest.mark.parametrize( 'order,format', [ ( '<', 'binary_little_endian' ), ( '>', 'binary_big_endian' ) ] )
+@pytest.mark.parametrize( 'count_type,index_type,count_code,index_code', [ ( 'uchar', 'int', 'B', 'i' ), ( 'ushort', 'uint', 'H', 'I' ), ( 'int', 'int', 'i', 'i' ) ] )
+def test_ply_binary( tmpdir, order, format, count_type, index_type, count_code, index_code ):
+    fn = str( tmpdir.join( 'mesh.ply' ) )
+    ( verts, faces ) = RandomMesh()
+    with open( fn, 'wb' ) as f:
+        f.write( PLYHeader( format, len( verts ), len( faces ), count_type, index_type ).encode( 'ascii' ) )
+        f.write( verts.astype( order + 'f4' ).tobytes() )
+        for face in faces:
+            f.write( struct.pack( order + count_code + index_code * len( face ), len( face ), *face ) )
+    CheckMesh( ReadPLY( fn ), verts, faces )
+
+def test_ply_binary_triangles( tmpdir ):
+    fn = str( tmpdir.join( 'cube.ply' ) )
+    cube = CubeData()
+    tris = cube.triangles()
+    records = np.zeros( len( tris ), dtype=[ ( 'n', 'u1' ), ( 'v', '<i4', ( 3, ) ) ] )
+    records[ 'n' ] = 3
+    records[ 'v' ] = tris
+    with open( fn, 'wb' ) as f:
+        f.write( PLYHeader( 'binary_little_endian', len( cube.verts ), len( tris ) ).encode( 'ascii' ) )
+        f.write( cube.verts.astype( '<f4' ).tobytes() )
+        f.write( records.tobytes() )
+    CheckMesh( ReadPLY( fn ), cube.verts, tris.tolist() )
+
+def test_ply_binary_large( tmpdir ):
+    # More than a megabyte of faces of mixed sizes, so they are found a window at a time
+    fn = str( tmpdir.join( 'large.ply' ) )
+    rng = np.random.RandomState( 2 )
+    verts = rng.random_sample( ( 50, 3 ) ).astype( np.float32 )
+    sizes = rng.randint( 3, 5, 100000 )
+    loops = rng.randint( 0, 50, sizes.sum() ).astype( '<i4' )
+    starts = np.cumsum( sizes ) - sizes
+    data = b''.join( struct.pack( '<B', n ) + loops[ s:s + n ].tobytes() for ( n, s ) in zip( sizes.tolist(), starts.tolist() ) )
+    with open( fn, 'wb' ) as f:
+        f.write( PLYHeader( 'binary_little_endian', len( verts ), len( sizes ) ).encode( 'ascii' ) )
+        f.write( verts.tobytes() )
+        f.write( data )
+    md = ReadPLY( fn )
+    assert np.array_equal( md.loop_totals, sizes )
+    assert np.array_equal( md.loops, loops )
+
+def test_ply_without_format( tmpdir ):
+    fn = str( tmpdir.join( 'bad.ply' ) )
+    with open( fn, 'w' ) as f:
+        f.write( "ply\nelement vertex 0\nend_header\n" )
+    with pytest.raises( ValueError ):
+        ReadPLY( fn )
+
+def test_read_mesh( tmpdir ):
+    fn = str( tmpdir.join( 'cube.stl' ) )
+    cube = CubeData()
+    WriteBinarySTL( fn, cube.verts, cube.triangles() )
+    assert ReadMesh( fn ).face_count() == len( cube.triangles() )
+    with pytest.raises( ValueError ):
+        ReadMesh( str( tmpdir.join( 'cube.dae' ) ) )
@@ -0,0 +1,90 @@
+#
+# test_incremental.py - Tests of the fingerprints and part files behind Fini( incremental=True )
+#
+import json, os
+
+import numpy as np
+
+from russbpy import *
+
+def Part( name, offset=( 0, 0, 0 ), color=None ):
+    """Return a ( name, ( verts, tris ), color ) part of a cube moved by an offset"""
+    cube = CubeData()
+    return ( name, ( cube.verts + np.float32( offset ), cube.triangles() ), color )
+
+def test_mesh_fingerprint():
+    ( name, ( verts, tris ), color ) = Part( 'a' )
+    fp = MeshFingerprint( verts, tris )
+    assert fp == MeshFingerprint( verts.copy(), tris.copy() )
+    assert fp == MeshFingerprint( verts.astype( np.float64 ), tris.astype( np.int64 ) )
+    moved = verts.copy()
+    moved[ 0, 0 ] += 1e-3
+    assert fp != MeshFingerprint( moved, tris )
+    assert fp != MeshFingerprint( verts, tris[ :, [ 0, 2, 1 ] ] )
+    assert fp != MeshFingerprint( verts, tris, ( 1, 0, 0 ) )
+    assert MeshFingerprint( verts, tris, ( 1, 0, 0 ) ) == MeshFingerprint( verts, tris, ( 1, 0, 0, 1 ) )
+
+def test_negative_zero():
+    verts = np.array( [ ( 0.0, 1, 2 ), ( 1, 0, 0 ), ( 0, 1, 0 ) ], dtype=np.float32 )
+    negative = verts.copy()
+    negative[ 0, 0 ] = -0.0
+    assert MeshFingerprint( verts, [ ( 0, 1, 2 ) ] ) == MeshFingerprint( negative, [ ( 0, 1, 2 ) ] )
+
+def test_scene_fingerprints():
+    parts = [ Part( 'a' ), Part( 'b', ( 5, 0, 0 ) ) ]
+    fp = SceneFingerprints( parts )
+    assert sorted( fp[ 'objects' ] ) == [ 'a', 'b' ]
+    assert fp == SceneFingerprints( [ Part( 'a' ), Part( 'b', ( 5, 0, 0 ) ) ] )
+    changed = SceneFingerprints( [ Part( 'a' ), Part( 'b', ( 6, 0, 0 ) ) ] )
+    assert changed[ 'scene' ] != fp[ 'scene' ]
+    assert changed[ 'objects' ][ 'a' ] == fp[ 'objects' ][ 'a' ]
+    assert changed[ 'objects' ][ 'b' ] != fp[ 'objects' ][ 'b' ]
+    assert SceneFingerprints( [ Part( 'a' ), Part( 'c', ( 5, 0, 0 ) ) ] )[ 'scene' ] != fp[ 'scene' ]
+
+def test_read_json( tmpdir ):
+    assert ReadJSON( str( tmpdir.join( 'missing.json' ) ) ) == {}
+    bad = tmpdir.join( 'bad.json' )
+    bad.write( '{ not json' )
+    assert ReadJSON( str( bad ) ) == {}
+    good = tmpdir.join( 'good.json' )
+    good.write( '{ "a": 1 }' )
+    assert ReadJSON( str( good ) ) == { 'a': 1 }
+
+def test_export_parts( tmpdir ):
+    directory = str( tmpdir.join( 'parts' ) )
+    listing = ExportPartsData( directory, [ Part( 'a' ), Part( 'b/c', ( 5, 0, 0 ) ) ], threads=2 )
+    assert [ part[ 'file' ] for part in listing[ 'parts' ] ] == [ 'a.stl', 'b_c.stl' ]
+    assert listing[ 'parts' ][1][ 'min' ] == [ 4, -1, -1 ]
+    assert listing[ 'parts' ][1][ 'triangles' ] == 12
+    assert os.path.getsize( os.path.join( directory, 'a.stl' ) ) == 84 + 50 * 12
+    with open( os.path.join( directory, 'manifest.json' ) ) as f:
+        assert json.load( f ) == listing
+
+def test_export_parts_skips_unchanged( tmpdir ):
+    directory = str( tmpdir.join( 'parts' ) )
+    ExportPartsData( directory, [ Part( 'a' ), Part( 'b' ) ] )
+    for name in ( 'a', 'b' ):
+        with open( os.path.join( directory, name + '.stl' ), 'wb' ) as f:
+            f.write( b'old' )
+    ExportPartsData( directory, [ Part( 'a' ), Part( 'b' ) ], skip=[ 'a' ] )
+    assert open( os.path.join( directory, 'a.stl' ), 'rb' ).read() == b'old'
+    assert os.path.getsize( os.path.join( directory, 'b.stl' ) ) == 84 + 50 * 12
+
+def test_export_parts_removes_stale_files( tmpdir ):
+    directory = str( tmpdir.join( 'parts' ) )
+    ExportPartsData( directory, [ Part( 'a' ), Part( 'b' ) ] )
+    ExportPartsData( directory, [ Part( 'a' ) ] )
+    assert sorted( os.listdir( directory ) ) == [ 'a.stl', 'manifest.json' ]
+
+def test_export_parts_glb( tmpdir ):
+    directory = str( tmpdir.join( 'parts' ) )
+    listing = ExportPartsData( directory, [ Part( 'a', color=( 1, 0, 0 ) ) ], format='glb' )
+    assert listing[ 'format' ] == 'glb'
+    with open( os.path.join( directory, 'a.glb' ), 'rb' ) as f:
+        assert f.read( 4 ) == b'glTF'
+
+def test_export_parts_colliding_names( tmpdir ):
+    directory = str( tmpdir.join( 'parts' ) )
+    listing = ExportPartsData( directory, [ Part( 'a/b' ), Part( 'a_b' ), Part( 'A_B' ) ] )
+    assert [ part[ 'file' ] for part in listing[ 'parts' ] ] == [ 'a_b.stl', 'a_b_2.stl', 'A_B_3.stl' ]
+    assert sorted( os.listdir( directory ) ) == [ 'A_B_3.stl', 'a_b.stl', 'a_b_2.stl', 'manifest.json' ]
@@ -0,0 +1,113 @@
+#
+# test_meshdata.py - Tests of MeshData and the *Data() mesh builders
+#
+import numpy as np
+import pytest
+
+from russbpy import *
+from meshchecks import *
+
+QUAD = [ ( 0, 0, 0 ), ( 1, 0, 0 ), ( 1, 1, 0 ), ( 0, 1, 0 ) ]
+
+def test_faces_of_one_size():
+    md = MeshData( QUAD, np.array( [ ( 0, 1, 2 ), ( 0, 2, 3 ) ] ) )
+    assert md.verts.dtype == np.float32 and md.verts.shape == ( 4, 3 )
+    assert md.loops.dtype == np.int32 and md.loops.tolist() == [ 0, 1, 2, 0, 2, 3 ]
+    assert md.loop_starts.tolist() == [ 0, 3 ]
+    assert md.loop_totals.tolist() == [ 3, 3 ]
+    assert md.vertex_count() == 4 and md.face_count() == 2
+
+def test_faces_of_mixed_sizes():
+    md = MeshData( QUAD + [ ( 2, 0, 0 ) ], [ ( 0, 1, 2, 3 ), ( 1, 4, 2 ) ] )
+    assert md.loops.tolist() == [ 0, 1, 2, 3, 1, 4, 2 ]
+    assert md.loop_starts.tolist() == [ 0, 4 ]
+    assert md.loop_totals.tolist() == [ 4, 3 ]
+    assert md.face_list() == [ ( 0, 1, 2, 3 ), ( 1, 4, 2 ) ]
+
+def test_flat_faces():
+    md = MeshData( QUAD + [ ( 2, 0, 0 ) ], [ 0, 1, 2, 3, 1, 4, 2 ], [ 0, 4 ] )
+    assert md.loop_totals.tolist() == [ 4, 3 ]
+    assert md.face_list() == [ ( 0, 1, 2, 3 ), ( 1, 4, 2 ) ]
+
+def test_no_faces():
+    md = MeshData( QUAD, edges=[ ( 0, 1 ), ( 1, 2 ) ] )
+    assert md.face_count() == 0
+    assert md.triangles().shape == ( 0, 3 )
+    assert md.edges.tolist() == [ [ 0, 1 ], [ 1, 2 ] ]
+
+def test_triangles_are_fans():
+    md = MeshData( QUAD + [ ( 2, 0, 0 ) ], [ ( 0, 1, 2, 3 ), ( 1, 4, 2 ) ] )
+    assert md.triangles().tolist() == [ [ 0, 1, 2 ], [ 0, 2, 3 ], [ 1, 4, 2 ] ]
+
+def test_copy_is_deep():
+    md = MeshData( QUAD, [ ( 0, 1, 2, 3 ) ] )
+    copy = md.copy()
+    copy.verts[ 0 ] = ( 5, 5, 5 )
+    copy.loops[ 0 ] = 3
+    assert md.verts[ 0 ].tolist() == [ 0, 0, 0 ]
+    assert md.loops[ 0 ] == 0
+    assert copy.face_list() == [ ( 3, 1, 2, 3 ) ]
+
+def test_ngon_prism():
+    md = NGonPrismData( 1, 1, 8 )
+    assert md.vertex_count() == 18
+    assert IsClosed( md )
+    assert OpenEdges( md ) == ( 0, 0 )
+    assert Volume( md ) == pytest.approx( 2.0 * 2 ** 0.5, rel=1e-5 )
+    assert not IsClosed( NGonPrismData( 1, 1, 8, open=True ) )
+
+def test_mesh_sphere():
+    md = MeshSphereData()
+    assert IsClosed( md )
+    assert Volume( md ) > 0
+
+def test_flip():
+    md = MeshData( QUAD + [ ( 2, 0, 0 ) ], [ ( 0, 1, 2, 3 ), ( 1, 4, 2 ) ] )
+    md.flip( [ False, True ] )
+    assert md.face_list() == [ ( 0, 1, 2, 3 ), ( 2, 4, 1 ) ]
+    md.flip()
+    assert md.face_list() == [ ( 3, 2, 1, 0 ), ( 1, 4, 2 ) ]
+
+def test_half_edges():
+    ( a, b, face ) = MeshData( QUAD + [ ( 2, 0, 0 ) ], [ ( 0, 1, 2, 3 ), ( 1, 4, 2 ) ] ).half_edges()
+    assert list( zip( a.tolist(), b.tolist(), face.tolist() ) ) == [ ( 0, 1, 0 ), ( 1, 2, 0 ), ( 2, 3, 0 ), ( 3, 0, 0 ),
+                                                                     ( 1, 4, 1 ), ( 4, 2, 1 ), ( 2, 1, 1 ) ]
+
+def test_connected_components():
+    comp = ConnectedComponents( 6, np.array( [ ( 0, 1 ), ( 2, 3 ), ( 1, 4 ) ] ) )
+    assert comp[ 0 ] == comp[ 1 ] == comp[ 4 ]
+    assert comp[ 2 ] == comp[ 3 ]
+    assert len( set( comp.tolist() ) ) == 3
+
+def test_orient_outward_fixes_flipped_faces():
+    md = MeshSphereData()
+    rng = np.random.RandomState( 1 )
+    md.flip( rng.random_sample( md.face_count() ) < 0.5 )
+    assert OpenEdges( md ) != ( 0, 0 )
+    assert OrientOutward( md ) is md
+    assert md.oriented
+    assert OpenEdges( md ) == ( 0, 0 )
+    assert Volume( md ) == pytest.approx( Volume( MeshSphereData() ), rel=1e-6 )
+
+def test_orient_outward_turns_inside_out_pieces():
+    # Two separate prisms, both inside out
+    a = NGonPrismData( 1, 1, 8 )
+    b = NGonPrismData( 1, 1, 6 )
+    md = MeshData( np.concatenate( ( a.verts, b.verts + np.float32( ( 5, 0, 0 ) ) ) ),
+                   a.face_list() + [ tuple( i + a.vertex_count() for i in f ) for f in b.face_list() ] )
+    md.flip()
+    assert Volume( md ) < 0
+    OrientOutward( md )
+    assert OpenEdges( md ) == ( 0, 0 )
+    assert Volume( md ) == pytest.approx( Volume( a ) + Volume( b ), rel=1e-6 )
+
+def test_orient_outward_open_piece():
+    # One side of a box, centered at the origin, faces away from its center
+    md = MeshData( [ ( -1, -1, 1 ), ( -1, 1, 1 ), ( 1, 1, 1 ), ( 1, -1, 1 ), ( 0, 0, -1 ) ], [ ( 0, 1, 2, 3 ) ] )
+    OrientOutward( md )
+    v = md.verts[ list( md.face_list()[0] ) ]
+    assert np.cross( v[ 1 ] - v[ 0 ], v[ 2 ] - v[ 0 ] )[ 2 ] > 0
+
+def test_orient_outward_empty():
+    md = MeshData( QUAD )
+    assert OrientOutward( md ).oriented
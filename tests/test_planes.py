@@ -0,0 +1,34 @@
+#
+# test_planes.py - Tests of MeshPlanes() and MeshIsConvex(), which ChooseBooleanSolver() reads the operands with
+#
+import numpy as np
+
+from russbpy import *
+
+def test_cube_planes():
+    md = CubeData()
+    assert len( MeshPlanes( md.verts, md.triangles(), 1e-4 ) ) == 6
+
+def test_back_to_back_faces_share_planes():
+    a = CubeData()
+    b = CubeData()
+    b.verts = b.verts + np.float32( ( 2, 0, 0 ) )
+    keys = np.concatenate( ( MeshPlanes( a.verts, a.triangles(), 1e-4 ), MeshPlanes( b.verts, b.triangles(), 1e-4 ) ) )
+    # The face at x = 1 faces +x on one cube and -x on the other, and the y and z faces are in the same planes
+    assert len( np.unique( keys ) ) == 7
+
+def test_degenerate_triangles_have_no_plane():
+    verts = np.array( [ ( 0, 0, 0 ), ( 1, 0, 0 ), ( 2, 0, 0 ) ], dtype=np.float32 )
+    assert len( MeshPlanes( verts, np.array( [ ( 0, 1, 2 ) ] ), 1e-4 ) ) == 0
+
+def test_convex():
+    for md in ( CubeData(), UVSphereData( 1, 16, 8 ), CylinderData( 1, 2, 12 ) ):
+        assert MeshIsConvex( md.verts, md.triangles(), 1e-4 )
+    torus = TorusData( 2, 0.5, 24, 12 )
+    assert not MeshIsConvex( torus.verts, torus.triangles(), 1e-4 )
+
+def test_distant_planes_do_not_collide():
+    # Planes far from the origin give large keys, which must still compare whole; the y and z planes are shared
+    md = CubeData()
+    keys = [ MeshPlanes( md.verts + np.float32( ( x, 0, 0 ) ), md.triangles(), 1e-6 ) for x in ( 0, 1e4, 2e4 ) ]
+    assert len( np.unique( np.concatenate( keys ) ) ) == 10
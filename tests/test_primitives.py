@@ -0,0 +1,120 @@
+#
+# test_primitives.py - Tests of the basic primitives built as MeshData
+#
+import math
+
+import numpy as np
+import pytest
+
+from russbpy import *
+from meshchecks import *
+
+@pytest.mark.parametrize( 'md', [ UVSphereData(), TorusData(), TorusData( quads=False ), CubeData(), CylinderData(), ConeData(), ConeData( 1, 0.5, 1 ) ],
+                          ids=[ 'uv_sphere', 'torus', 'torus_triangles', 'cube', 'cylinder', 'cone', 'frustum' ] )
+def test_solids_are_closed( md ):
+    assert IsClosed( md )
+    assert OpenEdges( md ) == ( 0, 0 )
+    assert md.oriented
+    assert Volume( md ) > 0
+
+def test_cube():
+    md = CubeData()
+    assert ( md.vertex_count(), md.face_count() ) == ( 8, 6 )
+    assert Volume( md ) == pytest.approx( 8.0 )
+
+def test_uv_sphere():
+    md = UVSphereData( 2, 16, 8 )
+    assert md.vertex_count() == 16 * 7 + 2
+    assert md.face_count() == 16 * 8
+    assert np.allclose( np.linalg.norm( md.verts, axis=1 ), 2.0, atol=1e-5 )
+
+def test_torus():
+    md = TorusData( 2, 0.5, 24, 8 )
+    assert ( md.vertex_count(), md.face_count() ) == ( 24 * 8, 24 * 8 )
+    ( x, y, z ) = md.verts.T.astype( np.float64 )
+    assert np.allclose( ( np.hypot( x, y ) - 2.0 ) ** 2 + z ** 2, 0.25, atol=1e-5 )
+
+def test_circle():
+    md = CircleData( 2, 12 )
+    assert ( md.vertex_count(), md.face_count(), len( md.edges ) ) == ( 12, 0, 12 )
+    assert np.allclose( np.linalg.norm( md.verts, axis=1 ), 2.0 )
+    assert np.all( md.verts[ :, 2 ] == 0 )
+
+def test_plane():
+    md = PlaneData()
+    assert ( md.vertex_count(), md.face_count() ) == ( 4, 1 )
+    v = md.verts[ list( md.face_list()[0] ) ]
+    assert np.cross( v[ 1 ] - v[ 0 ], v[ 2 ] - v[ 0 ] )[ 2 ] > 0
+
+def test_cone():
+    md = ConeData( 1, 0, 3, 16 )
+    assert md.verts[ :, 2 ].max() - md.verts[ :, 2 ].min() == pytest.approx( 3.0 )
+    area = 0.5 * 16 * math.sin( 2.0 * math.pi / 16 )
+    assert Volume( md ) == pytest.approx( area * 3.0 / 3.0, rel=1e-5 )
+
+# The vertex and face numbers follow Blender's primitives, so SelectVertex() and SelectFace() pick the same parts
+
+def test_circle_numbering():
+    md = CircleData( 1, 4 )
+    assert np.allclose( md.verts, [ ( 0, 1, 0 ), ( -1, 0, 0 ), ( 0, -1, 0 ), ( 1, 0, 0 ) ], atol=1e-6 )
+    assert md.edges.tolist() == [ [ 1, 0 ], [ 2, 1 ], [ 3, 2 ], [ 0, 3 ] ]
+
+def test_plane_numbering():
+    md = PlaneData()
+    assert md.verts[ :, :2 ].tolist() == [ [ -1, -1 ], [ 1, -1 ], [ -1, 1 ], [ 1, 1 ] ]
+    assert md.face_list() == [ ( 0, 1, 3, 2 ) ]
+
+def test_cube_numbering():
+    md = CubeData()
+    assert md.verts[ 5 ].tolist() == [ 1, -1, 1 ]
+    assert md.face_list()[0] == ( 0, 1, 3, 2 )
+
+def test_uv_sphere_numbering():
+    md = UVSphereData( 1, 8, 4 )
+    s = math.sqrt( 0.5 )
+    # The first meridian, pole to pole on the +Y side
+    assert np.allclose( md.verts[ :5 ], [ ( 0, 0, 1 ), ( 0, s, s ), ( 0, 1, 0 ), ( 0, s, -s ), ( 0, 0, -1 ) ], atol=1e-6 )
+    # The next meridian, turned clockwise seen from above, without its poles
+    assert np.allclose( md.verts[ 5:8 ], [ ( 0.5, 0.5, s ), ( s, s, 0 ), ( 0.5, 0.5, -s ) ], atol=1e-6 )
+    assert np.allclose( md.verts[ 8 ], ( s, 0, s ), atol=1e-6 )
+    faces = md.face_list()
+    assert faces[ :4 ] == [ ( 1, 0, 5 ), ( 2, 1, 5, 6 ), ( 3, 2, 6, 7 ), ( 4, 3, 7 ) ]
+    # The last strip closes back to the first meridian
+    assert faces[ -4 ] == ( 23, 0, 1 )
+
+def test_torus_numbering():
+    md = TorusData( 2, 0.5, 12, 6 )
+    assert np.allclose( md.verts[ 0 ], ( 2.5, 0, 0 ) )
+    assert np.allclose( md.verts[ 6 ], ( 2.5 * math.cos( math.pi / 6 ), 2.5 * math.sin( math.pi / 6 ), 0 ) )
+    faces = md.face_list()
+    assert faces[0] == ( 0, 6, 7, 1 )
+    assert faces[5] == ( 5, 11, 6, 0 )
+    assert faces[ -1 ] == ( 71, 5, 0, 66 )
+
+def test_cylinder_numbering():
+    n = 8
+    md = CylinderData( 1, 2, n )
+    s = math.sqrt( 0.5 )
+    c = math.cos( math.pi / n )
+    assert np.allclose( md.verts[ :4 ], [ ( 0, 1, -1 ), ( 0, 1, 1 ), ( s, s, -1 ), ( s, s, 1 ) ], atol=1e-6 )
+    # Subdivide() appends the edges' midpoints, in edge order, then the sides' centers
+    middle = ( c * math.sin( math.pi / n ), c * math.cos( math.pi / n ) )
+    assert np.allclose( md.verts[ 2 * n : 2 * n + 4 ],
+                        [ middle + ( -1, ), middle + ( 1, ), ( 0, 1, 0 ), ( s, s, 0 ) ], atol=1e-6 )
+    assert np.allclose( md.verts[ 2 * n + 4 ], ( md.verts[ 2 ] + md.verts[ 4 ] ) / 2, atol=1e-6 )
+    assert np.allclose( md.verts[ 2 * n + 6 ], ( md.verts[ 4 ] + md.verts[ 5 ] ) / 2, atol=1e-6 )
+    assert np.allclose( md.verts[ 5 * n : ], ( md.verts[ 0 : 2 * n : 2 ] + np.roll( md.verts[ 1 : 2 * n : 2 ], -1, axis=0 ) ) / 2, atol=1e-6 )
+    assert md.vertex_count() == 6 * n
+    assert md.face_count() == 4 * n + 2
+
+def test_cone_numbering():
+    md = ConeData( 1, 0.5, 2, 4 )
+    assert np.allclose( md.verts[ :4 ], [ ( 0, 1, -1 ), ( 0, 0.5, 1 ), ( 1, 0, -1 ), ( 0.5, 0, 1 ) ], atol=1e-6 )
+    assert md.face_list()[0] == ( 0, 1, 3, 2 )
+    # A point is merged into its end's point 0
+    md = ConeData( 1, 0, 2, 4 )
+    assert np.allclose( md.verts, [ ( 0, 1, -1 ), ( 0, 0, 1 ), ( 1, 0, -1 ), ( 0, -1, -1 ), ( -1, 0, -1 ) ], atol=1e-6 )
+    assert md.face_list()[ :2 ] == [ ( 0, 1, 2 ), ( 2, 1, 3 ) ]
+    md = ConeData( 0, 1, 2, 4 )
+    assert np.allclose( md.verts[ :3 ], [ ( 0, 0, -1 ), ( 0, 1, 1 ), ( 1, 0, 1 ) ], atol=1e-6 )
+    assert md.face_list()[0] == ( 0, 1, 2 )
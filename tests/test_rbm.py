@@ -0,0 +1,75 @@
+#
+# test_rbm.py - Tests of EncodeMeshData() and DecodeMeshData(), the compressed mesh (RBM) format
+#
+import numpy as np
+import pytest
+
+from russbpy import *
+
+def Triangles( verts, tris ):
+    """Return the sorted list of a mesh's triangles as corner coordinates, each rotated to start at its least corner
+
+    Rotating keeps the winding, so two meshes have the same list when they have the same oriented triangles.
+    """
+    corners = [ [ tuple( p ) for p in np.asarray( verts, dtype=np.float64 )[ t ].tolist() ] for t in np.asarray( tris ) ]
+    result = []
+    for c in corners:
+        k = c.index( min( c ) )
+        result.append( tuple( c[ k: ] + c[ :k ] ) )
+    return sorted( result )
+
+def test_round_trip_within_step():
+    md = UVSphereData( 10, 32, 16 )
+    ( verts, tris ) = ( md.verts, md.triangles() )
+    step = 0.01
+    ( v, t ) = DecodeMeshData( EncodeMeshData( verts, tris, step ) )
+    assert v.dtype == np.float32 and t.dtype == np.int32
+    assert v.shape == verts.shape and t.shape == tris.shape
+    # The vertices are reordered, and the sphere's are much further apart than step, so each is matched to the nearest
+    distances = np.linalg.norm( verts[ :, None, : ].astype( np.float64 ) - v[ None, :, : ], axis=2 )
+    nearest = np.argmin( distances, axis=1 )
+    assert len( np.unique( nearest ) ) == len( verts )
+    assert np.abs( v[ nearest ] - verts ).max() <= step / 2 + 1e-5
+    assert Triangles( v, t ) == Triangles( v, nearest[ tris ] )
+
+def test_exact_on_the_grid():
+    md = CubeData()
+    ( v, t ) = DecodeMeshData( EncodeMeshData( md.verts, md.triangles(), 0.5 ) )
+    assert Triangles( v, t ) == Triangles( md.verts, md.triangles() )
+
+def test_coincident_vertices_are_kept():
+    verts = np.array( [ ( 0, 0, 0 ), ( 1, 0, 0 ), ( 0, 1, 0 ), ( 0.001, 0, 0 ) ], dtype=np.float32 )
+    tris = np.array( [ ( 0, 1, 2 ), ( 3, 2, 1 ) ] )
+    ( v, t ) = DecodeMeshData( EncodeMeshData( verts, tris, 0.1 ) )
+    assert len( v ) == 4
+    assert len( np.unique( t ) ) == 4
+
+def test_compresses():
+    md = UVSphereData( 10, 64, 32 )
+    ( verts, tris ) = ( md.verts, md.triangles() )
+    data = EncodeMeshData( verts, tris, 0.01 )
+    assert len( data ) < ( verts.nbytes + tris.astype( np.int32 ).nbytes ) / 3
+
+def test_large_coordinates():
+    # Differences that need more than two bytes are packed wider
+    verts = np.array( [ ( 0, 0, 0 ), ( 1e5, 0, 0 ), ( 0, 1e5, 0 ), ( 0, 0, -1e5 ) ], dtype=np.float32 )
+    tris = np.array( [ ( 0, 2, 1 ), ( 0, 1, 3 ), ( 0, 3, 2 ), ( 1, 2, 3 ) ] )
+    ( v, t ) = DecodeMeshData( EncodeMeshData( verts, tris, 0.001 ) )
+    assert Triangles( v, t ) == Triangles( verts, tris )
+
+def test_empty():
+    ( v, t ) = DecodeMeshData( EncodeMeshData( np.zeros( ( 0, 3 ) ), np.zeros( ( 0, 3 ), dtype=np.int32 ), 0.1 ) )
+    assert v.shape == ( 0, 3 ) and t.shape == ( 0, 3 )
+
+def test_not_encoded():
+    with pytest.raises( Exception ):
+        DecodeMeshData( b'solid not a mesh' )
+
+def test_read_rbm( tmpdir ):
+    fn = str( tmpdir.join( 'cube.rbm' ) )
+    md = CubeData()
+    with open( fn, 'wb' ) as f:
+        f.write( EncodeMeshData( md.verts, md.triangles(), 0.5 ) )
+    for read in ( ReadRBM( fn ), ReadMesh( fn ) ):
+        assert read.oriented
+        assert Triangles( read.verts, read.triangles() ) == Triangles( md.verts, md.triangles() )
@@ -0,0 +1,64 @@
+#
+# test_snapshot.py - Tests of WriteSnapshotData() and SnapshotData, the memory-mapped snapshot format
+#
+import numpy as np
+import pytest
+
+from russbpy import *
+
+def Objects():
+    """Return a list of ( name, verts, tris, matrix, color ) objects, as from ObjectSnapshot()"""
+    cube = CubeData()
+    sphere = UVSphereData( 1, 16, 8 )
+    moved = np.identity( 4 )
+    moved[ :3, 3 ] = ( 5, 0, 0 )
+    return [ ( 'cube', cube.verts, cube.triangles(), np.identity( 4 ), ( 1.0, 0.5, 0.0 ) ),
+             ( u'sphère', sphere.verts, sphere.triangles(), moved, None ),
+             ( 'empty', np.zeros( ( 0, 3 ), dtype=np.float32 ), np.zeros( ( 0, 3 ), dtype=np.int32 ), np.identity( 4 ), None ) ]
+
+def test_round_trip( tmpdir ):
+    fn = str( tmpdir.join( 'scene.rbs' ) )
+    objects = Objects()
+    assert WriteSnapshotData( fn, objects ) == 3
+    snap = SnapshotData( fn )
+    assert len( snap ) == 3
+    for ( i, ( name, verts, tris, matrix, color ) ) in enumerate( objects ):
+        assert snap.name( i ) == name
+        assert snap.index( name ) == i
+        ( v, t ) = snap.mesh( i )
+        assert np.array_equal( v, verts ) and np.array_equal( t, tris )
+        assert np.array_equal( snap.matrices[ i ], matrix )
+        assert snap.color( i ) == color
+
+def test_arrays_are_aligned( tmpdir ):
+    fn = str( tmpdir.join( 'scene.rbs' ) )
+    WriteSnapshotData( fn, Objects() )
+    snap = SnapshotData( fn )
+    for key in ( 'verts', 'tris', 'matrices' ):
+        assert isinstance( getattr( snap, key ), np.memmap )
+        assert getattr( snap, key ).offset % 64 == 0
+
+def test_missing_name( tmpdir ):
+    fn = str( tmpdir.join( 'scene.rbs' ) )
+    WriteSnapshotData( fn, Objects() )
+    with pytest.raises( ValueError ):
+        SnapshotData( fn ).index( 'nothing' )
+
+def test_empty_snapshot( tmpdir ):
+    fn = str( tmpdir.join( 'empty.rbs' ) )
+    assert WriteSnapshotData( fn, [] ) == 0
+    assert len( SnapshotData( fn ) ) == 0
+
+def test_not_a_snapshot( tmpdir ):
+    fn = tmpdir.join( 'other.rbs' )
+    fn.write( 'solid not a snapshot' )
+    with pytest.raises( Exception ):
+        SnapshotData( str( fn ) )
+
+def test_world_mesh( tmpdir ):
+    fn = str( tmpdir.join( 'scene.rbs' ) )
+    objects = Objects()
+    WriteSnapshotData( fn, objects )
+    ( verts, tris ) = SnapshotData( fn ).world_mesh( 1 )
+    assert np.allclose( verts, objects[1][1] + np.float32( ( 5, 0, 0 ) ) )
+    assert np.array_equal( tris, objects[1][2] )
@@ -0,0 +1,84 @@
+#
+# test_stl.py - Tests of WriteSTLData(), the binary STL writer, and its NumPy parts
+#
+import os
+
+import numpy as np
+
+from russbpy import *
+
+RECORD = np.dtype( [ ( 'normal', '<f4', ( 3, ) ), ( 'v', '<f4', ( 3, 3 ) ), ( 'attr', '<u2' ) ] )
+
+def ReadRecords( fn ):
+    """Return ( count, records ), the triangle count in a binary STL file's header and its records"""
+    with open( fn, 'rb' ) as f:
+        data = f.read()
+    count = int( np.frombuffer( data[ 80:84 ], dtype='<u4' )[0] )
+    return ( count, np.frombuffer( data, dtype=RECORD, offset=84 ) )
+
+def Cube():
+    """Return the ( verts, tris ) of CubeData(), as triangles"""
+    md = CubeData()
+    return ( md.verts, md.triangles() )
+
+def test_triangle_normals():
+    corners = np.array( [ [ ( 0, 0, 0 ), ( 2, 0, 0 ), ( 0, 3, 0 ) ],
+                          [ ( 0, 0, 0 ), ( 0, 3, 0 ), ( 2, 0, 0 ) ],
+                          [ ( 1, 1, 1 ), ( 1, 1, 2 ), ( 1, 2, 1 ) ] ], dtype=np.float64 )
+    assert np.allclose( TriangleNormals( corners ), [ ( 0, 0, 1 ), ( 0, 0, -1 ), ( -1, 0, 0 ) ] )
+
+def test_triangle_normals_are_unit():
+    rng = np.random.RandomState( 1 )
+    n = TriangleNormals( rng.random_sample( ( 100, 3, 3 ) ) )
+    assert np.allclose( np.linalg.norm( n, axis=1 ), 1.0 )
+
+def test_degenerate_triangles_have_zero_normals():
+    corners = np.array( [ [ ( 0, 0, 0 ), ( 1, 1, 1 ), ( 2, 2, 2 ) ], [ ( 1, 0, 0 ), ( 1, 0, 0 ), ( 1, 0, 0 ) ] ], dtype=np.float64 )
+    n = TriangleNormals( corners )
+    assert np.all( n == 0 )
+    assert np.all( np.isfinite( n ) )
+
+def test_records( tmpdir ):
+    fn = str( tmpdir.join( 'cube.stl' ) )
+    ( verts, tris ) = Cube()
+    assert WriteSTLData( fn, [ ( verts, tris ) ] ) == len( tris )
+    assert os.path.getsize( fn ) == 84 + 50 * len( tris )
+    ( count, records ) = ReadRecords( fn )
+    assert count == len( tris )
+    assert np.array_equal( records[ 'v' ], verts[ tris ] )
+    assert np.all( records[ 'attr' ] == 0 )
+
+def test_normals( tmpdir ):
+    fn = str( tmpdir.join( 'cube.stl' ) )
+    ( verts, tris ) = Cube()
+    WriteSTLData( fn, [ ( verts, tris ) ] )
+    ( count, records ) = ReadRecords( fn )
+    n = records[ 'normal' ].astype( np.float64 )
+    assert np.allclose( np.linalg.norm( n, axis=1 ), 1.0, atol=1e-6 )
+    # The cube's faces are axis-aligned and face outward, away from its center
+    centers = records[ 'v' ].astype( np.float64 ).mean( axis=1 )
+    assert np.allclose( n, np.round( centers ), atol=1e-6 )
+
+def test_meshes_are_concatenated( tmpdir ):
+    fn = str( tmpdir.join( 'two.stl' ) )
+    ( verts, tris ) = Cube()
+    moved = verts + np.float32( ( 5, 0, 0 ) )
+    assert WriteSTLData( fn, [ ( verts, tris ), ( moved, tris ) ] ) == 2 * len( tris )
+    ( count, records ) = ReadRecords( fn )
+    assert np.array_equal( records[ 'v' ], np.concatenate( ( verts[ tris ], moved[ tris ] ) ) )
+
+def test_threads_and_chunks( tmpdir ):
+    md = UVSphereData( 1, 32, 16 )
+    meshes = [ ( md.verts, md.triangles() ), Cube() ]
+    one = str( tmpdir.join( 'one.stl' ) )
+    many = str( tmpdir.join( 'many.stl' ) )
+    WriteSTLData( one, meshes, threads=1 )
+    WriteSTLData( many, meshes, threads=4, chunk=7 )
+    with open( one, 'rb' ) as a, open( many, 'rb' ) as b:
+        assert a.read() == b.read()
+
+def test_empty( tmpdir ):
+    fn = str( tmpdir.join( 'empty.stl' ) )
+    assert WriteSTLData( fn, [] ) == 0
+    assert os.path.getsize( fn ) == 84
+    assert ReadRecords( fn )[0] == 0